@@ -0,0 +1,202 @@
+# File: PythonUtils/batch_pipeline.py
+
+import os
+import io
+import csv
+import sys
+import time
+import argparse
+import xml.etree.ElementTree as ET
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+
+import check_localization_coverage
+import check_trcn_translations_coverage
+import find_missing_details
+from config_utils import load_config, get_setting
+from content_package import FILELIST_NAME, read_filelist
+from identifier_index import build_identifier_index, load_discovery_settings, resolve_jobs
+
+# ----------------------------- CONFIG -----------------------------
+def load_settings(cfg=None) -> dict:
+    """Read the settings used by batch runs from config.ini"""
+    cfg = cfg if cfg is not None else load_config()
+    details_csv = get_setting(cfg, "MISSING_DETAILS_CSV")
+    return {
+        "WORKSHOP_DIR": get_setting(cfg, "AUTO_UPDATE_SRC_DIR", ""),  # mod IDs are folders in here
+        # Each mod's translation sits at the same place inside the mod as LOCALIZATION_FILE does in SRCDIR
+        "LOCALIZATION_PATH": os.path.relpath(get_setting(cfg, "LOCALIZATION_FILE"), get_setting(cfg, "SRCDIR")),
+        "TRANSLATIONS_DIR": get_setting(cfg, "TRANSLATIONS_DIR"),
+        "TRANSLATIONS_CACHE_FILE": get_setting(cfg, "TRANSLATIONS_CACHE_FILE", ""),
+        "TRANSLATIONS_SNAPSHOT_FILE": get_setting(cfg, "TRANSLATIONS_SNAPSHOT_FILE", ""),
+        "BATCH_OUTPUT_DIR": get_setting(cfg, "BATCH_OUTPUT_DIR", os.path.join(os.path.dirname(details_csv), "batch")),
+        "CACHE": bool(get_setting(cfg, "PARSE_CACHE_FILE", "")),  # one parse cache per mod in its output folder
+        "BATCH_JOBS": resolve_jobs(get_setting(cfg, "BATCH_JOBS", "0")),  # mods in parallel, 0 = one per CPU
+        **load_discovery_settings(cfg),
+    }
+# ----------------------------------------------------------------
+
+SUMMARY_FIELDS = ['mod', 'name', 'xml_files', 'identifiers', 'missing', 'truly_missing',
+                  'entries', 'rejected', 'seconds', 'error']
+
+def resolve_mods(workshop_dir: str, mods: list[str], all_mods: bool = False) -> list[str]:
+    """
+    Mod folders from workshop IDs (folders in workshop_dir) or paths; with all_mods,
+    every folder of workshop_dir holding a filelist.xml, in name order.
+    """
+    folders = []
+    if all_mods:
+        if not os.path.isdir(workshop_dir):
+            print(f"Error: Workshop folder not found: {workshop_dir}", file=sys.stderr)
+            sys.exit(1)
+        folders += [os.path.join(workshop_dir, name) for name in sorted(os.listdir(workshop_dir))
+                    if os.path.isfile(os.path.join(workshop_dir, name, FILELIST_NAME))]
+    for mod in mods:
+        folder = mod if os.path.isdir(mod) else os.path.join(workshop_dir, mod)
+        if not os.path.isdir(folder):
+            print(f"Error: Mod not found: {mod} (neither a folder nor a mod ID in {workshop_dir})", file=sys.stderr)
+            sys.exit(1)
+        folders.append(folder)
+    # The same mod given twice would write the same outputs twice
+    return list(dict.fromkeys(os.path.normpath(folder) for folder in folders))
+
+# ---------------------- worker ----------------------
+
+# Game identifiers, handed to each worker process once instead of with every mod
+_translated = None
+
+def _init_worker(translated: set[str]):
+    global _translated
+    _translated = translated
+
+def process_mod(settings: dict, mod_dir: str, translated: set[str]) -> dict:
+    """
+    Coverage and missing details of one mod, written to BATCH_OUTPUT_DIR/<mod folder>/:
+    the details CSV, the rejection log and report.txt with the stage reports.
+    Returns the mod's summary row; a failing mod records its error instead of stopping the batch.
+    """
+    start = time.perf_counter()
+    mod = os.path.basename(mod_dir)
+    out_dir = os.path.join(settings["BATCH_OUTPUT_DIR"], mod)
+    os.makedirs(out_dir, exist_ok=True)
+    row = dict.fromkeys(SUMMARY_FIELDS, "")
+    row['mod'] = mod
+
+    report = io.StringIO()
+    try:
+        with redirect_stdout(report):
+            try:
+                attrs, _ = read_filelist(os.path.join(mod_dir, FILELIST_NAME))
+                row['name'] = attrs.get("name", "")
+            except (OSError, ET.ParseError):
+                pass  # walk discovery still works without a filelist
+
+            cache_file = os.path.join(out_dir, "parse_cache.pickle") if settings["CACHE"] else ""
+            index = build_identifier_index(mod_dir, cache_file, 1, settings["FILE_DISCOVERY"],
+                                           settings["INCLUDE_GLOBS"], settings["EXCLUDE_GLOBS"])
+            visible = index.visible_identifiers()
+
+            missing_file = os.path.join(out_dir, "missing_identifiers.txt")
+            localization_file = os.path.join(mod_dir, settings["LOCALIZATION_PATH"])
+            if os.path.isfile(localization_file):
+                missing = check_localization_coverage.run(
+                    {"IDENTIFIERS_FILE": "", "LOCALIZATION_FILE": localization_file,
+                     "MATCHES_OUTPUT": os.path.join(out_dir, "matched_identifiers.txt"), "MISSING_OUTPUT": missing_file},
+                    visible, dump=False)
+            else:
+                # A mod nobody has translated yet simply misses everything
+                missing = visible
+                print(f"{localization_file} not found; all {len(visible)} visible identifiers are missing")
+            truly_missing = check_trcn_translations_coverage.run(
+                {"MISSING_FILE": missing_file, "TRANSLATIONS_DIR": settings["TRANSLATIONS_DIR"],
+                 "TRANSLATIONS_CACHE_FILE": ""},
+                missing, dump=False, translated_identifiers=translated)
+            rows = find_missing_details.run(
+                {"SRCDIR": mod_dir, "MISSING_FILE": missing_file,
+                 "MISSING_DETAILS_CSV": os.path.join(out_dir, "missing_identifiers_details.csv"),
+                 "REJECTION_LOG": os.path.join(out_dir, "rejection_log.txt"),
+                 "PARSE_CACHE_FILE": "", "JOBS": 1, "FILE_DISCOVERY": settings["FILE_DISCOVERY"],
+                 "INCLUDE_GLOBS": settings["INCLUDE_GLOBS"], "EXCLUDE_GLOBS": settings["EXCLUDE_GLOBS"]},
+                truly_missing, dump=False, index=index)
+        row.update(xml_files=index.xml_count, identifiers=len(visible), missing=len(missing),
+                   truly_missing=len(truly_missing), entries=len(rows),
+                   rejected=len(truly_missing) - len({r.identifier for r in rows}))
+    except (Exception, SystemExit) as e:
+        # Stages exit on fatal errors; in a batch that only fails this mod
+        row['error'] = f"{type(e).__name__}: {e}"
+        report.write(f"\nError: {row['error']}\n")
+    row['seconds'] = round(time.perf_counter() - start, 2)
+
+    with open(os.path.join(out_dir, "report.txt"), "w", encoding="utf-8") as f:
+        f.write(report.getvalue())
+    return row
+
+def _process_mod_task(task: tuple[dict, str]) -> dict:
+    settings, mod_dir = task
+    return process_mod(settings, mod_dir, _translated)
+
+# ---------------------- batch ----------------------
+
+def run(settings: dict, mod_dirs: list[str]) -> list[dict]:
+    """
+    Run stages 2-4 for every mod folder, BATCH_JOBS mods at a time.
+    TRANSLATIONS_DIR (or its snapshot) is read once here and shared by every mod.
+    Writes batch_summary.csv to BATCH_OUTPUT_DIR and returns its rows in mod_dirs order.
+    """
+    if not mod_dirs:
+        print("No mods to process.")
+        return []
+    start = time.perf_counter()
+    os.makedirs(settings["BATCH_OUTPUT_DIR"], exist_ok=True)
+    translated = check_trcn_translations_coverage.load_translated_identifiers(settings)
+
+    jobs = min(settings["BATCH_JOBS"], len(mod_dirs))
+    tasks = [(settings, mod_dir) for mod_dir in mod_dirs]
+    if jobs <= 1:
+        summary = [process_mod(settings, mod_dir, translated) for mod_dir in mod_dirs]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(translated,)) as executor:
+            summary = list(executor.map(_process_mod_task, tasks))
+
+    summary_file = os.path.join(settings["BATCH_OUTPUT_DIR"], "batch_summary.csv")
+    with open(summary_file, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(summary)
+
+    print("\n" + "="*90)
+    print(f"{'Mod':<14} {'Name':<32} {'Identifiers':>11} {'Missing':>8} {'Untransl.':>9} {'Entries':>8}")
+    print("-"*90)
+    for row in summary:
+        name = (row['name'] or "")[:32]
+        if row['error']:
+            print(f"{row['mod']:<14} {name:<32} FAILED: {row['error']}")
+            continue
+        print(f"{row['mod']:<14} {name:<32} {row['identifiers']:>11} {row['missing']:>8} "
+              f"{row['truly_missing']:>9} {row['entries']:>8}")
+    print("="*90)
+    failed = sum(1 for row in summary if row['error'])
+    print(f"{len(summary)} mods in {time.perf_counter() - start:.1f}s with {max(jobs, 1)} processes"
+          + (f", {failed} failed" if failed else ""))
+    print(f"\nPer-mod reports saved to: {settings['BATCH_OUTPUT_DIR']}")
+    print(f"Summary saved to: {summary_file}")
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Run coverage and missing details for many mods at once.")
+    parser.add_argument("mods", nargs="*", help="workshop mod IDs (folders in AUTO_UPDATE_SRC_DIR) or mod folders")
+    parser.add_argument("--all", action="store_true", help="every mod in AUTO_UPDATE_SRC_DIR")
+    parser.add_argument("--jobs", type=int, help="mods processed in parallel (default BATCH_JOBS, 0 = one per CPU)")
+    args = parser.parse_args()
+    if not args.mods and not args.all:
+        parser.error("give mod IDs or folders, or --all")
+
+    settings = load_settings()
+    if args.jobs is not None:
+        settings["BATCH_JOBS"] = resolve_jobs(args.jobs)
+    summary = run(settings, resolve_mods(settings["WORKSHOP_DIR"], args.mods, args.all))
+    if any(row['error'] for row in summary):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+# File: PythonUtils/benchmark_pipeline.py
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+import configparser
+from pathlib import Path
+from contextlib import redirect_stdout, redirect_stderr
+
+import pipeline
+from generate_synthetic_mod import generate_mod_tree
+
+# ----------------------------- CONFIG -----------------------------
+UTILS_DIR = Path(__file__).parent.resolve()
+
+DEFAULT_BASELINE = UTILS_DIR / "Output" / "benchmark_baseline.json"
+# Outside the project on purpose: SRCDIR = . would otherwise index the synthetic trees
+DEFAULT_WORKDIR = Path(tempfile.gettempdir()) / "barotrauma_loc_benchmark"
+
+# Bump when generate_synthetic_mod output changes so cached trees are rebuilt
+TREE_VERSION = 2
+
+# A stage only counts as regressed when it is both relatively and absolutely slower/larger
+MIN_WALL_DELTA_S = 0.05
+MIN_PEAK_DELTA_MB = 1.0
+# ----------------------------------------------------------------
+
+def prepare_tree(workdir: Path, scale: float, seed: int) -> Path:
+    """Generate (or reuse) the synthetic tree for one scale and write its config.ini"""
+    tree_dir = workdir / f"scale_{scale:g}"
+    stamp_file = tree_dir / "generated.json"
+    stamp = {"version": TREE_VERSION, "scale": scale, "seed": seed}
+
+    if not (stamp_file.exists() and json.loads(stamp_file.read_text(encoding="utf-8")) == stamp):
+        if tree_dir.exists():
+            shutil.rmtree(tree_dir)
+        print(f"Generating synthetic mod tree at {scale:g}x in {tree_dir} ...")
+        stats = generate_mod_tree(str(tree_dir), scale, seed)
+        print(f"   → {stats['files']} XML files, {stats['definitions']} definitions, {stats['bytes'] / 1e6:.1f} MB")
+        stamp_file.write_text(json.dumps(stamp), encoding="utf-8")
+
+    (tree_dir / "Output").mkdir(exist_ok=True)
+    config = configparser.ConfigParser()
+    config["CONFIG"] = {
+        "SRCDIR": "Mod",
+        "IDENTIFIERS_FILE": "Output/extracted_identifiers.txt",
+        "LOCALIZATION_FILE": "Mod/Translations/TrCn.xml",
+        "MATCHES_OUTPUT": "Output/matched_identifiers.txt",
+        "MISSING_OUTPUT": "Output/missing_identifiers.txt",
+        "REJECTION_LOG_FILE": "Output/rejection_log.txt",
+        "MISSING_DETAILS_CSV": "Output/missing_identifiers_details.csv",
+        "TRANSLATIONS_DIR": "GameTexts/TraditionalChinese",
+        "LOCALIZATION_XML_OUTPUT": "Output/MissingTranslations.xml",
+        "PARSE_CACHE_FILE": "Output/parse_cache.pickle",
+        "TRANSLATIONS_CACHE_FILE": "Output/translations_cache.pickle",
+    }
+    with (tree_dir / "config.ini").open("w", encoding="utf-8") as f:
+        config.write(f)
+    return tree_dir
+
+def measure_pipeline(cfg, use_cache: bool, jobs: int, trace_memory: bool) -> dict:
+    """Run the in-process pipeline once and return {stage: seconds or peak MB}"""
+    results = {}
+
+    def run_stage(script_name, stage_func, *args, **kwargs):
+        name = script_name.removesuffix(".py")
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull), redirect_stderr(devnull):
+            if trace_memory:
+                tracemalloc.reset_peak()
+                result = stage_func(*args, **kwargs)
+                results[name] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            else:
+                start = time.perf_counter()
+                result = stage_func(*args, **kwargs)
+                results[name] = time.perf_counter() - start
+        return result
+
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        pipeline.run_pipeline(cfg, dump=False, use_cache=use_cache, jobs=jobs, run_stage=run_stage)
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    return results
+
+def benchmark_scale(tree_dir: Path, repeat: int, warm: bool, jobs: int) -> dict:
+    """
+    Wall time (best of repeat) and peak traced memory for every stage at one scale.
+    Cold runs bypass the parse caches; warm runs populate them first.
+    Memory is measured in a separate run because tracemalloc slows everything down.
+    """
+    cwd = os.getcwd()
+    os.chdir(tree_dir)
+    try:
+        config = configparser.ConfigParser()
+        config.read("config.ini", encoding="utf-8")
+        cfg = config["CONFIG"]
+        for cache_file in ("Output/parse_cache.pickle", "Output/translations_cache.pickle"):
+            if os.path.exists(cache_file):
+                os.remove(cache_file)
+        if warm:
+            measure_pipeline(cfg, use_cache=True, jobs=jobs, trace_memory=False)
+
+        walls = [measure_pipeline(cfg, warm, jobs, trace_memory=False) for _ in range(max(1, repeat))]
+        peaks = measure_pipeline(cfg, warm, jobs, trace_memory=True)
+    finally:
+        os.chdir(cwd)
+
+    return {
+        stage: {
+            "wall_s": round(min(run[stage] for run in walls), 4),
+            "peak_mb": round(peaks[stage], 2),
+        }
+        for stage in walls[0]
+    }
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regression messages for stages slower or larger than baseline * (1 + tolerance)"""
+    regressions = []
+    for scale, stages in results.items():
+        base_stages = baseline.get(scale, {})
+        for stage, now in stages.items():
+            base = base_stages.get(stage)
+            if not base:
+                continue
+            if now["wall_s"] > base["wall_s"] * (1 + tolerance) and now["wall_s"] - base["wall_s"] > MIN_WALL_DELTA_S:
+                regressions.append(f"{scale}x {stage}: wall {base['wall_s']:.3f}s → {now['wall_s']:.3f}s")
+            if now["peak_mb"] > base["peak_mb"] * (1 + tolerance) and now["peak_mb"] - base["peak_mb"] > MIN_PEAK_DELTA_MB:
+                regressions.append(f"{scale}x {stage}: peak {base['peak_mb']:.1f}MB → {now['peak_mb']:.1f}MB")
+    return regressions
+
+def print_table(results: dict, baseline: dict):
+    print("\n" + "="*88)
+    print(f"{'scale':>6}  {'stage':<36}{'wall (s)':>10}{'base (s)':>10}{'peak (MB)':>12}{'base (MB)':>12}")
+    print("="*88)
+    for scale, stages in results.items():
+        for stage, now in stages.items():
+            base = baseline.get(scale, {}).get(stage, {})
+            base_wall = f"{base['wall_s']:.3f}" if base else "-"
+            base_peak = f"{base['peak_mb']:.1f}" if base else "-"
+            print(f"{scale + 'x':>6}  {stage:<36}{now['wall_s']:>10.3f}{base_wall:>10}{now['peak_mb']:>12.1f}{base_peak:>12}")
+    print("="*88)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on synthetic mod trees.")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10, 100],
+                        help="tree sizes relative to this mod (default: 1 10 100)")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per scale; the best is kept (default 3)")
+    parser.add_argument("--warm", action="store_true", help="measure with populated parse caches")
+    parser.add_argument("--jobs", type=int, default=1, help="XML parsing worker processes (0 = one per CPU)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", type=Path, default=DEFAULT_WORKDIR,
+                        help=f"where synthetic trees are generated and reused (default: {DEFAULT_WORKDIR})")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE,
+                        help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed slowdown/growth over the baseline (default 0.2 = 20%%)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    args.workdir.mkdir(parents=True, exist_ok=True)
+
+    results = {}
+    for scale in args.scales:
+        tree_dir = prepare_tree(args.workdir, scale, args.seed)
+        print(f"Benchmarking {scale:g}x ({'warm' if args.warm else 'cold'}, jobs={args.jobs}) ...")
+        results[f"{scale:g}"] = benchmark_scale(tree_dir, args.repeat, args.warm, args.jobs)
+
+    mode = "warm" if args.warm else "cold"
+    baseline = {}
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8")).get(mode, {})
+
+    print_table(results, baseline)
+
+    if args.save_baseline:
+        stored = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else {}
+        stored.setdefault(mode, {}).update(results)
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"\nBaseline saved to: {args.baseline}")
+        return
+
+    if not baseline:
+        print(f"\nNo {mode} baseline at {args.baseline}; run with --save-baseline to create one.")
+        return
+
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n✗ {len(regressions)} regression(s) over {args.tolerance:.0%} tolerance:", file=sys.stderr)
+        for line in regressions:
+            print(f"   {line}", file=sys.stderr)
+        sys.exit(1)
+    print(f"\n✓ No regressions over {args.tolerance:.0%} tolerance.")
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,19 @@
-import re
 import sys
-import configparser
 from pathlib import Path
 
-# ----------------------------- CONFIG -----------------------------
-CONFIG_FILE = "config.ini"
-
-config = configparser.ConfigParser()
-if not Path(CONFIG_FILE).exists():
-    print(f"Error: {CONFIG_FILE} not found!", file=sys.stderr)
-    sys.exit(1)
+from config_utils import load_config, get_setting
+from localization_keys import identifiers_in_file
 
-config.read(CONFIG_FILE, encoding="utf-8")
-try:
-    IDENTIFIERS_FILE = config["CONFIG"]["IDENTIFIERS_FILE"].strip('"\' ')
-    LOCALIZATION_FILE = config["CONFIG"]["LOCALIZATION_FILE"].strip('"\' ')
-    MATCHES_OUTPUT = config.get("CONFIG", "MATCHES_OUTPUT", fallback="matched_identifiers.txt").strip('"\' ')
-    MISSING_OUTPUT = config.get("CONFIG", "MISSING_OUTPUT", fallback="missing_identifiers.txt").strip('"\' ')
-except KeyError as e:
-    print(f"Error: Missing required key in config.ini: {e}", file=sys.stderr)
-    sys.exit(1)
+# ----------------------------- CONFIG -----------------------------
+def load_settings(cfg=None) -> dict:
+    """Read the settings used by this stage from config.ini"""
+    cfg = cfg if cfg is not None else load_config()
+    return {
+        "IDENTIFIERS_FILE": get_setting(cfg, "IDENTIFIERS_FILE"),
+        "LOCALIZATION_FILE": get_setting(cfg, "LOCALIZATION_FILE"),
+        "MATCHES_OUTPUT": get_setting(cfg, "MATCHES_OUTPUT", "matched_identifiers.txt"),
+        "MISSING_OUTPUT": get_setting(cfg, "MISSING_OUTPUT", "missing_identifiers.txt"),
+    }
 # ----------------------------------------------------------------
 
 def load_identifiers(file_path: Path) -> set[str]:
@@ -41,26 +35,21 @@ def find_used_identifiers(file_path: Path) -> set[str]:
         print(f"Error: Localization file not found: {file_path}", file=sys.stderr)
         sys.exit(1)
     
-    pattern = re.compile(r'(?:<|&lt;)[^>]*\.([^>]+?)(?:>|/&gt;|&gt;)')
-    used = set()
-    
-    with file_path.open("r", encoding="utf-8", errors="ignore") as f:
-        for line in f:
-            matches = pattern.findall(line)
-            for match in matches:
-                ident = match.strip()
-                if ident:
-                    used.add(ident)
+    # Element keys like <entityname.identifier>, read straight from the file bytes
+    used = identifiers_in_file(file_path)
     
     print(f"Found {len(used)} identifiers used in {file_path}.")
     return used
 
-def main():
-    identifiers_path = Path(IDENTIFIERS_FILE)
-    localization_path = Path(LOCALIZATION_FILE)
-    
-    all_identifiers = load_identifiers(identifiers_path)
-    used_identifiers = find_used_identifiers(localization_path)
+def run(settings: dict, all_identifiers: set[str] = None, dump: bool = True) -> set[str]:
+    """
+    Stage 2: return the identifiers that have no key in LOCALIZATION_FILE.
+    all_identifiers comes from stage 1 in-process, or from IDENTIFIERS_FILE when omitted.
+    The matched/missing lists are only written to disk when dump is True.
+    """
+    if all_identifiers is None:
+        all_identifiers = load_identifiers(Path(settings["IDENTIFIERS_FILE"]))
+    used_identifiers = find_used_identifiers(Path(settings["LOCALIZATION_FILE"]))
     
     matched = all_identifiers & used_identifiers
     missing = all_identifiers - used_identifiers
@@ -72,17 +61,23 @@ def main():
     print(f"Missing in localization file:    {len(missing)}")
     print("="*50)
     
-    if matched:
+    if matched and dump:
         sorted_matched = sorted(matched)
-        Path(MATCHES_OUTPUT).write_text("\n".join(sorted_matched) + "\n", encoding="utf-8")
-        print(f"\nMatched identifiers saved to: '{MATCHES_OUTPUT}'.")
+        Path(settings["MATCHES_OUTPUT"]).write_text("\n".join(sorted_matched) + "\n", encoding="utf-8")
+        print(f"\nMatched identifiers saved to: '{settings['MATCHES_OUTPUT']}'.")
     
     if missing:
-        sorted_missing = sorted(missing)
-        Path(MISSING_OUTPUT).write_text("\n".join(sorted_missing) + "\n", encoding="utf-8")
-        print(f"Missing identifiers saved to: '{MISSING_OUTPUT}'.")
+        if dump:
+            sorted_missing = sorted(missing)
+            Path(settings["MISSING_OUTPUT"]).write_text("\n".join(sorted_missing) + "\n", encoding="utf-8")
+            print(f"Missing identifiers saved to: '{settings['MISSING_OUTPUT']}'.")
     else:
         print("\nAll identifiers are present in the localization file!")
+    
+    return missing
+
+def main():
+    run(load_settings())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,216 @@
+# File: PythonUtils/check_stale_translations.py
+
+import os
+import csv
+import sys
+import json
+import hashlib
+import argparse
+import xml.etree.ElementTree as ET
+
+import instrumentation
+from config_utils import load_config, get_setting
+from content_package import FILELIST_NAME, read_filelist
+from generate_localization_xml import entry_prefixes
+from identifier_index import IdentifierIndex, build_identifier_index, load_discovery_settings, resolve_jobs
+from translation_memory import read_localization_texts
+
+# ----------------------------- CONFIG -----------------------------
+def load_settings(cfg=None) -> dict:
+    """Read the settings used by this stage from config.ini"""
+    cfg = cfg if cfg is not None else load_config()
+    details_csv = get_setting(cfg, "MISSING_DETAILS_CSV")
+    localization_file = get_setting(cfg, "LOCALIZATION_FILE")
+    return {
+        "SRCDIR": get_setting(cfg, "SRCDIR"),
+        "LOCALIZATION_FILE": localization_file,
+        # The mod's English.xml; its text is the English source of the keys it has
+        "ENGLISH_LOCALIZATION_FILE": get_setting(cfg, "ENGLISH_LOCALIZATION_FILE",
+                                                 os.path.join(os.path.dirname(localization_file), "English.xml")),
+        "TRANSLATION_MANIFEST_FILE": get_setting(cfg, "TRANSLATION_MANIFEST_FILE", ""),  # empty = stage disabled
+        "STALE_TRANSLATIONS_CSV": get_setting(cfg, "STALE_TRANSLATIONS_CSV",
+                                              os.path.join(os.path.dirname(details_csv), "stale_translations.csv")),
+        "PARSE_CACHE_FILE": get_setting(cfg, "PARSE_CACHE_FILE", ""),
+        "JOBS": resolve_jobs(get_setting(cfg, "JOBS", "1")),
+        **load_discovery_settings(cfg),
+    }
+# ----------------------------------------------------------------
+
+MANIFEST_VERSION = 2  # 2: English.xml text is hashed where it has the key
+# Manifest entries: lowercase key -> [English hash, translation hash, modversion when recorded]
+FIELDNAMES = ['key', 'identifier', 'element_tag', 'english', 'translation', 'translated_in', 'file']
+
+def text_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+def mod_version(src_dir: str) -> str:
+    """modversion of the content package, or "" without a readable filelist.xml"""
+    try:
+        attrs, _ = read_filelist(os.path.join(src_dir, FILELIST_NAME))
+    except (OSError, ET.ParseError):
+        return ""
+    return attrs.get("modversion", "")
+
+def load_english_texts(english_file: str) -> dict[str, str]:
+    """{lowercase key: text} of the mod's English.xml; empty when it is not set or missing"""
+    if not english_file or not os.path.isfile(english_file):
+        return {}
+    texts = {}
+    try:
+        for key, text in read_localization_texts(english_file):
+            texts.setdefault(key, text)
+    except ET.ParseError as e:
+        print(f"Warning: cannot read {english_file} ({e}); hashing the XML attributes instead", file=sys.stderr)
+    return texts
+
+def english_sources(index: IdentifierIndex, english_texts: dict[str, str] = None) -> dict[str, dict]:
+    """
+    {lowercase key: source} for the name and description of every visible
+    identifier, taken from its first occurrence that has the text, as stage 5 would.
+    A key english_texts (the mod's English.xml) has takes its text from there,
+    since that is what the game shows in English.
+    """
+    english_texts = english_texts or {}
+    sources = {}
+    for raw_identifier, occ_list in index.occurrences.items():
+        identifier = raw_identifier.strip()
+        visible = [occ for occ in occ_list if not occ.is_hidden]
+        if not identifier or len(visible) != len(occ_list):
+            continue  # Hidden anywhere: never exported, so never translated through this pipeline
+        for field in ('name', 'description'):
+            occ = next((o for o in visible if getattr(o, field)), None)
+            if occ is None:
+                continue
+            name_prefix, desc_prefix = entry_prefixes(occ.element_tag)
+            key = f"{name_prefix if field == 'name' else desc_prefix}.{identifier}"
+            sources.setdefault(key.lower(), {
+                'key': key,
+                'identifier': identifier,
+                'element_tag': occ.element_tag,
+                'english': english_texts.get(key.lower()) or getattr(occ, field),
+                'file': occ.file,
+            })
+    return sources
+
+def load_manifest(manifest_file: str) -> dict:
+    if not os.path.exists(manifest_file):
+        return {}
+    try:
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Warning: translation manifest ignored ({e}); starting a new one", file=sys.stderr)
+        return {}
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("entries", {})
+
+def save_manifest(manifest_file: str, entries: dict):
+    os.makedirs(os.path.dirname(os.path.abspath(manifest_file)), exist_ok=True)
+    tmp_file = manifest_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        # One key per line and sorted, so the file diffs well under version control
+        f.write(f'{{"version": {MANIFEST_VERSION}, "entries": {{\n')
+        lines = [f"  {json.dumps(key, ensure_ascii=False)}: {json.dumps(entries[key], ensure_ascii=False)}"
+                 for key in sorted(entries)]
+        f.write(",\n".join(lines))
+        f.write("\n}}\n")
+    os.replace(tmp_file, manifest_file)
+
+def compare(sources: dict[str, dict], translations: dict[str, str], manifest: dict,
+            version: str, accept: bool = False) -> tuple[list[dict], dict, dict]:
+    """
+    Check every translated key against the English hash recorded when it was translated.
+      - not in the manifest yet          → recorded as the baseline
+      - English unchanged                → fine (a new translation text is just recorded)
+      - English changed, translation too → the translator already updated it; recorded
+      - English changed, translation not → stale: reported, manifest left as is
+    accept=True records the current English for stale keys as well.
+    Returns (stale rows, new manifest entries, counts).
+    """
+    stale = []
+    entries = {}
+    counts = {"baseline": 0, "unchanged": 0, "retranslated": 0, "stale": 0}
+    for key, source in sources.items():
+        translation = translations.get(key)
+        if translation is None:
+            continue  # Not translated: the missing-identifier stages handle it
+        english_hash = text_hash(source['english'])
+        translation_hash = text_hash(translation)
+        current = [english_hash, translation_hash, version]
+        record = manifest.get(key)
+
+        if record is None:
+            counts["baseline"] += 1
+            entries[key] = current
+        elif record[0] == english_hash:
+            counts["unchanged"] += 1
+            entries[key] = current if record[1] != translation_hash else record
+        elif record[1] != translation_hash or accept:
+            counts["retranslated"] += 1
+            entries[key] = current
+        else:
+            counts["stale"] += 1
+            entries[key] = record
+            stale.append({**source, 'translation': translation, 'translated_in': record[2]})
+
+    stale.sort(key=lambda row: (row['file'], row['key']))
+    return stale, entries, counts
+
+def run(settings: dict, index: IdentifierIndex = None, accept: bool = False) -> list[dict]:
+    """
+    Stage 6: list translated keys whose English name/description changed since
+    they were translated, in STALE_TRANSLATIONS_CSV.
+    Hashes live in TRANSLATION_MANIFEST_FILE; without it the stage does nothing.
+    index is the stage 1 identifier index; SRCDIR is scanned again only without it.
+    """
+    manifest_file = settings["TRANSLATION_MANIFEST_FILE"]
+    if not manifest_file:
+        print("TRANSLATION_MANIFEST_FILE not set; skipping the stale translation check.")
+        return []
+    if not os.path.exists(settings["LOCALIZATION_FILE"]):
+        print(f"Error: Localization file not found: {settings['LOCALIZATION_FILE']}", file=sys.stderr)
+        sys.exit(1)
+
+    if index is None:
+        index = build_identifier_index(settings["SRCDIR"], settings["PARSE_CACHE_FILE"], settings["JOBS"],
+                                       settings["FILE_DISCOVERY"], settings["INCLUDE_GLOBS"], settings["EXCLUDE_GLOBS"])
+
+    translations = {}
+    for key, text in read_localization_texts(settings["LOCALIZATION_FILE"]):
+        translations.setdefault(key, text)
+
+    version = mod_version(settings["SRCDIR"])
+    manifest = load_manifest(manifest_file)
+    sources = english_sources(index, load_english_texts(settings["ENGLISH_LOCALIZATION_FILE"]))
+    stale, entries, counts = compare(sources, translations, manifest, version, accept)
+
+    print("\n" + "="*60)
+    print(f"Translated keys checked:                {sum(counts.values())}")
+    print(f"→ Newly recorded (baseline):            {counts['baseline']}")
+    print(f"→ English unchanged:                    {counts['unchanged']}")
+    print(f"→ English changed, already retranslated: {counts['retranslated']}")
+    print(f"→ STALE (English changed since):        {counts['stale']}")
+    print("="*60)
+
+    if entries != manifest:
+        save_manifest(manifest_file, entries)
+
+    with instrumentation.timed("write"), open(settings["STALE_TRANSLATIONS_CSV"], "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(stale)
+    if stale:
+        print(f"\nStale translations saved to: {settings['STALE_TRANSLATIONS_CSV']}")
+        print("Update them in the localization file, or re-run with --accept once reviewed.")
+    return stale
+
+def main():
+    parser = argparse.ArgumentParser(description="List translations whose English source changed since translation.")
+    parser.add_argument("--accept", action="store_true",
+                        help="record the current English of every stale key as reviewed")
+    args = parser.parse_args()
+    run(load_settings(), accept=args.accept)
+
+if __name__ == "__main__":
+    main()
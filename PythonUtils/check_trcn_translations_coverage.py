@@ -1,24 +1,29 @@
-import re
 import os
-import configparser
 import sys
+import time
+import argparse
+import xml.etree.ElementTree as ET
 from pathlib import Path
 
+from config_utils import load_config, get_setting
+from content_package import FILELIST_NAME, read_filelist
+from languages import language_config
+from localization_keys import identifiers_in_buffer, identifiers_in_file
+from parse_cache import ParseCache
+from translation_snapshot import TranslationSnapshot, read_gameversion, write_snapshot
+
 # ----------------------------- CONFIG -----------------------------
-CONFIG_FILE = "config.ini"
-
-config = configparser.ConfigParser()
-if not Path(CONFIG_FILE).exists():
-    print(f"Error: {CONFIG_FILE} not found!", file=sys.stderr)
-    sys.exit(1)
-
-config.read(CONFIG_FILE, encoding="utf-8")
-try:
-    MISSING_FILE = config["CONFIG"]["MISSING_OUTPUT"]  # Will be overwritten with truly missing
-    TRANSLATIONS_DIR = config["CONFIG"]["TRANSLATIONS_DIR"].strip('"\' ')
-except KeyError as e:
-    print(f"Error: Missing required key in config.ini: {e}", file=sys.stderr)
-    sys.exit(1)
+def load_settings(cfg=None) -> dict:
+    """Read the settings used by this stage from config.ini"""
+    cfg = cfg if cfg is not None else load_config()
+    return {
+        "MISSING_FILE": get_setting(cfg, "MISSING_OUTPUT"),  # Will be overwritten with truly missing
+        "TRANSLATIONS_DIR": get_setting(cfg, "TRANSLATIONS_DIR"),
+        "TRANSLATIONS_CACHE_FILE": get_setting(cfg, "TRANSLATIONS_CACHE_FILE", ""),  # empty = no cache
+        # Exported key set, read instead of TRANSLATIONS_DIR when the file exists (build boxes without the game)
+        "TRANSLATIONS_SNAPSHOT_FILE": get_setting(cfg, "TRANSLATIONS_SNAPSHOT_FILE", ""),
+        "SRCDIR": get_setting(cfg, "SRCDIR", ""),
+    }
 # ----------------------------------------------------------------
 
 def load_missing_identifiers(file_path: Path) -> set[str]:
@@ -38,17 +43,24 @@ def load_missing_identifiers(file_path: Path) -> set[str]:
     print(f"Loaded {len(missing)} previously missing identifiers from {file_path}")
     return missing
 
-def find_translated_identifiers_in_dir(trans_dir: str) -> set[str]:
+# Bump when the per-file identifier sets change meaning
+TRANSLATIONS_CACHE_VERSION = 2
+
+def find_translated_identifiers_in_dir(trans_dir: str, cache_file: str = "") -> set[str]:
     """
-    Scan all .xml files in trans_dir (and subdirectories) for tags like:
+    Scan all .xml files in trans_dir (and subdirectories) for element keys like:
     <prefix.identifier>text</prefix.identifier>
-    Extract the identifier part after the dot.
+    and collect the identifier part after the first dot.
+    With cache_file set, the keys of each file are cached by size/mtime/hash,
+    so files untouched since the last game update are not read at all.
     """
     if not os.path.isdir(trans_dir):
         print(f"Error: Translations directory not found: {trans_dir}", file=sys.stderr)
         sys.exit(1)
     
-    pattern = re.compile(r'(?:<|&lt;)[^>]*\.([^>]+?)(?:>|/&gt;|&gt;)')
+    cache = None
+    if cache_file:
+        cache = ParseCache(cache_file, trans_dir, TRANSLATIONS_CACHE_VERSION, "Translations cache")
     translated = set()
     
     xml_count = 0
@@ -59,29 +71,128 @@ def find_translated_identifiers_in_dir(trans_dir: str) -> set[str]:
                 file_path = os.path.join(root_dir, file)
                 
                 try:
-                    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                        for line in f:
-                            matches = pattern.findall(line)
-                            for match in matches:
-                                ident = match.strip()
-                                if ident:
-                                    translated.add(ident)
+                    if cache:
+                        rel_path = os.path.relpath(file_path, trans_dir)
+                        translated.update(cache.get_or_parse(
+                            file_path, rel_path, lambda f: identifiers_in_buffer(f.getbuffer())))
+                    else:
+                        translated.update(identifiers_in_file(file_path))
                 except Exception as e:
                     print(f"Error reading {file_path}: {e}", file=sys.stderr)
     
+    if cache:
+        cache.save()
+    
     print(f"Scanned {xml_count} XML files in translations directory.")
     print(f"Found {len(translated)} translated identifiers.")
     return translated
 
-def main():
-    missing_path = Path(MISSING_FILE)
-    previously_missing = load_missing_identifiers(missing_path)
+def target_game_version(src_dir: str) -> str:
+    """gameversion the mod in src_dir targets, or "" without a readable filelist.xml"""
+    try:
+        attrs, _ = read_filelist(os.path.join(src_dir, FILELIST_NAME))
+    except (OSError, ET.ParseError):
+        return ""
+    return attrs.get("gameversion", "")
+
+def vanilla_package_file(trans_dir: str) -> str:
+    """Content/ContentPackages/Vanilla.xml of the install TRANSLATIONS_DIR belongs to"""
+    content_dir = os.path.dirname(os.path.dirname(os.path.normpath(trans_dir)))
+    return os.path.join(content_dir, "ContentPackages", "Vanilla.xml")
+
+def installed_game_version(trans_dir: str) -> str:
+    """gameversion of the install TRANSLATIONS_DIR belongs to, or "" """
+    try:
+        attrs, _ = read_filelist(vanilla_package_file(trans_dir))
+    except (OSError, ET.ParseError):
+        return ""
+    return attrs.get("gameversion", "")
+
+def snapshot_usable(settings: dict) -> bool:
+    """
+    Whether TRANSLATIONS_SNAPSHOT_FILE can stand in for TRANSLATIONS_DIR: it exists,
+    and either the game is not installed here or the snapshot is of the installed
+    version. After a game update the texts are scanned again until a new export.
+    """
+    snapshot_file = settings.get("TRANSLATIONS_SNAPSHOT_FILE", "")
+    if not snapshot_file or not os.path.isfile(snapshot_file):
+        return False
+    if not os.path.isdir(settings["TRANSLATIONS_DIR"]):
+        return True
+    installed = installed_game_version(settings["TRANSLATIONS_DIR"])
+    try:
+        return bool(installed) and read_gameversion(snapshot_file) == installed
+    except (OSError, ValueError):
+        return False  # The installed texts are there to fall back on
+
+def load_translated_identifiers(settings: dict) -> set[str]:
+    """
+    The base game's translated identifiers: from TRANSLATIONS_SNAPSHOT_FILE when
+    snapshot_usable, otherwise by scanning TRANSLATIONS_DIR.
+    """
+    snapshot_file = settings.get("TRANSLATIONS_SNAPSHOT_FILE", "")
+    if not snapshot_usable(settings):
+        if snapshot_file and os.path.isfile(snapshot_file):
+            print(f"Note: {snapshot_file} is not of the installed game "
+                  f"({installed_game_version(settings['TRANSLATIONS_DIR']) or 'version unknown'}); "
+                  f"scanning TRANSLATIONS_DIR, export a new snapshot with --export-snapshot")
+        elif snapshot_file:
+            print(f"Note: Translation snapshot not found: {snapshot_file}; scanning TRANSLATIONS_DIR")
+        return find_translated_identifiers_in_dir(settings["TRANSLATIONS_DIR"], settings["TRANSLATIONS_CACHE_FILE"])
+
+    start = time.perf_counter()
+    try:
+        with TranslationSnapshot(snapshot_file) as snapshot:
+            translated = snapshot.identifiers()
+            gameversion = snapshot.gameversion
+    except (OSError, ValueError) as e:
+        print(f"Error reading translation snapshot: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Loaded {len(translated)} translated identifiers from {snapshot_file} "
+          f"(game {gameversion or 'version unknown'}) in {(time.perf_counter() - start) * 1000:.0f} ms.")
+
+    target = target_game_version(settings.get("SRCDIR", ""))
+    if gameversion and target and gameversion != target:
+        print(f"Warning: the snapshot is of game {gameversion}, the mod targets {target}; "
+              f"export a new one with --export-snapshot", file=sys.stderr)
+    return translated
+
+def export_snapshot(settings: dict, gameversion: str = "") -> int:
+    """
+    Scan TRANSLATIONS_DIR and write its identifiers to TRANSLATIONS_SNAPSHOT_FILE,
+    tagged with gameversion (default: the install's version, else the one the mod targets).
+    """
+    snapshot_file = settings["TRANSLATIONS_SNAPSHOT_FILE"]
+    if not snapshot_file:
+        print("Error: TRANSLATIONS_SNAPSHOT_FILE is not set in config.ini", file=sys.stderr)
+        sys.exit(1)
+    translated = find_translated_identifiers_in_dir(settings["TRANSLATIONS_DIR"], settings["TRANSLATIONS_CACHE_FILE"])
+    gameversion = (gameversion or installed_game_version(settings["TRANSLATIONS_DIR"])
+                   or target_game_version(settings["SRCDIR"]))
+    size = write_snapshot(snapshot_file, translated, gameversion)
+    print(f"Translation snapshot saved to: {snapshot_file} "
+          f"({len(translated)} identifiers, game {gameversion or 'version unknown'}, {size / 1024:.1f} KB)")
+    return size
+
+def run(settings: dict, previously_missing: set[str] = None, dump: bool = True,
+        translated_identifiers: set[str] = None) -> set[str]:
+    """
+    Stage 3: drop identifiers the base game already translates in TRANSLATIONS_DIR.
+    previously_missing comes from stage 2 in-process, or from MISSING_FILE when omitted.
+    MISSING_FILE is only rewritten when dump is True.
+    translated_identifiers skips the TRANSLATIONS_DIR scan when the caller keeps it in memory.
+    """
+    missing_file = settings["MISSING_FILE"]
+    missing_path = Path(missing_file)
+    if previously_missing is None:
+        previously_missing = load_missing_identifiers(missing_path)
     
     if not previously_missing:
         print("No previously missing identifiers. Nothing to update.")
-        return
+        return set()
     
-    translated_identifiers = find_translated_identifiers_in_dir(TRANSLATIONS_DIR)
+    if translated_identifiers is None:
+        translated_identifiers = load_translated_identifiers(settings)
     
     # Identifiers that are missing from main localization BUT present in translations
     falsely_missing = previously_missing & translated_identifiers
@@ -93,18 +204,38 @@ def main():
     print(f"TRULY missing (no translation found):     {len(truly_missing)}")
     print("="*60)
     
-    # Overwrite the original MISSING_OUTPUT file with only truly missing ones
-    sorted_truly_missing = sorted(truly_missing)
-    missing_path.write_text("\n".join(sorted_truly_missing) + "\n", encoding="utf-8")
+    if dump:
+        # Overwrite the original MISSING_OUTPUT file with only truly missing ones
+        sorted_truly_missing = sorted(truly_missing)
+        missing_path.write_text("\n".join(sorted_truly_missing) + "\n", encoding="utf-8")
     
     if truly_missing:
-        print(f"\nUpdated '{MISSING_FILE}' with {len(truly_missing)} truly missing identifiers.")
+        if dump:
+            print(f"\nUpdated '{missing_file}' with {len(truly_missing)} truly missing identifiers.")
     else:
         print(f"\nGreat! All previously missing identifiers now have translations!")
-        print(f"'{MISSING_FILE}' has been cleared (now empty or contains only truly missing).")
+        if dump:
+            print(f"'{missing_file}' has been cleared (now empty or contains only truly missing).")
     
     if falsely_missing:
         print(f"\nRemoved {len(falsely_missing)} identifiers that were falsely marked as missing.")
+    
+    return truly_missing
+
+def main():
+    parser = argparse.ArgumentParser(description="Drop missing identifiers the base game already translates.")
+    parser.add_argument("--export-snapshot", action="store_true",
+                        help="write TRANSLATIONS_DIR's identifiers to TRANSLATIONS_SNAPSHOT_FILE and exit")
+    parser.add_argument("--gameversion", default="", help="game version to tag the snapshot with")
+    parser.add_argument("--language", help="use the settings of this LANGUAGES entry")
+    args = parser.parse_args()
+
+    cfg = load_config()
+    settings = load_settings(language_config(cfg, args.language) if args.language else cfg)
+    if args.export_snapshot:
+        export_snapshot(settings, args.gameversion)
+        return
+    run(settings)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
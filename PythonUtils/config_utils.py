@@ -0,0 +1,35 @@
+# File: PythonUtils/config_utils.py
+
+import configparser
+import sys
+from pathlib import Path
+
+# ----------------------------- CONFIG -----------------------------
+CONFIG_FILE = "config.ini"
+
+_REQUIRED = object()
+# ----------------------------------------------------------------
+
+def load_config(config_file: str = CONFIG_FILE) -> configparser.SectionProxy:
+    """Read config.ini once and return its [CONFIG] section"""
+    config = configparser.ConfigParser()
+    if not Path(config_file).exists():
+        print(f"Error: {config_file} not found!", file=sys.stderr)
+        sys.exit(1)
+
+    config.read(config_file, encoding="utf-8")
+    if "CONFIG" not in config:
+        print(f"Error: Missing [CONFIG] section in {config_file}", file=sys.stderr)
+        sys.exit(1)
+
+    return config["CONFIG"]
+
+def get_setting(cfg: configparser.SectionProxy, key: str, fallback=_REQUIRED) -> str:
+    """Return a config value with surrounding quotes/spaces stripped"""
+    value = cfg.get(key)
+    if value is None:
+        if fallback is _REQUIRED:
+            print(f"Error: Missing required key in config.ini: '{key}'", file=sys.stderr)
+            sys.exit(1)
+        return fallback
+    return value.strip('"\' ')
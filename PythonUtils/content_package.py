@@ -0,0 +1,125 @@
+# File: PythonUtils/content_package.py
+
+import os
+import re
+import sys
+import fnmatch
+import xml.etree.ElementTree as ET
+
+FILELIST_NAME = "filelist.xml"
+
+# %ModDir% points at this package; %ModDir:<name or workshop id>% may point at another one
+MOD_DIR_TOKEN = re.compile(r'^%ModDir(?::([^%]*))?%[/\\]?', re.IGNORECASE)
+
+def parse_globs(value: str) -> list[str]:
+    """Comma-separated glob list from config.ini, e.g. "Characters/*, Items/*" """
+    return [pattern.strip().replace("\\", "/") for pattern in (value or "").split(",") if pattern.strip()]
+
+def matches_any(rel_path: str, patterns: list[str]) -> bool:
+    """Case-insensitive fnmatch of a /-separated relative path; * also crosses folders"""
+    rel_path = rel_path.replace("\\", "/").lower()
+    return any(fnmatch.fnmatchcase(rel_path, pattern.lower()) for pattern in patterns)
+
+def filter_paths(xml_files: list[tuple[str, str]], include: list[str] = None,
+                 exclude: list[str] = None) -> list[tuple[str, str]]:
+    """Keep (file_path, rel_path) pairs matching include (if given) and not matching exclude"""
+    return [
+        (file_path, rel_path) for file_path, rel_path in xml_files
+        if (not include or matches_any(rel_path, include)) and not (exclude and matches_any(rel_path, exclude))
+    ]
+
+def read_filelist(filelist_path: str) -> tuple[dict, list[tuple[str, str]]]:
+    """
+    The <contentpackage> attributes and its (element tag, file attribute) entries,
+    in declaration order. Raises on unreadable or malformed XML.
+    """
+    root = ET.parse(filelist_path).getroot()
+    entries = [(child.tag, child.get("file", "").strip()) for child in root if child.get("file")]
+    return dict(root.attrib), entries
+
+def resolve_case_insensitive(src_dir: str, rel_path: str, folder: bool = False):
+    """
+    Path of rel_path under src_dir, matching each component case-insensitively
+    when the exact spelling does not exist (the game runs on case-insensitive
+    Windows, so filelists are often spelled differently from the files).
+    folder looks for a directory instead of a file.
+    Returns None if nothing matches.
+    """
+    exists = os.path.isdir if folder else os.path.isfile
+    exact = os.path.join(src_dir, rel_path)
+    if exists(exact):
+        return exact
+
+    current = src_dir
+    for part in rel_path.split("/"):
+        if part in ("", "."):
+            continue
+        try:
+            names = os.listdir(current)
+        except OSError:
+            return None
+        lowered = part.lower()
+        match = next((name for name in names if name == part), None) \
+            or next((name for name in names if name.lower() == lowered), None)
+        if match is None:
+            return None
+        current = os.path.join(current, match)
+    return current if exists(current) else None
+
+def own_package_names(attrs: dict) -> set[str]:
+    """Names %ModDir:...% may use for this package: its name and workshop id, lowercased"""
+    return {attrs.get("name", "").lower(), attrs.get("steamworkshopid", "").lower()}
+
+def package_path(path: str, own_names: set[str]):
+    """
+    /-separated path inside this package of a %ModDir%/... reference, or None
+    for vanilla content (Content/...) and files of other packages.
+    """
+    match = MOD_DIR_TOKEN.match(path)
+    if not match:
+        return None
+    if match.group(1) is not None and match.group(1).strip().lower() not in own_names:
+        return None
+    return path[match.end():].replace("\\", "/")
+
+def declared_files(src_dir: str, xml_only: bool = False) -> list[tuple[str, str]]:
+    """
+    (file_path, rel_path) of every file of this package that src_dir/filelist.xml
+    declares (only .xml files with xml_only), in declaration order. Entries
+    pointing at other packages and duplicates are skipped; declared files that
+    do not exist are reported.
+    """
+    filelist_path = os.path.join(src_dir, FILELIST_NAME)
+    try:
+        attrs, entries = read_filelist(filelist_path)
+    except (OSError, ET.ParseError) as e:
+        print(f"Error reading {filelist_path}: {e}", file=sys.stderr)
+        return []
+
+    own_names = own_package_names(attrs)
+    files = []
+    seen = set()
+    for tag, path in entries:
+        rel_path = package_path(path, own_names)
+        if rel_path is None:
+            continue  # Vanilla content (Content/...) is not part of this package
+        if xml_only and not rel_path.lower().endswith(".xml"):
+            continue
+
+        file_path = resolve_case_insensitive(src_dir, rel_path)
+        if file_path is None:
+            print(f"Warning: {tag} file declared in {FILELIST_NAME} not found: {rel_path}", file=sys.stderr)
+            continue
+        rel_path = os.path.relpath(file_path, src_dir)
+        if rel_path in seen:
+            continue
+        seen.add(rel_path)
+        files.append((file_path, rel_path))
+    return files
+
+def declared_xml_files(src_dir: str) -> list[tuple[str, str]]:
+    """
+    (file_path, rel_path) of every .xml file the game loads from the content package
+    in src_dir, in filelist.xml order (see declared_files).
+    """
+    return declared_files(src_dir, xml_only=True)
@@ -1,82 +1,88 @@
 # File: PythonUtils/extract_identifiers.py
 
-import xml.etree.ElementTree as ET
 import os
-import configparser
 import sys
 from pathlib import Path
 
-# ----------------------------- CONFIG -----------------------------
-CONFIG_FILE = "config.ini"
-
-config = configparser.ConfigParser()
-if not Path(CONFIG_FILE).exists():
-    print(f"Error: {CONFIG_FILE} not found!", file=sys.stderr)
-    sys.exit(1)
+from config_utils import load_config, get_setting
+from identifier_db import write_database
+from identifier_index import (IdentifierIndex, ParsedFile, build_identifier_index, load_discovery_settings,
+                              resolve_jobs, scan_xml_file)
 
-config.read(CONFIG_FILE, encoding="utf-8")
-try:
-    SRCDIR = config["CONFIG"]["SRCDIR"].strip('"\' ')
-    OUTPUT_FILE = config.get("CONFIG", "IDENTIFIERS_FILE", fallback="extracted_identifiers.txt").strip('"\' ')
-except KeyError as e:
-    print(f"Error: Missing required key in config.ini: {e}", file=sys.stderr)
-    sys.exit(1)
+# ----------------------------- CONFIG -----------------------------
+def load_settings(cfg=None) -> dict:
+    """Read the settings used by this stage from config.ini"""
+    cfg = cfg if cfg is not None else load_config()
+    return {
+        "SRCDIR": get_setting(cfg, "SRCDIR"),
+        "OUTPUT_FILE": get_setting(cfg, "IDENTIFIERS_FILE", "extracted_identifiers.txt"),
+        "PARSE_CACHE_FILE": get_setting(cfg, "PARSE_CACHE_FILE", ""),  # empty = no cache
+        "JOBS": resolve_jobs(get_setting(cfg, "JOBS", "1")),  # 0 = one per CPU
+        **load_discovery_settings(cfg),  # walk (default) or filelist, plus include/exclude globs
+        "IDENTIFIER_DB_FILE": get_setting(cfg, "IDENTIFIER_DB_FILE", ""),  # empty = no database
+        "LOCALIZATION_FILE": get_setting(cfg, "LOCALIZATION_FILE", ""),  # its folder's *.xml go into the database
+    }
 # ----------------------------------------------------------------
 
-def extract_identifiers_from_xml(file_path):
+def visible_identifiers_in(found: ParsedFile) -> set[str]:
+    """Stripped identifiers from scan_xml_file output, skipping hideinmenus="true" elements"""
     identifiers = set()
-    try:
-        tree = ET.parse(file_path)
-        root = tree.getroot()
-        
-        for elem in root.iter():
-            # Skip if hideinmenus="true" (case-insensitive)
-            hide = elem.get('hideinmenus')
-            if hide and hide.strip().lower() == 'true':
-                continue  # Skip this entire element and its identifier
-            
-            identifier = elem.get('identifier')
-            if identifier:
-                ident = identifier.strip()
-                if ident:
-                    identifiers.add(ident)
-                    
-    except ET.ParseError as e:
-        print(f"XML parse error in {file_path}: {e}", file=sys.stderr)
-    except Exception as e:
-        print(f"Error processing {file_path}: {e}", file=sys.stderr)
-    
+    for identifier, occ in found.occurrences:
+        if occ.is_hidden:
+            continue  # Skip this entire element and its identifier
+        ident = identifier.strip()
+        if ident:
+            identifiers.add(ident)
     return identifiers
 
-def extract_all_identifiers(src_dir):
-    all_identifiers = set()
-    if not os.path.isdir(src_dir):
-        print(f"Error: Directory not found: {src_dir}", file=sys.stderr)
-        return all_identifiers
-    
-    xml_count = 0
-    skipped_count = 0  # Optional: track how many were skipped due to hideinmenus
-    
-    for root_dir, _, files in os.walk(src_dir):
-        for file in files:
-            if file.lower().endswith('.xml'):
-                file_path = os.path.join(root_dir, file)
-                ids = extract_identifiers_from_xml(file_path)
-                if ids:
-                    xml_count += 1
-                    all_identifiers.update(ids)
-    
-    print(f"Processed {xml_count} XML files with visible identifiers.", file=sys.stderr)
-    return all_identifiers
+def extract_identifiers_from_xml(file_path):
+    return visible_identifiers_in(scan_xml_file(file_path, file_path))
 
-if __name__ == "__main__":
-    identifiers = extract_all_identifiers(SRCDIR)
+def extract_all_identifiers(src_dir, cache_file: str = "", jobs: int = 1, discovery: str = "walk",
+                            include: list[str] = None, exclude: list[str] = None):
+    return build_index(src_dir, cache_file, jobs, discovery, include, exclude).visible_identifiers()
+
+def build_index(src_dir, cache_file: str = "", jobs: int = 1, discovery: str = "walk",
+                include: list[str] = None, exclude: list[str] = None) -> IdentifierIndex:
+    """Single parsing pass over src_dir, shared with find_missing_details"""
+    index = build_identifier_index(src_dir, cache_file, jobs, discovery, include, exclude)
+    print(f"Processed {index.visible_xml_count} XML files with visible identifiers.", file=sys.stderr)
+    return index
+
+def run(settings: dict, dump: bool = True, verbose: bool = False, index: IdentifierIndex = None) -> IdentifierIndex:
+    """
+    Stage 1: collect every visible identifier under SRCDIR.
+    The sorted list is only written to OUTPUT_FILE when dump is True.
+    With IDENTIFIER_DB_FILE set, the index and the texts next to LOCALIZATION_FILE
+    are also written to that SQLite database for identifier_db.py lookups.
+    index skips the scan when the caller already holds an up-to-date one (watch mode).
+    Returns the identifier index so stage 4 can reuse it instead of rescanning.
+    """
+    if index is None:
+        index = build_index(settings["SRCDIR"], settings["PARSE_CACHE_FILE"], settings["JOBS"],
+                            settings["FILE_DISCOVERY"], settings["INCLUDE_GLOBS"], settings["EXCLUDE_GLOBS"])
+    identifiers = index.visible_identifiers()
     sorted_ids = sorted(identifiers)
 
     print(f"Found {len(sorted_ids)} unique visible identifiers (hideinmenus!='true'):\n")
-    for ident in sorted_ids:
-        print(ident)
+    if verbose:
+        for ident in sorted_ids:
+            print(ident)
+
+    if dump:
+        # Save to the output file defined in config
+        Path(settings["OUTPUT_FILE"]).write_text("\n".join(sorted_ids) + "\n", encoding="utf-8")
+        print(f"\nIdentifiers saved to '{settings['OUTPUT_FILE']}'")
+
+    if settings["IDENTIFIER_DB_FILE"]:
+        localization_file = settings["LOCALIZATION_FILE"]
+        translations_dir = (os.path.dirname(localization_file) or ".") if localization_file else ""
+        write_database(settings["IDENTIFIER_DB_FILE"], index, translations_dir)
 
-    # Save to the output file defined in config
-    Path(OUTPUT_FILE).write_text("\n".join(sorted_ids) + "\n", encoding="utf-8")
-    print(f"\nIdentifiers saved to '{OUTPUT_FILE}'")
\ No newline at end of file
+    return index
+
+def main():
+    run(load_settings(), verbose=True)
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,56 @@
 # File: PythonUtils/find_missing_details.py
 
-import xml.etree.ElementTree as ET
 import os
 import csv
-import configparser
 import sys
 import re
 from pathlib import Path
 from datetime import datetime
-from collections import defaultdict
+from typing import NamedTuple
 
-# ----------------------------- CONFIG -----------------------------
-CONFIG_FILE = "config.ini"
-
-config = configparser.ConfigParser()
-if not Path(CONFIG_FILE).exists():
-    print(f"Error: {CONFIG_FILE} not found!", file=sys.stderr)
-    sys.exit(1)
+import instrumentation
+from config_utils import load_config, get_setting
+from identifier_index import IdentifierIndex, build_identifier_index, load_discovery_settings, resolve_jobs
 
-config.read(CONFIG_FILE, encoding="utf-8")
-try:
-    SRCDIR = config["CONFIG"]["SRCDIR"].strip('"\' ')
-    MISSING_FILE = config["CONFIG"]["MISSING_OUTPUT"]
-    MISSING_DETAILS_CSV = config["CONFIG"]["MISSING_DETAILS_CSV"].strip('"\' ')
-    REJECTION_LOG = config.get("CONFIG", "REJECTION_LOG_FILE", fallback="rejection_log.txt").strip('"\' ')
-except KeyError as e:
-    print(f"Error: Missing required key in config.ini: {e}", file=sys.stderr)
-    sys.exit(1)
+# ----------------------------- CONFIG -----------------------------
+def load_settings(cfg=None) -> dict:
+    """Read the settings used by this stage from config.ini"""
+    cfg = cfg if cfg is not None else load_config()
+    return {
+        "SRCDIR": get_setting(cfg, "SRCDIR"),
+        "MISSING_FILE": get_setting(cfg, "MISSING_OUTPUT"),
+        "MISSING_DETAILS_CSV": get_setting(cfg, "MISSING_DETAILS_CSV"),
+        "REJECTION_LOG": get_setting(cfg, "REJECTION_LOG_FILE", "rejection_log.txt"),
+        "PARSE_CACHE_FILE": get_setting(cfg, "PARSE_CACHE_FILE", ""),  # empty = no cache
+        "JOBS": resolve_jobs(get_setting(cfg, "JOBS", "1")),  # 0 = one per CPU
+        **load_discovery_settings(cfg),  # walk (default) or filelist, plus include/exclude globs
+    }
 # ----------------------------------------------------------------
 
 # Regex for alphabetic characters (including Unicode letters)
 HAS_ALPHA = re.compile(r'[a-zA-Z\u00C0-\u017F\u0180-\u024F\u1E00-\u1EFF]')
 
+# Rejection reasons, shared by every record instead of one string per rejection
+REASON_HIDDEN = 'hideinmenus="true" in at least one definition'
+REASON_EMPTY = 'both name and description empty'
+REASON_NO_LETTERS = 'no alphabetic characters in name/description'
+REASON_NO_VALID = 'all occurrences lack valid translatable text (empty or no letters)'
+
+class DetailRow(NamedTuple):
+    """One accepted identifier; the fields are the CSV columns, in order"""
+    identifier: str
+    element_tag: str
+    name: str
+    description: str
+    file: str
+
+class Rejection(NamedTuple):
+    identifier: str
+    file: str
+    reason: str
+
+FIELDNAMES = list(DetailRow._fields)
+
 def has_alphabetic(text: str) -> bool:
     return bool(HAS_ALPHA.search(text or ""))
 
@@ -50,9 +69,12 @@ def load_missing_identifiers(file_path: Path) -> set[str]:
     print(f"Loaded {len(missing)} missing identifiers from {file_path}")
     return missing
 
-def scan_and_evaluate_identifiers(src_dir: str, target_identifiers: set[str]):
+def scan_and_evaluate_identifiers(src_dir: str, target_identifiers: set[str], index: IdentifierIndex = None,
+                                  cache_file: str = "", jobs: int = 1, discovery: str = "walk",
+                                  include: list[str] = None, exclude: list[str] = None):
     """
-    Scan entire SRCDIR and collect all occurrences of each target identifier.
+    Collect all occurrences of each target identifier from the identifier index
+    (built from SRCDIR here when stage 1 did not pass one in).
     Apply strict rules:
       - If ANY occurrence has hideinmenus="true" → reject the identifier immediately
       - Otherwise, if AT LEAST ONE occurrence has:
@@ -61,101 +83,48 @@ def scan_and_evaluate_identifiers(src_dir: str, target_identifiers: set[str]):
         → accept the identifier (use the first valid occurrence for CSV)
       - If ALL occurrences fail the text validation → reject
     """
-    occurrences = defaultdict(list)   # identifier -> list of dicts with details
     rejections = []
     
-    if not os.path.isdir(src_dir):
-        print(f"Error: Source directory not found: {src_dir}", file=sys.stderr)
-        sys.exit(1)
+    if index is None:
+        if not os.path.isdir(src_dir):
+            print(f"Error: Source directory not found: {src_dir}", file=sys.stderr)
+            sys.exit(1)
+        index = build_identifier_index(src_dir, cache_file, jobs, discovery, include, exclude)
     
-    xml_count = 0
-    
-    for root_dir, _, files in os.walk(src_dir):
-        for file in files:
-            if not file.lower().endswith('.xml'):
-                continue
-            xml_count += 1
-            file_path = os.path.join(root_dir, file)
-            rel_path = os.path.relpath(file_path, src_dir)
-            
-            try:
-                tree = ET.parse(file_path)
-                root = tree.getroot()
-                
-                for elem in root.iter():
-                    identifier = elem.get('identifier')
-                    if identifier and identifier in target_identifiers:
-                        name = elem.get('name', '').strip()
-                        description = elem.get('description', '').strip()
-                        element_tag = elem.tag
-                        hide = elem.get('hideinmenus')
-                        is_hidden = hide and hide.strip().lower() == 'true'
-                        
-                        occurrences[identifier].append({
-                            'element_tag': element_tag,
-                            'name': name,
-                            'description': description,
-                            'file': rel_path,
-                            'is_hidden': is_hidden
-                        })
-                        
-            except ET.ParseError as e:
-                print(f"XML parse error in {file_path}: {e}", file=sys.stderr)
-            except Exception as e:
-                print(f"Error processing {file_path}: {e}", file=sys.stderr)
+    # identifier -> list of Occurrence records, answered from the shared index
+    occurrences = index.occurrences_for(target_identifiers)
+    xml_count = index.xml_count
     
     # Evaluate each identifier
     final_results = []
     
     for identifier, occ_list in occurrences.items():
         # Rule 1: Immediate rejection if ANY occurrence is hidden
-        if any(occ['is_hidden'] for occ in occ_list):
-            rejections.append({
-                'identifier': identifier,
-                'file': '(one or more files)',
-                'reason': 'hideinmenus="true" in at least one definition'
-            })
+        if any(occ.is_hidden for occ in occ_list):
+            rejections.append(Rejection(identifier, '(one or more files)', REASON_HIDDEN))
             continue
         
         # Rule 2: Look for at least one valid text occurrence
         valid_occurrence = None
         for occ in occ_list:
-            name = occ['name']
-            desc = occ['description']
+            name = occ.name
+            desc = occ.description
             
             if not name and not desc:
-                rejections.append({
-                    'identifier': identifier,
-                    'file': occ['file'],
-                    'reason': 'both name and description empty'
-                })
+                rejections.append(Rejection(identifier, occ.file, REASON_EMPTY))
                 continue
             
             if not (has_alphabetic(name) or has_alphabetic(desc)):
-                rejections.append({
-                    'identifier': identifier,
-                    'file': occ['file'],
-                    'reason': 'no alphabetic characters in name/description'
-                })
+                rejections.append(Rejection(identifier, occ.file, REASON_NO_LETTERS))
                 continue
             
             # Valid! Use this one (first valid wins)
             if valid_occurrence is None:
-                valid_occurrence = {
-                    'identifier': identifier,
-                    'element_tag': occ['element_tag'],
-                    'name': name,
-                    'description': desc,
-                    'file': occ['file']
-                }
+                valid_occurrence = DetailRow(identifier, occ.element_tag, name, desc, occ.file)
         
         if valid_occurrence is None:
             # All occurrences failed text validation
-            rejections.append({
-                'identifier': identifier,
-                'file': '(all files)',
-                'reason': 'all occurrences lack valid translatable text (empty or no letters)'
-            })
+            rejections.append(Rejection(identifier, '(all files)', REASON_NO_VALID))
         else:
             final_results.append(valid_occurrence)
     
@@ -166,7 +135,7 @@ def write_rejection_log(rejections: list, log_path: Path):
         log_path.write_text("No identifiers were rejected during processing.\n", encoding="utf-8")
         return
     
-    rejections.sort(key=lambda x: (x.get('file', ''), x['identifier']))
+    rejections.sort(key=lambda x: (x.file, x.identifier))
     
     lines = []
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -176,26 +145,42 @@ def write_rejection_log(rejections: list, log_path: Path):
     lines.append("")
     
     for rej in rejections:
-        lines.append(f"Identifier: {rej['identifier']}")
-        lines.append(f"File:       {rej['file']}")
-        lines.append(f"Reason:     {rej['reason']}")
+        lines.append(f"Identifier: {rej.identifier}")
+        lines.append(f"File:       {rej.file}")
+        lines.append(f"Reason:     {rej.reason}")
         lines.append("-" * 50)
     
     log_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
     print(f"Rejection log saved to: {log_path}")
 
-def main():
-    missing_path = Path(MISSING_FILE)
-    missing_identifiers = load_missing_identifiers(missing_path)
+def run(settings: dict, missing_identifiers: set[str] = None, dump: bool = True,
+        index: IdentifierIndex = None) -> list[DetailRow]:
+    """
+    Stage 4: write the details CSV and rejection log for the missing identifiers.
+    missing_identifiers comes from stage 3 in-process, or from MISSING_FILE when omitted.
+    MISSING_FILE is only rewritten when dump is True.
+    index is the stage 1 identifier index; SRCDIR is scanned again only without it.
+    Returns the accepted rows sorted by file path, then identifier.
+    """
+    missing_file = settings["MISSING_FILE"]
+    missing_details_csv = settings["MISSING_DETAILS_CSV"]
+    rejection_log = settings["REJECTION_LOG"]
+    missing_path = Path(missing_file)
+    if missing_identifiers is None:
+        missing_identifiers = load_missing_identifiers(missing_path)
     
     if not missing_identifiers:
         print("No missing identifiers to process. Creating empty outputs.")
-        Path(MISSING_DETAILS_CSV).touch()
-        missing_path.write_text("", encoding="utf-8")
-        Path(REJECTION_LOG).write_text("No processing occurred (no missing identifiers).\n", encoding="utf-8")
-        return
+        Path(missing_details_csv).touch()
+        if dump:
+            missing_path.write_text("", encoding="utf-8")
+        Path(rejection_log).write_text("No processing occurred (no missing identifiers).\n", encoding="utf-8")
+        return []
     
-    results, xml_count, rejections = scan_and_evaluate_identifiers(SRCDIR, missing_identifiers)
+    results, xml_count, rejections = scan_and_evaluate_identifiers(settings["SRCDIR"], missing_identifiers, index,
+                                                              settings["PARSE_CACHE_FILE"], settings["JOBS"],
+                                                              settings["FILE_DISCOVERY"], settings["INCLUDE_GLOBS"],
+                                                              settings["EXCLUDE_GLOBS"])
     
     included_count = len(results)
     rejected_count = len(rejections)
@@ -209,33 +194,40 @@ def main():
     
     if not results:
         print("No translatable content remains after filtering. Clearing outputs.")
-        Path(MISSING_DETAILS_CSV).write_text("", encoding="utf-8")
-        missing_path.write_text("", encoding="utf-8")
+        Path(missing_details_csv).write_text("", encoding="utf-8")
+        if dump:
+            missing_path.write_text("", encoding="utf-8")
     else:
         # Sort by file path, then identifier
-        results.sort(key=lambda x: (x['file'], x['identifier']))
+        results.sort(key=lambda x: (x.file, x.identifier))
         
-        # Write CSV
-        fieldnames = ['identifier', 'element_tag', 'name', 'description', 'file']
-        csv_path = Path(MISSING_DETAILS_CSV)
-        with csv_path.open('w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
+        # Write CSV; the rows are already tuples in column order
+        csv_path = Path(missing_details_csv)
+        with instrumentation.timed("write"), csv_path.open('w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(FIELDNAMES)
             writer.writerows(results)
         
-        print(f"\nCleaned details saved to: {MISSING_DETAILS_CSV}")
+        print(f"\nCleaned details saved to: {missing_details_csv}")
         print(f"   → {included_count} translatable entries")
         
-        # Update missing_identifiers.txt with only valid ones
-        meaningful_ids = sorted({r['identifier'] for r in results})
-        missing_path.write_text("\n".join(meaningful_ids) + "\n", encoding="utf-8")
-        print(f"Updated '{MISSING_FILE}' with {len(meaningful_ids)} translatable identifiers.")
+        if dump:
+            # Update missing_identifiers.txt with only valid ones
+            meaningful_ids = sorted({r.identifier for r in results})
+            missing_path.write_text("\n".join(meaningful_ids) + "\n", encoding="utf-8")
+            print(f"Updated '{missing_file}' with {len(meaningful_ids)} translatable identifiers.")
     
     # Write rejection log
-    write_rejection_log(rejections, Path(REJECTION_LOG))
+    with instrumentation.timed("write"):
+        write_rejection_log(rejections, Path(rejection_log))
     
     if rejected_count > 0:
-        print(f"\n{rejected_count} identifiers rejected — details in {REJECTION_LOG}")
+        print(f"\n{rejected_count} identifiers rejected — details in {rejection_log}")
+    
+    return results
+
+def main():
+    run(load_settings())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,84 +1,105 @@
 # File: PythonUtils/generate_localization_xml.py
 
+import re
 import csv
-import configparser
 import sys
 from pathlib import Path
-from xml.etree import ElementTree as ET
-from xml.dom import minidom
 
-# ----------------------------- CONFIG -----------------------------
-CONFIG_FILE = "config.ini"
-
-config = configparser.ConfigParser()
-if not Path(CONFIG_FILE).exists():
-    print(f"Error: {CONFIG_FILE} not found!", file=sys.stderr)
-    sys.exit(1)
+import instrumentation
+from config_utils import load_config, get_setting
+from find_missing_details import FIELDNAMES, DetailRow
+from localization_writer import write_overrides
+from translation_memory import TranslationMemory, build_memory, load_tm_settings
 
-config.read(CONFIG_FILE, encoding="utf-8")
-try:
-    MISSING_DETAILS_CSV = config["CONFIG"]["MISSING_DETAILS_CSV"]
-    SINGLE_XML_OUTPUT = config.get("CONFIG", "LOCALIZATION_XML_OUTPUT", fallback="MissingTranslations.xml").strip('"\' ')
-except KeyError as e:
-    print(f"Error: Missing required key in config.ini: {e}", file=sys.stderr)
-    sys.exit(1)
+# ----------------------------- CONFIG -----------------------------
+def load_settings(cfg=None) -> dict:
+    """Read the settings used by this stage from config.ini"""
+    cfg = cfg if cfg is not None else load_config()
+    return {
+        "MISSING_DETAILS_CSV": get_setting(cfg, "MISSING_DETAILS_CSV"),
+        "SINGLE_XML_OUTPUT": get_setting(cfg, "LOCALIZATION_XML_OUTPUT", "MissingTranslations.xml"),
+        **load_tm_settings(cfg),  # translation-memory prefill, off without TM_ENGLISH_FILE
+    }
 # ----------------------------------------------------------------
 
-def prettify(elem):
-    """Return a pretty-printed XML string with proper indentation"""
-    rough_string = ET.tostring(elem, 'utf-8')
-    reparsed = minidom.parseString(rough_string)
-    pretty = reparsed.toprettyxml(indent="  ")
-    # Remove the <?xml version="1.0" ?> line to match common mod override format
-    lines = pretty.splitlines()
-    clean_lines = [line for line in lines if not line.strip().startswith("<?xml")]
-    return "\n".join(clean_lines).strip() + "\n"
+def entry_prefixes(element_tag: str) -> tuple[str, str]:
+    """Key prefixes for the name and description of an element, e.g. entityname/entitydescription"""
+    tag_lower = element_tag.lower()
+    if tag_lower in ["item", "structure"]:
+        return "entityname", "entitydescription"
+    return tag_lower + "name", tag_lower + "description"
 
-def generate_single_xml(rows):
-    root = ET.Element("Overrides")
-    
-    total_lines = 0
-    
+def iter_entries(rows):
+    """(key, English text) for the name and description of every row, in row order"""
     for row in rows:
-        identifier = row['identifier'].strip()
-        element_tag = row['element_tag'].strip()
-        name = row['name'].strip()
-        description = row['description'].strip()
-        
-        tag_lower = element_tag.lower()
-        
-        # Determine correct prefix for name and description
-        if tag_lower in ["item", "structure"]:
-            name_prefix = "entityname"
-            desc_prefix = "entitydescription"
-        else:
-            name_prefix = element_tag.lower() + "name"
-            desc_prefix = element_tag.lower() + "description"
+        identifier = row.identifier.strip()
+        name = row.name.strip()
+        description = row.description.strip()
+        name_prefix, desc_prefix = entry_prefixes(row.element_tag.strip())
         
         # Add name tag if present
         if name:
-            name_tag = ET.SubElement(root, f"{name_prefix}.{identifier}")
-            name_tag.text = name
-            total_lines += 1
+            yield f"{name_prefix}.{identifier}", name
         
         # Add description tag if present
         if description:
-            desc_tag = ET.SubElement(root, f"{desc_prefix}.{identifier}")
-            desc_tag.text = description
-            total_lines += 1
-    
-    # Sort children alphabetically by tag name for cleaner output (optional but nice)
-    root[:] = sorted(root, key=lambda child: child.tag)
+            yield f"{desc_prefix}.{identifier}", description
+
+# Note of an entry whose text prefill() replaced with a translation
+PREFILLED_NOTE = re.compile(r'^TM \d+% \| EN: ')
+
+def prefill(entries, memory: TranslationMemory, min_score: float, prefill_score: float):
+    """
+    Look every English text up in the translation memory.
+    Matches scoring at least prefill_score replace the text (the English stays in
+    the note); weaker matches down to min_score and glossary terms only become notes.
+    Returns the new (key, text) list, {key: note} and counts per kind of match.
+    """
+    filled = []
+    notes = {}
+    counts = {"exact": 0, "fuzzy": 0, "suggested": 0}
+    for key, english in entries:
+        parts = []
+        match = memory.lookup(english, min_score)
+        if match:
+            score, source, target = match
+            if score >= prefill_score:
+                counts["exact" if score == 1.0 else "fuzzy"] += 1
+                parts.append(f"TM {score:.0%} | EN: {english}" + (f" | TM: {source}" if score < 1.0 else ""))
+                filled.append((key, target))
+            else:
+                counts["suggested"] += 1
+                parts.append(f"TM {score:.0%} suggestion: {source} = {target}")
+                filled.append((key, english))
+        else:
+            filled.append((key, english))
+        terms = memory.glossary_terms(english)
+        if terms and not (match and match[0] == 1.0):
+            parts.append("Glossary: " + "; ".join(f"{term} = {target}" for term, target in terms))
+        if parts:
+            notes[key] = " | ".join(parts)
+    return filled, notes, counts
+
+def generate_single_xml(rows, output_file: str, memory: TranslationMemory = None,
+                        min_score: float = 0.75, prefill_score: float = 0.9):
+    # Sort alphabetically by tag name for cleaner output; the texts stay in the rows
+    entries = sorted(iter_entries(rows), key=lambda entry: entry[0])
+    notes = None
+    if memory is not None:
+        entries, notes, counts = prefill(entries, memory, min_score, prefill_score)
     
-    # Write to single file
-    output_path = Path(SINGLE_XML_OUTPUT)
-    pretty_xml = prettify(root)
-    output_path.write_text(pretty_xml, encoding="utf-8")
+    # Stream straight to the file, no in-memory document
+    output_path = Path(output_file)
+    with instrumentation.timed("write"):
+        total_lines = write_overrides(output_file, entries, notes)
     
     print(f"\nGenerated single localization file:")
     print(f"   → {output_path.resolve()}")
     print(f"   → {len(rows)} identifiers processed")
     print(f"   → {total_lines} translation lines (with original English text)")
+    if memory is not None:
+        print(f"   → prefilled from translation memory: {counts['exact']} exact, {counts['fuzzy']} fuzzy "
+              f"(≥ {prefill_score:.0%}), {counts['suggested']} more suggested in comments")
 
 def load_csv(csv_path: Path):
     if not csv_path.exists():
@@ -88,33 +109,39 @@ def load_csv(csv_path: Path):
     rows = []
     with csv_path.open("r", encoding="utf-8", newline='') as f:
         reader = csv.DictReader(f)
-        expected = {'identifier', 'element_tag', 'name', 'description', 'file'}
-        if not expected.issubset(set(reader.fieldnames or [])):
+        if not set(FIELDNAMES).issubset(set(reader.fieldnames or [])):
             print(f"Error: CSV missing required columns. Found: {reader.fieldnames}", file=sys.stderr)
             sys.exit(1)
         
         for row in reader:
-            rows.append({
-                'identifier': row['identifier'],
-                'element_tag': row['element_tag'],
-                'name': row['name'],
-                'description': row['description'],
-                'file': row['file']
-            })
+            rows.append(DetailRow(*(row[field] for field in FIELDNAMES)))
     
     print(f"Loaded {len(rows)} missing translatable entries from {csv_path}")
     return rows
 
-def main():
-    csv_path = Path(MISSING_DETAILS_CSV)
-    entries = load_csv(csv_path)
+def run(settings: dict, rows: list[DetailRow] = None):
+    """
+    Stage 5: write SINGLE_XML_OUTPUT with the original English text.
+    rows comes from stage 4 in-process, or from MISSING_DETAILS_CSV when omitted.
+    """
+    entries = rows if rows is not None else load_csv(Path(settings["MISSING_DETAILS_CSV"]))
     
     if not entries:
         print("No entries to process. Creating empty XML file.")
-        Path(SINGLE_XML_OUTPUT).write_text("<Overrides>\n</Overrides>\n", encoding="utf-8")
+        Path(settings["SINGLE_XML_OUTPUT"]).write_text("<Overrides>\n</Overrides>\n", encoding="utf-8")
         return
     
-    generate_single_xml(entries)
+    memory = None
+    if settings["TM_ENGLISH_FILE"]:
+        memory = build_memory(settings["TM_ENGLISH_FILE"], settings["LOCALIZATION_FILE"],
+                              settings["TM_GLOSSARY_FILES"])
+        print(f"Translation memory: {len(memory)} translated strings, {len(memory.glossary)} glossary terms")
+    
+    generate_single_xml(entries, settings["SINGLE_XML_OUTPUT"], memory,
+                        settings["TM_MIN_SCORE"], settings["TM_PREFILL_SCORE"])
+
+def main():
+    run(load_settings())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,189 @@
+# File: PythonUtils/generate_synthetic_mod.py
+
+import os
+import sys
+import random
+import argparse
+from pathlib import Path
+from xml.sax.saxutils import quoteattr, escape
+
+# ----------------------------- SHAPE ------------------------------
+# Roughly what the Abnormalities mod looks like at scale 1: ~360 content XMLs,
+# ~2,000 definitions, ~17,000 identifier occurrences and 6-8 MB of XML.
+FILES_PER_SCALE = 360
+DEFINITIONS_PER_FILE = 6
+HIDDEN_RATIO = 0.012           # hideinmenus="true"
+UNTRANSLATABLE_RATIO = 0.25    # empty or letter-less name/description
+TRANSLATED_RATIO = 0.7         # share of definitions already in TrCn.xml
+GAME_TEXT_FILES = 12
+GAME_KEYS_PER_FILE = 1500
+
+# (folder, root tag, definition tag, name prefix, description prefix)
+CONTENT_KINDS = [
+    ("Items", "Items", "Item", "entityname", "entitydescription"),
+    ("Items", "Items", "Item", "entityname", "entitydescription"),
+    ("Items", "Items", "Item", "entityname", "entitydescription"),
+    ("Talents", "Talents", "Talent", "talentname", "talentdescription"),
+    ("Afflictions", "Afflictions", "Affliction", "afflictionname", "afflictiondescription"),
+    ("Characters", "Characters", "Character", "charactername", "characterdescription"),
+    ("Events", "EventPrefabs", "EventSet", "eventsetname", "eventsetdescription"),
+]
+
+WORDS = ("abnormality ego gift mask coat pale red black white crimson amber green indigo "
+         "sword gun blade cloak bird toad star nest child passenger murderer heart fruit "
+         "hunger grief joy calm wrath seed moon sun sinner dawn dusk noon midnight").split()
+
+# filelist.xml element for the content files of each folder
+FILELIST_TAGS = {"Items": "Item", "Talents": "Talents", "Afflictions": "Afflictions",
+                 "Characters": "Character", "Events": "RandomEvents"}
+
+VANILLA_PREFIXES = ["entityname", "entitydescription", "afflictionname", "talentname", "missionname"]
+# ----------------------------------------------------------------
+
+def sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+def definition_xml(rng: random.Random, tag: str, identifier: str, name: str, description: str,
+                   hidden: bool, refs: list[str]) -> str:
+    """One definition element with the kind of nested noise real content files carry"""
+    attrs = f'identifier="{identifier}" name={quoteattr(name)} description={quoteattr(description)}'
+    if hidden:
+        attrs += ' hideinmenus="true"'
+    lines = [f'  <{tag} {attrs} category="Equipment" tags="smallitem,{rng.choice(WORDS)}" scale="0.5">']
+    lines.append(f'    <Sprite texture="%ModDir%/Items/{identifier}.png" sourcerect="0,0,{rng.randint(16, 256)},'
+                 f'{rng.randint(16, 256)}" depth="0.55" origin="0.5,0.5" />')
+    lines.append('    <Body width="40" height="24" density="20" friction="0.8" restitution="0.05" />')
+    lines.append('    <Wearable slots="Any,OuterClothes" armorvalue="10" msg="ItemMsgPickUpSelect">')
+    for limb in ("Torso", "LeftArm", "RightArm", "LeftLeg", "RightLeg", "Head"):
+        lines.append(f'      <sprite name="{name or identifier} {limb}" texture="%ModDir%/Items/{identifier}_wear.png" '
+                     f'limb="{limb}" sourcerect="{rng.randint(0, 512)},{rng.randint(0, 512)},128,128" '
+                     f'origin="0.5,0.5" inheritlimbdepth="true" inheritsourcerect="false" hidelimb="false" />')
+    lines.append('      <damagemodifier armorsector="0.0,360.0" damagemultiplier="0.8" afflictiontypes="damage,bleeding" />')
+    lines.append('    </Wearable>')
+    for _ in range(rng.randint(1, 2)):
+        lines.append('    <StatusEffect type="OnUse" target="This,Character" duration="1" disabledeltatime="true">')
+        lines.append(f'      <Affliction identifier="{rng.choice(refs)}" amount="{rng.randint(1, 50)}" />')
+        lines.append(f'      <ReduceAffliction identifier="{rng.choice(refs)}" amount="{rng.randint(1, 50)}" />')
+        lines.append('      <Conditional hasstatustag="neq active" />')
+        lines.append('    </StatusEffect>')
+    lines.append('    <Deconstruct time="10">')
+    for _ in range(rng.randint(1, 3)):
+        lines.append(f'      <Item identifier="{rng.choice(refs)}" />')
+    lines.append('    </Deconstruct>')
+    lines.append('    <Fabricate suitablefabricators="fabricator" requiredtime="30">')
+    lines.append(f'      <RequiredSkill identifier="weapons" level="{rng.randint(10, 90)}" />')
+    lines.append(f'      <RequiredItem identifier="{rng.choice(refs)}" amount="{rng.randint(1, 4)}" />')
+    lines.append('    </Fabricate>')
+    lines.append(f'  </{tag}>')
+    return "\n".join(lines)
+
+def localization_xml(language: str, entries: list[tuple[str, str]]) -> str:
+    lines = ['<?xml version="1.0" encoding="utf-8"?>',
+             f'<infotexts language="{language}" nowhitespace="false" translatedname="{language}">',
+             '  <!-- Generated -->']
+    for key, text in entries:
+        lines.append(f'  <{key}>{escape(text)}</{key}>')
+    lines.append('</infotexts>')
+    return "\n".join(lines) + "\n"
+
+def filelist_xml(entries: list[tuple[str, str]]) -> str:
+    lines = ['<?xml version="1.0" encoding="utf-8"?>',
+             '<contentpackage name="Synthetic" modversion="1.0.0" corepackage="False" gameversion="1.11.5.0">']
+    for tag, rel_path in entries:
+        lines.append(f'  <{tag} file="%ModDir%/{rel_path}" />')
+    lines.append('</contentpackage>')
+    return "\n".join(lines) + "\n"
+
+def generate_mod_tree(out_dir: str, scale: float = 1, seed: int = 0) -> dict:
+    """
+    Build a synthetic Barotrauma content package under out_dir:
+      out_dir/Mod/...                       content XMLs, filelist.xml, Translations/English.xml and TrCn.xml
+      out_dir/GameTexts/TraditionalChinese  stand-in for the game's text folder
+    The same scale and seed always produce the same files.
+    Returns counts describing the generated tree.
+    """
+    rng = random.Random(seed)
+    mod_dir = Path(out_dir) / "Mod"
+    game_dir = Path(out_dir) / "GameTexts" / "TraditionalChinese"
+    translations_dir = mod_dir / "Translations"
+    for d in (mod_dir, game_dir, translations_dir):
+        d.mkdir(parents=True, exist_ok=True)
+
+    file_count = max(1, int(FILES_PER_SCALE * scale))
+    english, trcn = [], []
+    declared = []
+    definitions = 0
+    total_bytes = 0
+    refs = ["weapons", "organicfiber", "bleeding", "burn", "stun"]
+
+    for file_index in range(file_count):
+        folder, root_tag, tag, name_prefix, desc_prefix = CONTENT_KINDS[file_index % len(CONTENT_KINDS)]
+        parts = [f'<?xml version="1.0" encoding="utf-8"?>\n<{root_tag}>']
+        for def_index in range(DEFINITIONS_PER_FILE):
+            identifier = f"{tag.lower()}_{file_index:05d}_{def_index}"
+            name = sentence(rng, rng.randint(1, 3)).rstrip(".")
+            description = sentence(rng, rng.randint(6, 20))
+            roll = rng.random()
+            if roll < UNTRANSLATABLE_RATIO / 2:
+                name, description = "", ""
+            elif roll < UNTRANSLATABLE_RATIO:
+                name, description = "???", "0.5"
+            hidden = rng.random() < HIDDEN_RATIO
+            parts.append(definition_xml(rng, tag, identifier, name, description, hidden, refs))
+            refs.append(identifier)
+            definitions += 1
+
+            if name:
+                english.append((f"{name_prefix}.{identifier}", name))
+                english.append((f"{desc_prefix}.{identifier}", description))
+                if rng.random() < TRANSLATED_RATIO:
+                    trcn.append((f"{name_prefix}.{identifier}", name))
+                    trcn.append((f"{desc_prefix}.{identifier}", description))
+        parts.append(f'</{root_tag}>\n')
+
+        file_path = mod_dir / folder / f"{folder.lower()}_{file_index:05d}.xml"
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        content = "\n".join(parts)
+        file_path.write_text(content, encoding="utf-8")
+        declared.append((FILELIST_TAGS[folder], file_path.relative_to(mod_dir).as_posix()))
+        total_bytes += len(content.encode("utf-8"))
+
+    (translations_dir / "English.xml").write_text(localization_xml("English", english), encoding="utf-8")
+    (translations_dir / "TrCn.xml").write_text(localization_xml("Traditional Chinese", trcn), encoding="utf-8")
+    declared += [("Text", "Translations/English.xml"), ("Text", "Translations/TrCn.xml")]
+    (mod_dir / "filelist.xml").write_text(filelist_xml(declared), encoding="utf-8")
+
+    # Vanilla texts, plus a few keys that happen to cover mod identifiers
+    for game_index in range(max(1, int(GAME_TEXT_FILES * min(scale, 10)))):
+        entries = [(f"{rng.choice(VANILLA_PREFIXES)}.vanilla_{game_index}_{i}", sentence(rng, 8))
+                   for i in range(GAME_KEYS_PER_FILE)]
+        entries += [(f"entityname.{rng.choice(refs)}", "Vanilla") for _ in range(20)]
+        (game_dir / f"TraditionalChinese_{game_index:03d}.xml").write_text(
+            localization_xml("Traditional Chinese", entries), encoding="utf-8")
+
+    return {
+        "files": file_count,
+        "definitions": definitions,
+        "bytes": total_bytes,
+        "mod_dir": str(mod_dir),
+        "game_dir": str(game_dir),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Barotrauma mod tree for benchmarking.")
+    parser.add_argument("out_dir", help="directory to create the tree in")
+    parser.add_argument("--scale", type=float, default=1, help="size relative to this mod (default 1)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if os.path.exists(args.out_dir) and os.listdir(args.out_dir):
+        print(f"Error: {args.out_dir} is not empty", file=sys.stderr)
+        sys.exit(1)
+
+    stats = generate_mod_tree(args.out_dir, args.scale, args.seed)
+    print(f"Generated {stats['files']} XML files, {stats['definitions']} definitions, "
+          f"{stats['bytes'] / 1e6:.1f} MB in {stats['mod_dir']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+# File: PythonUtils/identifier_db.py
+
+import os
+import sys
+import sqlite3
+import hashlib
+import argparse
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import instrumentation
+from config_utils import load_config, get_setting
+
+# ----------------------------- CONFIG -----------------------------
+def load_settings(cfg=None) -> dict:
+    """Read the settings used by the lookup CLI from config.ini"""
+    cfg = cfg if cfg is not None else load_config()
+    return {
+        "IDENTIFIER_DB_FILE": get_setting(cfg, "IDENTIFIER_DB_FILE", ""),
+    }
+
+DEFAULT_LIMIT = 50
+# ----------------------------------------------------------------
+
+# Bump when the tables change; an older database is simply rebuilt
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE occurrences (
+    id INTEGER PRIMARY KEY,         -- discovery order, as in the identifier index
+    identifier TEXT NOT NULL,
+    element_tag TEXT NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    file TEXT NOT NULL,
+    is_hidden INTEGER NOT NULL
+);
+CREATE INDEX occurrences_identifier ON occurrences (identifier COLLATE NOCASE);
+CREATE INDEX occurrences_file ON occurrences (file);
+CREATE TABLE texts (
+    language TEXT NOT NULL,         -- file name without .xml: English, Russian, TrCn
+    key TEXT NOT NULL,
+    identifier TEXT,                -- part after the first dot; NULL for keys like loadingscreentip
+    text TEXT NOT NULL
+);
+CREATE INDEX texts_identifier ON texts (identifier COLLATE NOCASE);
+"""
+
+# Trigram tokens also find words inside Chinese text, which has no spaces;
+# older SQLite builds fall back to word tokens, builds without FTS5 to LIKE scans
+SEARCH_TOKENIZERS = ("trigram", "unicode61")
+
+def create_search_table(conn: sqlite3.Connection) -> str:
+    """Create the full-text table; returns the tokenizer used, or "" without FTS5"""
+    for tokenizer in SEARCH_TOKENIZERS:
+        try:
+            conn.execute(f"CREATE VIRTUAL TABLE search USING fts5(identifier, kind, text, tokenize='{tokenizer}')")
+            return tokenizer
+        except sqlite3.OperationalError:
+            continue
+    conn.execute("CREATE TABLE search (identifier TEXT, kind TEXT, text TEXT)")
+    return ""
+
+def localization_rows(translations_dir: str):
+    """(language, key, identifier, text) of every entry of every .xml file in translations_dir"""
+    for file_path in sorted(Path(translations_dir).glob("*.xml")):
+        try:
+            root = ET.parse(file_path).getroot()
+        except (OSError, ET.ParseError) as e:
+            print(f"Warning: {file_path} not indexed: {e}", file=sys.stderr)
+            continue
+        for child in root:
+            if not isinstance(child.tag, str):
+                continue  # Comments
+            key = child.tag
+            identifier = key.split(".", 1)[1] if "." in key else None
+            yield file_path.stem, key, identifier, (child.text or "").strip()
+
+def source_stamp(occurrences: list[tuple], translations_dir: str) -> str:
+    """Digest of what the database is built from: the schema, the occurrences and the text files' stamps"""
+    digest = hashlib.blake2b(f"{SCHEMA_VERSION}\n".encode("utf-8"), digest_size=16)
+    digest.update(repr(occurrences).encode("utf-8"))
+    if translations_dir:
+        for file_path in sorted(Path(translations_dir).glob("*.xml")):
+            stat = file_path.stat()
+            digest.update(f"{file_path.name}|{stat.st_size}|{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+def stored_stamp(db_file: str) -> str:
+    """source_stamp recorded in db_file; "" when there is no readable database"""
+    if not os.path.exists(db_file):
+        return ""
+    try:
+        conn = sqlite3.connect(f"{Path(db_file).resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'source_stamp'").fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return ""
+    return row[0] if row else ""
+
+def write_database(db_file: str, index, translations_dir: str = "") -> int:
+    """
+    Write the identifier index, and the texts of translations_dir/*.xml per
+    language, to a fresh SQLite database at db_file.
+    Nothing is written when the database already holds the same index and
+    texts, which keeps watch mode and repeated runs from rebuilding it.
+    The database is built next to db_file and swapped in when complete, so a
+    lookup running at the same time never sees a half-written file.
+    Returns the number of occurrences in the database.
+    """
+    occurrences = [
+        (identifier.strip(), occ.element_tag, occ.name, occ.description, occ.file, int(occ.is_hidden))
+        for identifier, occ_list in index.occurrences.items() for occ in occ_list
+    ]
+    stamp = source_stamp(occurrences, translations_dir)
+    if stamp == stored_stamp(db_file):
+        print(f"Identifier database up to date: {db_file}")
+        return len(occurrences)
+
+    os.makedirs(os.path.dirname(os.path.abspath(db_file)), exist_ok=True)
+    tmp_file = db_file + ".tmp"
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+
+    with instrumentation.timed("write"):
+        conn = sqlite3.connect(tmp_file)
+        try:
+            conn.executescript(SCHEMA)
+            tokenizer = create_search_table(conn)
+            conn.executemany("INSERT INTO occurrences (identifier, element_tag, name, description, file, is_hidden) "
+                             "VALUES (?, ?, ?, ?, ?, ?)", occurrences)
+            texts = list(localization_rows(translations_dir)) if translations_dir else []
+            conn.executemany("INSERT INTO texts VALUES (?, ?, ?, ?)", texts)
+
+            search = [(identifier, field, text)
+                      for identifier, _, name, description, *_ in occurrences
+                      for field, text in (("name", name), ("description", description)) if text]
+            search += [(identifier or key, language, text) for language, key, identifier, text in texts if text]
+            conn.executemany("INSERT INTO search VALUES (?, ?, ?)", search)
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ("schema_version", str(SCHEMA_VERSION)),
+                ("search_tokenizer", tokenizer),
+                ("source_stamp", stamp),
+            ])
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp_file, db_file)
+    print(f"Identifier database saved to: {db_file} ({len(occurrences)} occurrences, {len(texts)} localized texts)")
+    return len(occurrences)
+
+# ---------------------- queries ----------------------
+
+def connect(db_file: str) -> sqlite3.Connection:
+    if not os.path.exists(db_file):
+        print(f"Error: Identifier database not found: {db_file}", file=sys.stderr)
+        print("Run extract_identifiers.py (or main.py) with IDENTIFIER_DB_FILE set first.", file=sys.stderr)
+        sys.exit(1)
+    # Read-only: lookups never lock out the pipeline rebuilding the file
+    conn = sqlite3.connect(f"{Path(db_file).resolve().as_uri()}?mode=ro", uri=True)
+    version = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+    if not version or int(version[0]) != SCHEMA_VERSION:
+        print(f"Error: {db_file} was written by another version; run the pipeline again", file=sys.stderr)
+        sys.exit(1)
+    return conn
+
+def find_definitions(conn: sqlite3.Connection, identifier: str) -> list[tuple]:
+    """(element_tag, file, is_hidden, name, description) of every definition, in discovery order"""
+    return conn.execute("SELECT element_tag, file, is_hidden, name, description FROM occurrences "
+                        "WHERE identifier = ? COLLATE NOCASE ORDER BY id", (identifier,)).fetchall()
+
+def find_texts(conn: sqlite3.Connection, identifier: str) -> list[tuple]:
+    """(language, key, text) of every localized entry for identifier"""
+    return conn.execute("SELECT language, key, text FROM texts WHERE identifier = ? COLLATE NOCASE "
+                        "ORDER BY language, key", (identifier,)).fetchall()
+
+def search_text(conn: sqlite3.Connection, query: str, limit: int = DEFAULT_LIMIT) -> list[tuple]:
+    """(identifier, kind, text) of names, descriptions and translations containing query"""
+    tokenizer = conn.execute("SELECT value FROM meta WHERE key = 'search_tokenizer'").fetchone()[0]
+    if tokenizer == "unicode61" or (tokenizer == "trigram" and len(query) >= 3):
+        # One quoted phrase, so FTS5 operators in the query are taken literally
+        phrase = '"' + query.replace('"', '""') + '"'
+        sql, args = "SELECT identifier, kind, text FROM search WHERE search MATCH ? ORDER BY rank LIMIT ?", (phrase, limit)
+    else:
+        # Trigrams need three characters; shorter queries (and builds without FTS5) scan
+        escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        sql = "SELECT identifier, kind, text FROM search WHERE text LIKE ? ESCAPE '\\' LIMIT ?"
+        args = (f"%{escaped}%", limit)
+    return conn.execute(sql, args).fetchall()
+
+def files_without_description(conn: sqlite3.Connection, element_tag: str = None) -> list[tuple]:
+    """(file, element_tag, count) of visible definitions that have a name but no description"""
+    sql = ("SELECT file, element_tag, COUNT(*) FROM occurrences "
+           "WHERE description = '' AND name != '' AND is_hidden = 0")
+    args = ()
+    if element_tag:
+        sql += " AND element_tag = ? COLLATE NOCASE"
+        args = (element_tag,)
+    return conn.execute(sql + " GROUP BY file, element_tag ORDER BY file, element_tag", args).fetchall()
+
+# ---------------------- CLI ----------------------
+
+def print_show(conn: sqlite3.Connection, identifier: str):
+    definitions = find_definitions(conn, identifier)
+    texts = find_texts(conn, identifier)
+    if not definitions and not texts:
+        print(f"'{identifier}' is not defined or localized anywhere.")
+        return
+    for element_tag, file, is_hidden, name, description in definitions:
+        print(f"<{element_tag}> in {file}" + ("  (hideinmenus)" if is_hidden else ""))
+        if name:
+            print(f"    name:        {name}")
+        if description:
+            print(f"    description: {description}")
+    if not definitions:
+        print("Not defined in SRCDIR.")
+    for language, key, text in texts:
+        print(f"[{language}] {key}: {text}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Query the identifier database (IDENTIFIER_DB_FILE).")
+    parser.add_argument("--db", help="database file (default IDENTIFIER_DB_FILE)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    show = commands.add_parser("show", help="where an identifier is defined, with its English and localized texts")
+    show.add_argument("identifier")
+
+    search = commands.add_parser("search", help="full-text search over names, descriptions and translations")
+    search.add_argument("text", nargs="+")
+    search.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+
+    nodesc = commands.add_parser("no-description", help="files defining visible elements that have no description")
+    nodesc.add_argument("--tag", help="only this element tag, e.g. Item")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    db_file = args.db or load_settings()["IDENTIFIER_DB_FILE"]
+    if not db_file:
+        print("Error: IDENTIFIER_DB_FILE is not set in config.ini (or pass --db)", file=sys.stderr)
+        sys.exit(1)
+    conn = connect(db_file)
+
+    if args.command == "show":
+        print_show(conn, args.identifier)
+    elif args.command == "search":
+        rows = search_text(conn, " ".join(args.text), args.limit)
+        for identifier, kind, text in rows:
+            print(f"{identifier} [{kind}]: {text}")
+        if not rows:
+            print("No matches.")
+    else:
+        rows = files_without_description(conn, args.tag)
+        for file, element_tag, count in rows:
+            print(f"{count:5}  <{element_tag}>  {file}")
+        print(f"\n{sum(row[2] for row in rows)} definitions without a description in {len({r[0] for r in rows})} files")
+
+if __name__ == "__main__":
+    main()
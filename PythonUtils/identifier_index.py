@@ -0,0 +1,346 @@
+# File: PythonUtils/identifier_index.py
+
+import xml.etree.ElementTree as ET
+import io
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import instrumentation
+from config_utils import get_setting
+from content_package import declared_xml_files, filter_paths, parse_globs
+from parse_cache import ParseCache
+
+# How build_identifier_index finds the files to parse
+DISCOVERY_MODES = ("walk", "filelist")
+
+# Bump when the cached occurrence records change shape
+PARSE_CACHE_VERSION = 4
+
+# Attributes naming other prefabs by identifier (comma separated lists allowed);
+# the game matches attribute names case-insensitively
+REFERENCE_ATTRIBUTES = frozenset((
+    "identifiers", "item", "itemidentifier", "itemidentifiers",
+    "affliction", "afflictionidentifier", "afflictionidentifiers",
+    "speciesname", "variantof", "talentidentifier", "talentidentifiers",
+    "jobidentifier", "skillidentifier", "npcsetidentifier", "npcidentifier",
+))
+# Nested elements whose identifier attribute points at a prefab instead of
+# defining one: <RequiredItem identifier=...>, <Affliction> inside a StatusEffect
+REFERENCE_ELEMENTS = frozenset((
+    "item", "requireditem", "spawnitem", "produceditem", "suitabletreatment",
+    "affliction", "reduceaffliction", "requiredaffliction", "vitalitymultiplier",
+    "talent", "talentoption", "abilityconditionhastalent", "abilityconditionallyhastalent",
+    "job", "skill", "requiredskill", "skillrequirementhint", "order", "reputation", "locationtype",
+))
+# Attribute values here are comparisons ("neq human"), not references
+CONDITION_ELEMENTS = frozenset(("conditional",))
+
+class Occurrence(NamedTuple):
+    """
+    One element carrying an identifier attribute. A plain tuple rather than a
+    dict, so a whole-mod index holds no per-record hash table; the tag and file
+    strings are interned and shared by every record that has them.
+    """
+    element_tag: str
+    name: str
+    description: str
+    file: str
+    is_hidden: bool
+
+class Reference(NamedTuple):
+    """
+    One edge of the cross-reference graph, keyed by the lowercase identifier it
+    names. defines marks the element that defines the identifier (a prefab's
+    identifier, a character file's speciesname); every other record uses it.
+    """
+    attribute: str
+    element_tag: str
+    file: str
+    defines: bool
+
+class ParsedFile(NamedTuple):
+    """What parsing one file yields: occurrences for the stages, references for the graph"""
+    occurrences: list   # (identifier, Occurrence) in document order
+    references: list    # (lowercase identifier, Reference) in document order
+
+    def __bool__(self) -> bool:
+        return bool(self.occurrences or self.references)
+
+def is_hidden_in_menus(elem) -> bool:
+    """True if the element has hideinmenus="true" (case-insensitive)"""
+    hide = elem.get('hideinmenus')
+    return bool(hide and hide.strip().lower() == 'true')
+
+def iter_references(elem, prefab_depth: int, rel_path: str, shared: dict):
+    """
+    (lowercase identifier, Reference) pairs for the identifiers one element defines
+    or names. Equal records are taken from shared, so a file referencing the
+    same kind of thing a thousand times holds one record for it.
+    """
+    tag = elem.tag.lower()
+    if tag in CONDITION_ELEMENTS:
+        return
+    for attribute, value in elem.attrib.items():
+        attribute = attribute.lower()
+        if attribute == "identifier":
+            # Prefabs sit at the top of a file (or of an <Override>); deeper down the known tags only point at one
+            defines = prefab_depth <= 2 or tag not in REFERENCE_ELEMENTS
+        elif attribute == "speciesname":
+            defines = prefab_depth == 1 and tag == "character"
+        elif attribute in REFERENCE_ATTRIBUTES:
+            defines = False
+        else:
+            continue
+        record = Reference(sys.intern(attribute), sys.intern(elem.tag), rel_path, defines)
+        record = shared.setdefault(record, record)
+        for target in value.split(","):
+            target = target.strip().lower()
+            if target:
+                yield sys.intern(target), record
+
+def parse_xml_file(source, rel_path: str) -> ParsedFile:
+    """
+    Stream one XML file (path or binary file object) with iterparse and collect,
+    in document order, (identifier, Occurrence) pairs for every element carrying
+    an identifier attribute and (lowercase identifier, Reference) pairs for the
+    cross-reference graph. The identifier of an Occurrence is kept exactly as
+    written; callers strip it if needed.
+
+    Attributes are read on the start event, so records come out in the same order
+    as ElementTree's root.iter(). Finished subtrees are cleared on their end event
+    and top-level children are dropped from the root, so memory stays bounded by
+    the largest top-level element rather than the whole document.
+    Raises on unreadable or malformed XML.
+    """
+    found = ParsedFile([], [])
+    depth = 0
+    overrides = []  # depths of the open <Override> elements, which do not count towards prefab depth
+    shared = {}
+    root = None
+    rel_path = sys.intern(rel_path)
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            depth += 1
+            identifier = elem.get('identifier')
+            if identifier:
+                found.occurrences.append((identifier, Occurrence(
+                    sys.intern(elem.tag),
+                    elem.get('name', '').strip(),
+                    elem.get('description', '').strip(),
+                    rel_path,
+                    is_hidden_in_menus(elem),
+                )))
+            if elem.tag.lower() == 'override':
+                overrides.append(depth)
+            else:
+                found.references.extend(iter_references(elem, depth - len(overrides), rel_path, shared))
+        else:
+            if overrides and overrides[-1] == depth:
+                overrides.pop()
+            depth -= 1
+            elem.clear()
+            if depth == 1:
+                root.clear()
+    return found
+
+def format_scan_error(file_path: str, e: Exception) -> str:
+    if isinstance(e, ET.ParseError):
+        return f"XML parse error in {file_path}: {e}"
+    return f"Error processing {file_path}: {e}"
+
+def scan_xml_file(file_path: str, rel_path: str, cache: ParseCache = None) -> ParsedFile:
+    """
+    parse_xml_file that reports errors and returns no records instead of raising.
+    With a cache, unchanged files are not parsed again.
+    """
+    try:
+        if cache:
+            return cache.get_or_parse(file_path, rel_path, lambda f: parse_xml_file(f, rel_path))
+        return parse_xml_file(file_path, rel_path)
+    except Exception as e:
+        print(format_scan_error(file_path, e), file=sys.stderr)
+        return ParsedFile([], [])
+
+def _parse_worker(task: tuple[str, str, bytes]):
+    """
+    Process-pool entry point: (ParsedFile, None, seconds) or (None, error message, seconds),
+    where seconds is the time spent reading and parsing the file.
+    data is the file's content when the parse cache already read it, else None.
+    """
+    file_path, rel_path, data = task
+    start = time.perf_counter()
+    try:
+        source = io.BytesIO(data) if data is not None else file_path
+        return parse_xml_file(source, rel_path), None, time.perf_counter() - start
+    except Exception as e:
+        return None, format_scan_error(file_path, e), time.perf_counter() - start
+
+def parse_xml_files(tasks: list[tuple[str, str, bytes]], jobs: int = 1):
+    """
+    Parse (file_path, rel_path, data or None) tasks and yield (ParsedFile, error, seconds) in task order.
+    With jobs > 1 the files are spread over a process pool; results still come
+    back in the original order, so merging them is deterministic.
+    """
+    if jobs <= 1 or len(tasks) < 2:
+        yield from map(_parse_worker, tasks)
+        return
+
+    chunksize = max(1, len(tasks) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(_parse_worker, tasks, chunksize=chunksize)
+
+def load_discovery_settings(cfg) -> dict:
+    """FILE_DISCOVERY and the include/exclude globs, shared by every stage that indexes SRCDIR"""
+    discovery = get_setting(cfg, "FILE_DISCOVERY", "walk").lower()
+    if discovery not in DISCOVERY_MODES:
+        print(f"Error: FILE_DISCOVERY must be one of {', '.join(DISCOVERY_MODES)}, got '{discovery}'", file=sys.stderr)
+        sys.exit(1)
+    return {
+        "FILE_DISCOVERY": discovery,
+        "INCLUDE_GLOBS": parse_globs(get_setting(cfg, "INCLUDE_GLOBS", "")),  # empty = everything
+        "EXCLUDE_GLOBS": parse_globs(get_setting(cfg, "EXCLUDE_GLOBS", "")),
+    }
+
+def resolve_jobs(value) -> int:
+    """Number of worker processes from a --jobs/JOBS value; 0 means one per CPU"""
+    jobs = int(value)
+    return jobs if jobs > 0 else (os.cpu_count() or 1)
+
+class IdentifierIndex:
+    """
+    Every identifier occurrence under a source directory, built in one pass.
+    Answers both the visible-identifier set (stage 1) and the per-identifier
+    detail lookup (stage 4) without re-parsing the XML files.
+    """
+
+    def __init__(self):
+        self.occurrences = defaultdict(list)   # raw identifier -> list of Occurrence
+        self.references = defaultdict(list)    # lowercase identifier -> list of Reference (inverted index)
+        self.xml_count = 0                      # XML files scanned
+        self.visible_xml_count = 0              # XML files with at least one visible identifier
+
+    def add_file(self, found: ParsedFile):
+        """Merge the result of scan_xml_file for one file"""
+        self.xml_count += 1
+        has_visible = False
+        for identifier, occ in found.occurrences:
+            self.occurrences[identifier].append(occ)
+            if not occ.is_hidden and identifier.strip():
+                has_visible = True
+        for identifier, record in found.references:
+            self.references[identifier].append(record)
+        if has_visible:
+            self.visible_xml_count += 1
+
+    def visible_identifiers(self) -> set[str]:
+        """Identifiers with at least one occurrence not marked hideinmenus="true" """
+        visible = set()
+        for identifier, occ_list in self.occurrences.items():
+            ident = identifier.strip()
+            if ident and any(not occ.is_hidden for occ in occ_list):
+                visible.add(ident)
+        return visible
+
+    def occurrences_for(self, target_identifiers: set[str]) -> dict[str, list[Occurrence]]:
+        """Occurrences of the requested identifiers (exact attribute match)"""
+        return {
+            identifier: occ_list
+            for identifier, occ_list in self.occurrences.items()
+            if identifier in target_identifiers
+        }
+
+def walk_xml_files(src_dir: str) -> list[tuple[str, str]]:
+    """(file_path, rel_path) of every .xml file under src_dir, in os.walk order"""
+    xml_files = []
+    for root_dir, _, files in os.walk(src_dir):
+        for file in files:
+            if file.lower().endswith('.xml'):
+                file_path = os.path.join(root_dir, file)
+                xml_files.append((file_path, os.path.relpath(file_path, src_dir)))
+    return xml_files
+
+def collect_xml_files(src_dir: str, discovery: str = "walk", include: list[str] = None,
+                      exclude: list[str] = None) -> list[tuple[str, str]]:
+    """
+    (file_path, rel_path) of the XML files to index:
+      walk      every .xml file under src_dir, in os.walk order
+      filelist  only the files src_dir/filelist.xml declares, in declaration order
+    then narrowed down by the include/exclude globs (matched against rel_path).
+    """
+    if discovery == "filelist":
+        xml_files = declared_xml_files(src_dir)
+    elif discovery == "walk":
+        xml_files = walk_xml_files(src_dir)
+    else:
+        raise ValueError(f"Unknown discovery mode {discovery!r}, expected one of {DISCOVERY_MODES}")
+    return filter_paths(xml_files, include, exclude)
+
+def scan_xml_files(xml_files: list[tuple[str, str]], cache: ParseCache = None,
+                   jobs: int = 1) -> list[ParsedFile]:
+    """
+    Records of every (file_path, rel_path) in xml_files, in the same order.
+    Unchanged files are taken from cache when one is given; the rest are parsed,
+    in a process pool with jobs > 1. Unreadable or malformed files are reported
+    and contribute no records.
+    """
+    results = [ParsedFile([], []) for _ in xml_files]
+    to_parse = []
+    tasks = []
+
+    for i, (file_path, rel_path) in enumerate(xml_files):
+        data = None
+        if cache:
+            try:
+                hit, value = cache.lookup(file_path, rel_path)
+            except OSError as e:
+                print(format_scan_error(file_path, e), file=sys.stderr)
+                continue
+            if hit:
+                results[i] = value
+                continue
+            # Parse the bytes the cache hashed, so the stored digest matches what was parsed
+            data = value
+        to_parse.append(i)
+        tasks.append((file_path, rel_path, data))
+
+    for i, task, (found, error, seconds) in zip(to_parse, tasks, parse_xml_files(tasks, jobs)):
+        if instrumentation.active():
+            file_path = xml_files[i][0]
+            if task[2] is None:
+                instrumentation.record_read(file_path, os.path.getsize(file_path))
+            instrumentation.record_time("xml_parse", seconds, file_path)
+        if error:
+            print(error, file=sys.stderr)
+            continue
+        results[i] = found
+        if cache:
+            cache.store(xml_files[i][1], found)
+    return results
+
+def build_identifier_index(src_dir: str, cache_file: str = "", jobs: int = 1, discovery: str = "walk",
+                           include: list[str] = None, exclude: list[str] = None) -> IdentifierIndex:
+    """
+    Index the XML files collect_xml_files finds under src_dir in one pass.
+    With cache_file set, unchanged files are taken from the persistent parse cache.
+    With jobs > 1 the remaining files are parsed in a process pool; files are
+    merged in discovery order either way, so the index is the same as a serial run.
+    """
+    index = IdentifierIndex()
+    if not os.path.isdir(src_dir):
+        print(f"Error: Directory not found: {src_dir}", file=sys.stderr)
+        return index
+
+    cache = ParseCache(cache_file, src_dir, PARSE_CACHE_VERSION) if cache_file else None
+    xml_files = collect_xml_files(src_dir, discovery, include, exclude)
+    for found in scan_xml_files(xml_files, cache, jobs):
+        index.add_file(found)
+
+    if cache:
+        cache.save()
+    return index
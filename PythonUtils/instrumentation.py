@@ -0,0 +1,205 @@
+# File: PythonUtils/instrumentation.py
+
+import os
+import sys
+import json
+import time
+from contextlib import contextmanager
+
+# Active Recorder while main.py --profile runs; every hook below is a no-op otherwise
+_current = None
+
+SLOWEST_FILES = 10
+
+def peak_rss_bytes(children: bool = False):
+    """
+    Peak resident set size of this process since it started (not per stage), or
+    None if unavailable. With children, the largest peak of any finished child
+    process (pool workers) instead, which Windows does not report.
+    """
+    try:
+        import resource
+    except ImportError:
+        resource = None
+
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    if sys.platform == "win32" and not children:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD),
+                        ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t),
+                        ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t),
+                        ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize
+    return None
+
+def to_mb(nbytes):
+    return round(nbytes / (1024 * 1024), 1) if nbytes is not None else None
+
+def count_items(result):
+    """Size of a stage result: identifiers in an index, or entries in a set/list"""
+    if result is None:
+        return None
+    if hasattr(result, "occurrences"):
+        return len(result.occurrences)
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+class Recorder:
+    """
+    Per-stage wall/CPU time, memory, file reads and time spent per category.
+    The OS only keeps a whole-process peak, so each stage records the process
+    peak so far, how much the stage raised it, and the largest worker peak.
+    """
+
+    def __init__(self):
+        self.stages = []
+        self.file_timings = []      # (seconds, category, path) across the whole run
+        self._stage = None
+
+    def begin_stage(self, name: str):
+        self._stage = {
+            "stage": name,
+            "files_read": set(),
+            "bytes_read": 0,
+            "categories": {},
+            "wall_start": time.perf_counter(),
+            "cpu_start": time.process_time(),
+            "peak_start": peak_rss_bytes(),
+        }
+
+    def end_stage(self, result):
+        stage = self._stage
+        self._stage = None
+        peak = peak_rss_bytes()
+        growth = peak - stage["peak_start"] if peak is not None and stage["peak_start"] is not None else None
+        self.stages.append({
+            "stage": stage["stage"],
+            "wall_s": round(time.perf_counter() - stage["wall_start"], 4),
+            "cpu_s": round(time.process_time() - stage["cpu_start"], 4),
+            "process_peak_so_far_mb": to_mb(peak),
+            "peak_increase_mb": to_mb(growth),
+            "worker_peak_mb": to_mb(peak_rss_bytes(children=True)) or None,
+            "files_read": len(stage["files_read"]),
+            "bytes_read": stage["bytes_read"],
+            "items": count_items(result),
+            "time_by_category_s": {k: round(v, 4) for k, v in sorted(stage["categories"].items())},
+        })
+
+    def add_read(self, path: str, nbytes: int):
+        if self._stage is not None:
+            self._stage["files_read"].add(os.path.abspath(path))
+            self._stage["bytes_read"] += nbytes
+
+    def add_time(self, category: str, seconds: float, path: str = None):
+        if self._stage is not None:
+            categories = self._stage["categories"]
+            categories[category] = categories.get(category, 0.0) + seconds
+        if path is not None:
+            self.file_timings.append((seconds, category, path))
+
+    def report(self) -> dict:
+        slowest = sorted(self.file_timings, reverse=True)[:SLOWEST_FILES]
+        return {
+            "generated": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "stages": self.stages,
+            "slowest_files": [
+                {"file": path, "category": category, "seconds": round(seconds, 4)}
+                for seconds, category, path in slowest
+            ],
+        }
+
+# ---------------------- hooks used by the stages ----------------------
+
+def active() -> bool:
+    return _current is not None
+
+def record_read(path: str, nbytes: int):
+    if _current is not None:
+        _current.add_read(path, nbytes)
+
+def record_time(category: str, seconds: float, path: str = None):
+    if _current is not None:
+        _current.add_time(category, seconds, path)
+
+@contextmanager
+def timed(category: str, path: str = None):
+    """Add the time spent in the block to category (and to the per-file list with path)"""
+    if _current is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _current.add_time(category, time.perf_counter() - start, path)
+
+# ----------------------------------------------------------------
+
+def profiled(run_stage):
+    """
+    Wrap a pipeline run_stage callable so every stage is recorded.
+    Returns (wrapped_run_stage, recorder).
+    """
+    recorder = Recorder()
+
+    def wrapper(script_name, stage_func, *args, **kwargs):
+        global _current
+        _current = recorder
+        recorder.begin_stage(script_name.removesuffix(".py"))
+        result = None
+        try:
+            result = run_stage(script_name, stage_func, *args, **kwargs)
+            return result
+        finally:
+            recorder.end_stage(result)
+            _current = None
+
+    return wrapper, recorder
+
+def write_report(recorder: Recorder, report_file: str):
+    report = recorder.report()
+    os.makedirs(os.path.dirname(os.path.abspath(report_file)), exist_ok=True)
+    with open(report_file, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+def print_report(report: dict):
+    print("\n" + "="*117)
+    # proc MB: process peak so far; +MB: how much this stage raised it; worker MB: largest pool worker peak
+    print(f"{'stage':<34}{'wall s':>9}{'cpu s':>9}{'proc MB':>9}{'+MB':>7}{'worker MB':>10}"
+          f"{'files':>7}{'read MB':>9}{'items':>8}  top category")
+    print("="*117)
+    for stage in report["stages"]:
+        categories = stage["time_by_category_s"]
+        top = max(categories.items(), key=lambda kv: kv[1]) if categories else None
+        top_text = f"{top[0]} {top[1]:.3f}s" if top else "-"
+        peak, growth, worker = (f"{stage[key]:.1f}" if stage[key] is not None else "-"
+                                for key in ("process_peak_so_far_mb", "peak_increase_mb", "worker_peak_mb"))
+        items = stage["items"] if stage["items"] is not None else "-"
+        print(f"{stage['stage']:<34}{stage['wall_s']:>9.3f}{stage['cpu_s']:>9.3f}{peak:>9}{growth:>7}{worker:>10}"
+              f"{stage['files_read']:>7}{stage['bytes_read'] / 1e6:>9.2f}{items:>8}  {top_text}")
+    print("="*117)
+    if report["slowest_files"]:
+        print("Slowest files:")
+        for entry in report["slowest_files"]:
+            print(f"  {entry['seconds']:>8.4f}s  {entry['category']:<10} {entry['file']}")
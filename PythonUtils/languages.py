@@ -0,0 +1,74 @@
+# File: PythonUtils/languages.py
+
+import os
+
+from config_utils import get_setting
+
+# ----------------------------- CONFIG -----------------------------
+# Per-language output files, with the stage defaults used when config.ini has no such key
+LANGUAGE_OUTPUTS = [
+    ("MATCHES_OUTPUT", "matched_identifiers.txt"),
+    ("MISSING_OUTPUT", "missing_identifiers.txt"),
+    ("REJECTION_LOG_FILE", "rejection_log.txt"),
+    ("MISSING_DETAILS_CSV", None),
+    ("LOCALIZATION_XML_OUTPUT", "MissingTranslations.xml"),
+    ("TRANSLATIONS_CACHE_FILE", ""),
+    ("TRANSLATIONS_SNAPSHOT_FILE", ""),
+    ("TRANSLATION_ISSUES_CSV", "translation_issues.csv"),
+]
+# ----------------------------------------------------------------
+
+def load_languages(cfg) -> list[str]:
+    """Extra languages from LANGUAGES (comma separated); empty = only LOCALIZATION_FILE"""
+    return [name.strip() for name in get_setting(cfg, "LANGUAGES", "").split(",") if name.strip()]
+
+def language_path(path: str, language: str) -> str:
+    """path with the language before the extension: MissingTranslations.Russian.xml"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{language}{ext}"
+
+def language_config(cfg, language: str) -> dict:
+    """
+    Settings for one extra language, usable wherever the stages take cfg.
+    By default the language reads <LOCALIZATION_FILE dir>/<language>.xml, checks
+    <TRANSLATIONS_DIR parent>/<language> and writes its outputs next to the usual
+    ones with the language in the name. Any KEY.<language> in config.ini
+    overrides KEY for that language, e.g. TRANSLATIONS_DIR.Russian.
+    The glossaries and the stale check belong to LOCALIZATION_FILE's language,
+    so they are off unless set for the language itself.
+    """
+    values = {key.upper(): get_setting(cfg, key) for key in cfg if "." not in key}
+    values["LOCALIZATION_FILE"] = os.path.join(
+        os.path.dirname(get_setting(cfg, "LOCALIZATION_FILE")), f"{language}.xml")
+    values["TRANSLATIONS_DIR"] = os.path.join(
+        os.path.dirname(os.path.normpath(get_setting(cfg, "TRANSLATIONS_DIR"))), language)
+    values["TM_GLOSSARY_FILES"] = ""
+    values["TRANSLATION_MANIFEST_FILE"] = ""
+    for key, default in LANGUAGE_OUTPUTS:
+        path = get_setting(cfg, key, default)
+        if path:
+            values[key] = language_path(path, language)
+
+    suffix = f".{language.upper()}"
+    for key in cfg:
+        if key.upper().endswith(suffix):
+            values[key.upper()[:-len(suffix)]] = get_setting(cfg, key)
+
+    # Pairing a file with itself gives no translations, only a slower run
+    english_file = values.get("TM_ENGLISH_FILE", "")
+    if english_file and os.path.abspath(english_file) == os.path.abspath(values["LOCALIZATION_FILE"]):
+        values["TM_ENGLISH_FILE"] = ""
+    return values
+
+def missing_language_inputs(values: dict) -> list[str]:
+    """
+    The inputs of a language_config that do not exist: its LOCALIZATION_FILE, and
+    its TRANSLATIONS_DIR unless a translation snapshot stands in for it
+    """
+    missing = []
+    if not os.path.isfile(values["LOCALIZATION_FILE"]):
+        missing.append(values["LOCALIZATION_FILE"])
+    snapshot_file = values.get("TRANSLATIONS_SNAPSHOT_FILE", "")
+    if not os.path.isdir(values["TRANSLATIONS_DIR"]) and not (snapshot_file and os.path.isfile(snapshot_file)):
+        missing.append(values["TRANSLATIONS_DIR"])
+    return missing
@@ -0,0 +1,41 @@
+# File: PythonUtils/localization_keys.py
+
+import mmap
+import re
+
+import instrumentation
+
+# One pass over the raw bytes: comments and CDATA sections are consumed whole so
+# nothing inside them is reported, every other match is an element start tag.
+# Text bodies never contain a raw '<', so they are skipped without being decoded.
+ELEMENT_TOKEN = re.compile(rb'<!--.*?-->|<!\[CDATA\[.*?\]\]>|<([A-Za-z_][^\s/>]*)', re.S)
+
+def iter_element_keys(buffer):
+    """
+    Yield the name of every element start tag of the form prefix.identifier
+    (e.g. entityname.ego_redmist) in a bytes-like XML buffer, in document order.
+    """
+    for match in ELEMENT_TOKEN.finditer(buffer):
+        name = match.group(1)
+        if name and b'.' in name:
+            yield name.decode("utf-8", errors="ignore")
+
+def identifiers_in_buffer(buffer) -> set[str]:
+    """The identifier part (everything after the first dot) of each element key"""
+    identifiers = set()
+    for key in iter_element_keys(buffer):
+        ident = key.split('.', 1)[1]
+        if ident:
+            identifiers.add(ident)
+    return identifiers
+
+def identifiers_in_file(file_path) -> set[str]:
+    """identifiers_in_buffer over a memory-mapped file"""
+    with instrumentation.timed("key_scan", str(file_path)), open(file_path, "rb") as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                instrumentation.record_read(str(file_path), len(buffer))
+                return identifiers_in_buffer(buffer)
+        except ValueError:
+            # Empty files cannot be mapped
+            return set()
@@ -0,0 +1,53 @@
+# File: PythonUtils/localization_writer.py
+
+import re
+import sys
+
+# Characters XML 1.0 cannot carry at all, not even as character references
+INVALID_XML_CHARS = re.compile(r'[^\t\n\r\x20-\uD7FF\uE000-\uFFFD\U00010000-\U0010FFFF]')
+# Good enough for localization keys (prefix.identifier); anything else cannot be a tag name
+ELEMENT_NAME = re.compile(r'^[^\W\d][\w.\-]*$')
+
+def escape_text(text: str) -> str:
+    """Escape element text the way minidom did (&, <, " and >), dropping invalid characters"""
+    if INVALID_XML_CHARS.search(text):
+        text = INVALID_XML_CHARS.sub("", text)
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace('"', "&quot;").replace(">", "&gt;")
+
+def is_valid_key(key: str) -> bool:
+    return bool(ELEMENT_NAME.match(key))
+
+def comment_text(text: str) -> str:
+    """Text that is safe inside <!-- -->: no "--", no trailing "-", no invalid characters"""
+    text = INVALID_XML_CHARS.sub("", text).replace("\n", " ")
+    while "--" in text:
+        text = text.replace("--", "- -")
+    return text + " " if text.endswith("-") else text
+
+def write_entry(f, key: str, text: str, indent: str = "  "):
+    """One <key>text</key> line"""
+    f.write(f"{indent}<{key}>{escape_text(text)}</{key}>\n")
+
+def write_overrides(output_file: str, entries, notes: dict[str, str] = None) -> int:
+    """
+    Stream (key, text) pairs to output_file as an <Overrides> document without
+    an XML declaration, one indented element per line, in the order given.
+    notes puts a <!-- note --> line above the keys it has.
+    Keys that are not valid element names are reported and skipped.
+    Returns the number of elements written.
+    """
+    written = 0
+    with open(output_file, "w", encoding="utf-8") as f:
+        for key, text in entries:
+            if not is_valid_key(key):
+                print(f"Warning: skipping '{key}', not a valid XML element name", file=sys.stderr)
+                continue
+            if not written:
+                f.write("<Overrides>\n")
+            if notes and key in notes:
+                f.write(f"  <!-- {comment_text(notes[key])} -->\n")
+            write_entry(f, key, text)
+            written += 1
+        # Same shape minidom gave an empty document
+        f.write("</Overrides>\n" if written else "<Overrides/>\n")
+    return written
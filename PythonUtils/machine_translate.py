@@ -0,0 +1,371 @@
+# File: PythonUtils/machine_translate.py
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import importlib
+import threading
+import urllib.error
+import urllib.request
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from xml.sax.saxutils import unescape
+
+from config_utils import load_config, get_setting
+from generate_localization_xml import PREFILLED_NOTE
+from localization_writer import escape_text, write_overrides
+from translation_memory import TranslationMemory, load_glossary
+
+# ----------------------------- CONFIG -----------------------------
+def load_settings(cfg=None) -> dict:
+    """Read the settings used by this stage from config.ini"""
+    cfg = cfg if cfg is not None else load_config()
+    input_file = get_setting(cfg, "LOCALIZATION_XML_OUTPUT", "MissingTranslations.xml")
+    out_dir = os.path.dirname(input_file)
+    glossaries = get_setting(cfg, "MT_GLOSSARY_FILES", get_setting(cfg, "TM_GLOSSARY_FILES", ""))
+    return {
+        "MT_BACKEND": get_setting(cfg, "MT_BACKEND", ""),  # empty = stage disabled
+        "MT_INPUT_FILE": input_file,
+        "MT_OUTPUT_FILE": get_setting(cfg, "MT_OUTPUT_FILE", os.path.join(out_dir, "MachineTranslations.xml")),
+        "MT_CHECKPOINT_FILE": get_setting(cfg, "MT_CHECKPOINT_FILE",
+                                          os.path.join(out_dir, "machine_translation_checkpoint.jsonl")),
+        "MT_PROMPT_FILE": get_setting(cfg, "MT_PROMPT_FILE", ""),
+        "MT_GLOSSARY_FILES": [p.strip() for p in glossaries.split(",") if p.strip()],
+        "MT_BATCH_CHARS": int(get_setting(cfg, "MT_BATCH_CHARS", str(DEFAULT_BATCH_CHARS))),
+        "MT_CONCURRENCY": int(get_setting(cfg, "MT_CONCURRENCY", "4")),
+        "MT_REQUESTS_PER_MINUTE": float(get_setting(cfg, "MT_REQUESTS_PER_MINUTE", "60")),  # 0 = no limit
+        "MT_MAX_RETRIES": int(get_setting(cfg, "MT_MAX_RETRIES", "4")),
+        "MT_ENDPOINT": get_setting(cfg, "MT_ENDPOINT", "https://api.openai.com/v1/chat/completions"),
+        "MT_MODEL": get_setting(cfg, "MT_MODEL", ""),
+        "MT_API_KEY_ENV": get_setting(cfg, "MT_API_KEY_ENV", "MT_API_KEY"),  # the key itself stays out of config.ini
+        "MT_TIMEOUT_S": float(get_setting(cfg, "MT_TIMEOUT_S", "120")),
+        "MT_STUB_LATENCY_S": float(get_setting(cfg, "MT_STUB_LATENCY_S", "0")),
+    }
+
+# Characters of XML lines and glossary lines per request; roughly 3 characters per token for English
+DEFAULT_BATCH_CHARS = 6000
+BACKOFF_BASE_S = 2.0
+BACKOFF_MAX_S = 60.0
+# ----------------------------------------------------------------
+
+ENTRY = re.compile(r'<([^\s/>!?]+)>(.*?)</\1>', re.DOTALL)
+
+INSTRUCTIONS = (
+    "Translate the text inside every XML element below. Reply with the same elements, "
+    "one per line, in the same order and with the same tag names, and nothing else. "
+    "Keep placeholders such as [name] and ‖color‖ markup unchanged."
+)
+
+class TransientError(Exception):
+    """A failure worth retrying (rate limit, server error, timeout); retry_after in seconds if known"""
+
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+# ---------------------- backends ----------------------
+
+class StubBackend:
+    """
+    Offline backend for testing the stage: answers every element with its own
+    text marked [MT], after MT_STUB_LATENCY_S seconds as a stand-in for a real call.
+    """
+
+    def __init__(self, settings: dict):
+        self.latency = settings["MT_STUB_LATENCY_S"]
+
+    def complete(self, system: str, user: str) -> str:
+        time.sleep(self.latency)
+        return "\n".join(f"<{key}>[MT] {text}</{key}>" for key, text in ENTRY.findall(user))
+
+class ChatCompletionsBackend:
+    """Any OpenAI-compatible /chat/completions endpoint (MT_ENDPOINT, MT_MODEL, key in $MT_API_KEY_ENV)"""
+
+    def __init__(self, settings: dict):
+        self.endpoint = settings["MT_ENDPOINT"]
+        self.model = settings["MT_MODEL"]
+        self.timeout = settings["MT_TIMEOUT_S"]
+        self.api_key = os.environ.get(settings["MT_API_KEY_ENV"], "")
+        if not self.model:
+            raise ValueError("MT_MODEL is not set")
+
+    def complete(self, system: str, user: str) -> str:
+        body = json.dumps({
+            "model": self.model,
+            "temperature": 0,
+            "messages": [{"role": "system", "content": system}, {"role": "user", "content": user}],
+        }).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        request = urllib.request.Request(self.endpoint, data=body, headers=headers, method="POST")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                data = json.load(response)
+        except urllib.error.HTTPError as e:
+            if e.code == 429 or e.code >= 500:
+                retry_after = e.headers.get("Retry-After")
+                raise TransientError(f"HTTP {e.code}",
+                                     float(retry_after) if retry_after and retry_after.isdigit() else None)
+            raise
+        except (urllib.error.URLError, TimeoutError) as e:
+            raise TransientError(str(e))
+        return data["choices"][0]["message"]["content"]
+
+# MT_BACKEND names; anything else is read as "module:Class" with the same interface
+BACKENDS = {
+    "stub": StubBackend,
+    "chat": ChatCompletionsBackend,
+}
+
+def create_backend(settings: dict):
+    name = settings["MT_BACKEND"]
+    if name in BACKENDS:
+        return BACKENDS[name](settings)
+    module_name, _, class_name = name.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown MT_BACKEND '{name}', expected one of {', '.join(BACKENDS)} or module:Class")
+    return getattr(importlib.import_module(module_name), class_name)(settings)
+
+# ---------------------- batching ----------------------
+
+class RateLimiter:
+    """Spaces request starts at least 60/per_minute seconds apart across all worker threads"""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def read_entries(input_file: str) -> list[tuple[str, str, str]]:
+    """(key, text, note) of every element of an <Overrides> file; note is the comment just above it"""
+    parser = ET.XMLParser(target=ET.TreeBuilder(insert_comments=True))
+    try:
+        root = ET.parse(input_file, parser).getroot()
+    except (OSError, ET.ParseError) as e:
+        print(f"Error reading {input_file}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    entries = []
+    note = ""
+    for child in root:
+        if child.tag is ET.Comment:
+            note = (child.text or "").strip()
+            continue
+        entries.append((child.tag, (child.text or "").strip(), note))
+        note = ""
+    return entries
+
+def source_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+def make_batches(entries: list[tuple[str, str]], memory: TranslationMemory, budget: int) -> list[dict]:
+    """
+    Split (key, English) pairs into batches of about budget characters, counting
+    the XML lines and the glossary lines for the terms they contain.
+    Every batch holds at least one entry, even one longer than the budget.
+    """
+    batches = []
+    lines, glossary, size = [], {}, 0
+    for key, text in entries:
+        line = f"<{key}>{escape_text(text)}</{key}>"
+        terms = {term: f"{term}： {target}" for term, target in memory.glossary_terms(text) if term not in glossary}
+        cost = len(line) + sum(len(term_line) + 1 for term_line in terms.values()) + 1
+        if lines and size + cost > budget:
+            batches.append({"entries": lines, "glossary": list(glossary.values())})
+            lines, glossary, size = [], {}, 0
+            terms = {term: f"{term}： {target}" for term, target in memory.glossary_terms(text)}
+            cost = len(line) + sum(len(term_line) + 1 for term_line in terms.values()) + 1
+        lines.append((key, text, line))
+        glossary.update(terms)
+        size += cost
+    if lines:
+        batches.append({"entries": lines, "glossary": list(glossary.values())})
+    return batches
+
+def batch_message(batch: dict) -> str:
+    parts = []
+    if batch["glossary"]:
+        parts.append("Glossary (always use these translations):\n" + "\n".join(batch["glossary"]))
+    parts.append(INSTRUCTIONS)
+    parts.append("\n".join(line for _, _, line in batch["entries"]))
+    return "\n\n".join(parts)
+
+def parse_reply(reply: str, keys: set[str]) -> dict[str, str]:
+    """{key: text} for the requested keys found in a reply; code fences and chatter are ignored"""
+    found = {}
+    for key, text in ENTRY.findall(reply):
+        text = unescape(text.strip(), {"&quot;": '"', "&apos;": "'"})
+        if key in keys and text and key not in found:
+            found[key] = text
+    return found
+
+def translate_batch(backend, system: str, batch: dict, limiter: RateLimiter, max_retries: int):
+    """
+    Send one batch, retrying transient failures and incomplete replies with
+    exponential backoff. Returns (translations, error); a reply that still misses
+    keys after the last retry keeps what it has, the rest stays for the next run.
+    """
+    keys = {key for key, _, _ in batch["entries"]}
+    user = batch_message(batch)
+    found = {}
+    error = None
+    for attempt in range(max_retries + 1):
+        if attempt:
+            time.sleep(min(BACKOFF_MAX_S, delay) + random.uniform(0, 1))
+        limiter.acquire()
+        try:
+            found.update(parse_reply(backend.complete(system, user), keys - found.keys()))
+        except TransientError as e:
+            error = str(e)
+            delay = e.retry_after or BACKOFF_BASE_S * 2 ** attempt
+            continue
+        except Exception as e:
+            return found, f"{type(e).__name__}: {e}"
+        if found.keys() == keys:
+            return found, None
+        error = f"reply missed {len(keys - found.keys())} of {len(keys)} keys"
+        delay = BACKOFF_BASE_S * 2 ** attempt
+    return found, error
+
+# ---------------------- checkpoint ----------------------
+
+def load_checkpoint(checkpoint_file: str) -> dict[str, tuple[str, str]]:
+    """{key: (source hash, translation)} of finished entries; a torn last line is ignored"""
+    done = {}
+    if not os.path.exists(checkpoint_file):
+        return done
+    with open(checkpoint_file, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                done[record["key"]] = (record["source"], record["text"])
+            except (ValueError, KeyError, TypeError):
+                continue
+    return done
+
+def append_checkpoint(f, translations: dict[str, str], sources: dict[str, str]):
+    for key, text in translations.items():
+        f.write(json.dumps({"key": key, "source": source_hash(sources[key]), "text": text}, ensure_ascii=False) + "\n")
+    f.flush()
+
+# ---------------------- stage ----------------------
+
+def run(settings: dict, restart: bool = False) -> dict:
+    """
+    Stage 8: machine-translate MT_INPUT_FILE (MissingTranslations.xml) into
+    MT_OUTPUT_FILE, ready for merge_translations.py.
+    Entries the translation memory already prefilled are kept as they are.
+    The rest go out in MT_BATCH_CHARS-sized batches, MT_CONCURRENCY at a time,
+    through the MT_BACKEND backend. Every finished batch is appended to
+    MT_CHECKPOINT_FILE, so an interrupted run resumes where it stopped;
+    restart=True starts from scratch. Without MT_BACKEND the stage does nothing.
+    """
+    if not settings["MT_BACKEND"]:
+        print("MT_BACKEND not set; skipping machine translation.")
+        return {}
+    try:
+        backend = create_backend(settings)
+    except (ValueError, ImportError, AttributeError) as e:
+        print(f"Error: cannot create the MT_BACKEND backend: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    entries = read_entries(settings["MT_INPUT_FILE"])
+    sources = {key: text for key, text, _ in entries}
+    checkpoint_file = settings["MT_CHECKPOINT_FILE"]
+    if restart and os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+    done = {key: text for key, (digest, text) in load_checkpoint(checkpoint_file).items()
+            if key in sources and digest == source_hash(sources[key])}
+
+    prefilled = {key for key, _, note in entries if PREFILLED_NOTE.match(note)}
+    todo = [(key, text) for key, text, _ in entries if key not in prefilled and key not in done and text]
+
+    system = ""
+    if settings["MT_PROMPT_FILE"]:
+        with open(settings["MT_PROMPT_FILE"], "r", encoding="utf-8-sig") as f:
+            system = f.read().strip()
+    memory = TranslationMemory(glossary=load_glossary(settings["MT_GLOSSARY_FILES"]))
+    batches = make_batches(todo, memory, settings["MT_BATCH_CHARS"])
+    print(f"{len(entries)} entries: {len(prefilled)} prefilled, {len(done)} from the checkpoint, "
+          f"{len(todo)} to translate in {len(batches)} batches")
+
+    limiter = RateLimiter(settings["MT_REQUESTS_PER_MINUTE"])
+    failed = 0
+    start = time.perf_counter()
+    os.makedirs(os.path.dirname(os.path.abspath(checkpoint_file)), exist_ok=True)
+    # Workers only talk to the backend; results are recorded here, so the checkpoint has one writer
+    with open(checkpoint_file, "a", encoding="utf-8") as checkpoint, \
+            ThreadPoolExecutor(max_workers=max(1, settings["MT_CONCURRENCY"])) as executor:
+        futures = [executor.submit(translate_batch, backend, system, batch, limiter, settings["MT_MAX_RETRIES"])
+                   for batch in batches]
+        try:
+            for n, future in enumerate(as_completed(futures), 1):
+                translations, error = future.result()
+                append_checkpoint(checkpoint, translations, sources)
+                done.update(translations)
+                if error:
+                    failed += 1
+                    print(f"Warning: batch incomplete after retries ({error})", file=sys.stderr)
+                print(f"  [{n}/{len(batches)}] {len(done)} translated", file=sys.stderr)
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            print("\nInterrupted; finished batches are in the checkpoint, run again to resume.", file=sys.stderr)
+            raise
+
+    output = []
+    notes = {}
+    for key, text, note in entries:
+        if key in prefilled:
+            output.append((key, text))
+            notes[key] = note
+        elif key in done:
+            output.append((key, done[key]))
+            notes[key] = f"MT | EN: {text}"
+    write_overrides(settings["MT_OUTPUT_FILE"], output, notes)
+
+    missing = len(entries) - len(output)
+    print("\n" + "="*60)
+    print(f"Entries in {os.path.basename(settings['MT_INPUT_FILE'])}: {len(entries)}")
+    print(f"→ Prefilled by translation memory:  {len(prefilled)}")
+    print(f"→ Machine translated:               {len(output) - len(prefilled)}")
+    print(f"→ Still untranslated:               {missing}")
+    print(f"Batches sent: {len(batches)} ({failed} incomplete) in {time.perf_counter() - start:.1f}s")
+    print("="*60)
+    print(f"\nMachine translations saved to: {settings['MT_OUTPUT_FILE']}")
+    if missing:
+        print("Run again to retry the untranslated entries.")
+    return {"translated": len(output), "missing": missing, "batches": len(batches), "failed": failed}
+
+def main():
+    parser = argparse.ArgumentParser(description="Machine-translate MissingTranslations.xml in concurrent batches.")
+    parser.add_argument("--backend", help="override MT_BACKEND (stub, chat or module:Class)")
+    parser.add_argument("--concurrency", type=int, help="override MT_CONCURRENCY")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and translate everything again")
+    args = parser.parse_args()
+
+    settings = load_settings()
+    if args.backend:
+        settings["MT_BACKEND"] = args.backend
+    if args.concurrency:
+        settings["MT_CONCURRENCY"] = args.concurrency
+    run(settings, restart=args.restart)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+# File: PythonUtils/merge_translations.py
+
+import os
+import re
+import csv
+import sys
+import shutil
+import argparse
+import tempfile
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import unescape
+
+from config_utils import load_config, get_setting
+from find_missing_details import FIELDNAMES, DetailRow
+from generate_localization_xml import iter_entries
+from localization_writer import comment_text, escape_text, is_valid_key
+from translation_memory import read_localization_texts
+
+# ----------------------------- CONFIG -----------------------------
+def load_settings(cfg=None) -> dict:
+    """Read the settings used by this stage from config.ini"""
+    cfg = cfg if cfg is not None else load_config()
+    return {
+        "LOCALIZATION_FILE": get_setting(cfg, "LOCALIZATION_FILE"),
+        # The translator's copy of MissingTranslations.xml, returned in place by default
+        "TRANSLATED_XML_INPUT": get_setting(cfg, "TRANSLATED_XML_INPUT",
+                                            get_setting(cfg, "LOCALIZATION_XML_OUTPUT", "MissingTranslations.xml")),
+        # English sources: entries still carrying their English text are not merged
+        "MISSING_DETAILS_CSV": get_setting(cfg, "MISSING_DETAILS_CSV", ""),
+        "TM_ENGLISH_FILE": get_setting(cfg, "TM_ENGLISH_FILE", ""),
+    }
+# ----------------------------------------------------------------
+
+DEFAULT_INDENT = "    "
+
+# <key>text</key> on a single line; text bodies never contain a raw '<'
+ENTRY_LINE = re.compile(r'^(\s*)<([^\s/>!?]+)>([^<]*)</\2>(\s*)$')
+# Any other element starting a line (multi-line text, attributes, <key/>): indexed, never rewritten
+ELEMENT_START = re.compile(r'^\s*<([^\s/>!?]+)')
+COMMENT_MARK = re.compile(r'<!--|-->')
+CLOSING_TAG = "</infotexts>"
+# English kept in the note above a prefilled or machine-translated entry: "TM 95% | EN: ..." / "MT | EN: ..."
+ENGLISH_NOTE = re.compile(r'(?:^|\| )EN: (.*?)(?: \| (?:TM|Glossary): |$)')
+
+def load_translated_entries(input_file: str) -> tuple[dict[str, tuple[str, str]], dict[str, str]]:
+    """
+    Keys and texts of the translated file (any root element, one child per key).
+    Returns {lowercase key: (key, text)} in document order, later duplicates
+    winning, and {lowercase key: English} from the "EN:" notes above entries.
+    """
+    try:
+        parser = ET.XMLParser(target=ET.TreeBuilder(insert_comments=True))
+        root = ET.parse(input_file, parser).getroot()
+    except (OSError, ET.ParseError) as e:
+        print(f"Error reading {input_file}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    entries = {}
+    noted = {}
+    note = None
+    for child in root:
+        key = child.tag
+        if key is ET.Comment:
+            note = ENGLISH_NOTE.search((child.text or "").strip())
+            continue
+        english, note = note, None
+        if not isinstance(key, str) or not is_valid_key(key):
+            continue  # Processing instructions
+        if english:
+            noted[key.lower()] = english.group(1)
+        if len(child):
+            print(f"Warning: skipping <{key}>, nested elements are not supported", file=sys.stderr)
+            continue
+        text = (child.text or "").strip()
+        if not text:
+            continue  # Left empty by the translator
+        if key.lower() in entries:
+            print(f"Warning: <{key}> appears more than once in {input_file}; keeping the last one", file=sys.stderr)
+        entries[key.lower()] = (key, text)
+    return entries, noted
+
+def load_english_texts(settings: dict) -> dict[str, str]:
+    """
+    {lowercase key: English text} from MISSING_DETAILS_CSV and TM_ENGLISH_FILE,
+    whichever exist; the mod's English.xml wins where both have a key
+    """
+    english = {}
+    csv_file = settings["MISSING_DETAILS_CSV"]
+    if csv_file and os.path.isfile(csv_file):
+        with open(csv_file, "r", encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f)
+            if set(FIELDNAMES).issubset(reader.fieldnames or []):
+                rows = [DetailRow(*(row[field] for field in FIELDNAMES)) for row in reader]
+                english.update((key.lower(), text) for key, text in iter_entries(rows))
+    english_file = settings["TM_ENGLISH_FILE"]
+    if english_file and os.path.isfile(english_file):
+        try:
+            english.update(read_localization_texts(english_file))
+        except ET.ParseError as e:
+            print(f"Warning: cannot read {english_file}: {e}", file=sys.stderr)
+    return english
+
+def drop_untranslated(entries: dict[str, tuple[str, str]], english: dict[str, str],
+                      noted: dict[str, str]) -> list[str]:
+    """
+    Remove the entries whose text is still their English source (a key of
+    MissingTranslations.xml nobody translated) and return their keys
+    """
+    untranslated = []
+    for lowered, (key, text) in list(entries.items()):
+        # Notes went through comment_text, so compare the text in that form
+        if text == english.get(lowered) or (lowered in noted and comment_text(text) == noted[lowered]):
+            untranslated.append(key)
+            del entries[lowered]
+    return untranslated
+
+def update_comment_state(line: str, in_comment: bool) -> bool:
+    """Whether a comment is still open after line"""
+    for mark in COMMENT_MARK.findall(line):
+        in_comment = mark == "<!--"
+    return in_comment
+
+def merge_lines(lines, entries: dict[str, tuple[str, str]], update_existing: bool, stats: dict,
+                comment: str = None):
+    """
+    Yield the lines of the merged localization file, counting into stats
+    (added, updated, unchanged, kept).
+    Existing lines are passed through untouched except for updated entries;
+    keys not found in the file are appended before </infotexts>.
+    Every line is looked at once and every key lookup is a dict hit, so the
+    merge stays linear in the size of both files.
+    """
+    seen = set()
+    in_comment = False
+    indent = DEFAULT_INDENT
+    newline = None
+    closed = False
+
+    def appended():
+        new_keys = [entry for key, entry in entries.items() if key not in seen]
+        if new_keys and comment:
+            yield f"{indent}<!-- {comment} -->{newline}"
+        for key, text in new_keys:
+            stats["added"] += 1
+            yield f"{indent}<{key}>{escape_text(text)}</{key}>{newline}"
+
+    for line in lines:
+        if newline is None:
+            newline = "\r\n" if line.endswith("\r\n") else "\n"
+
+        if not in_comment and not closed:
+            match = ENTRY_LINE.match(line)
+            if match:
+                lead, key, old_text, trail = match.groups()
+                indent = lead or indent
+                lowered = key.lower()
+                seen.add(lowered)
+                if lowered in entries:
+                    new_text = entries[lowered][1]
+                    if unescape(old_text, {"&quot;": '"', "&apos;": "'"}) == new_text:
+                        stats["unchanged"] += 1
+                    elif update_existing:
+                        stats["updated"] += 1
+                        line = f"{lead}<{key}>{escape_text(new_text)}</{key}>{trail}"
+                    else:
+                        stats["kept"] += 1
+                yield line
+                continue
+
+            close_at = line.find(CLOSING_TAG)
+            if close_at != -1 and "<!--" not in line[:close_at]:
+                closed = True
+                before = line[:close_at]
+                if before.strip():
+                    yield before.rstrip() + newline
+                yield from appended()
+                yield line[close_at:] if before.strip() else line
+                continue
+
+            start = ELEMENT_START.match(line)
+            if start:
+                seen.add(start.group(1).lower())
+                if start.group(1).lower() in entries:
+                    stats["kept"] += 1  # Not a single-line entry; left for a manual edit
+
+        in_comment = update_comment_state(line, in_comment)
+        yield line
+
+    if not closed:
+        print(f"Error: no {CLOSING_TAG} found; nothing was appended", file=sys.stderr)
+        sys.exit(1)
+
+def merge_file(target_file: str, entries: dict[str, tuple[str, str]], update_existing: bool = False,
+               output_file: str = None, comment: str = None, dry_run: bool = False) -> dict:
+    """
+    Stream target_file through merge_lines into output_file (target_file by default).
+    The result goes to a temporary file next to the output first and replaces it
+    only once complete, so an interrupted merge never leaves a truncated file.
+    """
+    stats = {"added": 0, "updated": 0, "unchanged": 0, "kept": 0}
+    output_file = output_file or target_file
+    out_dir = os.path.dirname(os.path.abspath(output_file))
+    fd, tmp_path = tempfile.mkstemp(prefix=".merge_", suffix=".xml", dir=out_dir)
+    try:
+        # newline="" keeps the file's own line endings; utf-8-sig would drop a BOM, so read plain utf-8
+        with open(target_file, "r", encoding="utf-8", newline="") as src, \
+                os.fdopen(fd, "w", encoding="utf-8", newline="") as dst:
+            dst.writelines(merge_lines(src, entries, update_existing, stats, comment))
+        if dry_run:
+            os.remove(tmp_path)
+        else:
+            # mkstemp files are private; keep the permissions of the file being replaced
+            shutil.copymode(output_file if os.path.exists(output_file) else target_file, tmp_path)
+            os.replace(tmp_path, output_file)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return stats
+
+def run(settings: dict, input_file: str = None, update_existing: bool = False, output_file: str = None,
+        comment: str = None, dry_run: bool = False) -> dict:
+    """
+    Merge the translated entries of input_file (TRANSLATED_XML_INPUT by default)
+    into LOCALIZATION_FILE. New keys are appended; keys already present are only
+    rewritten with update_existing. Comments, the <infotexts> header and every
+    untouched line are kept byte for byte. Entries whose text is still the English
+    source (MISSING_DETAILS_CSV, TM_ENGLISH_FILE or their "EN:" note) are skipped.
+    """
+    input_file = input_file or settings["TRANSLATED_XML_INPUT"]
+    target_file = settings["LOCALIZATION_FILE"]
+    if not os.path.exists(target_file):
+        print(f"Error: Localization file not found: {target_file}", file=sys.stderr)
+        sys.exit(1)
+
+    entries, noted = load_translated_entries(input_file)
+    untranslated = drop_untranslated(entries, load_english_texts(settings), noted)
+    print(f"Loaded {len(entries)} translated entries from {input_file}")
+    if untranslated:
+        print(f"Skipped {len(untranslated)} entries still in English: {', '.join(untranslated[:10])}"
+              + (", ..." if len(untranslated) > 10 else ""))
+    stats = merge_file(target_file, entries, update_existing, output_file, comment, dry_run)
+
+    print("\n" + "="*60)
+    print(f"Added (new keys):                      {stats['added']}")
+    print(f"Updated (existing keys, new text):     {stats['updated']}")
+    print(f"Unchanged (same text already present): {stats['unchanged']}")
+    print(f"Kept (existing, not updated):          {stats['kept']}")
+    print(f"Skipped (text still in English):       {len(untranslated)}")
+    print("="*60)
+    if dry_run:
+        print("\nDry run: nothing was written.")
+    else:
+        print(f"\nMerged into: {output_file or target_file}")
+    if stats["kept"] and not update_existing:
+        print("Run with --update-existing to overwrite keys that are already translated.")
+    return stats
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Merge a translated MissingTranslations.xml into LOCALIZATION_FILE.")
+    parser.add_argument("input", nargs="?", help="translated XML (default: TRANSLATED_XML_INPUT or LOCALIZATION_XML_OUTPUT)")
+    parser.add_argument("--update-existing", action="store_true", help="also overwrite keys that already exist")
+    parser.add_argument("--output", help="write the merged file here instead of overwriting LOCALIZATION_FILE")
+    parser.add_argument("--comment", help="add <!-- COMMENT --> above the appended keys")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would change")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    run(load_settings(), args.input, args.update_existing, args.output, args.comment, args.dry_run)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+# File: PythonUtils/package_release.py
+
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import struct
+import fnmatch
+import hashlib
+import argparse
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+from config_utils import load_config, get_setting
+from content_package import (FILELIST_NAME, declared_files, filter_paths, own_package_names, package_path,
+                             parse_globs, read_filelist, resolve_case_insensitive)
+from identifier_index import resolve_jobs
+
+# ----------------------------- CONFIG -----------------------------
+def load_settings(cfg=None) -> dict:
+    """Read the settings used by the release build from config.ini"""
+    cfg = cfg if cfg is not None else load_config()
+    release_dir = get_setting(cfg, "RELEASE_DIR", "release")
+    return {
+        "SRCDIR": get_setting(cfg, "SRCDIR"),
+        "RELEASE_DIR": release_dir,
+        "RELEASE_BLOB_DIR": get_setting(cfg, "RELEASE_BLOB_DIR", os.path.join(release_dir, "blobs")),
+        # Shipped although nothing references them (the workshop preview image)
+        "RELEASE_INCLUDE_GLOBS": parse_globs(get_setting(cfg, "RELEASE_INCLUDE_GLOBS", "thumbnail.png")),
+        "RELEASE_EXCLUDE_GLOBS": parse_globs(get_setting(cfg, "RELEASE_EXCLUDE_GLOBS", "")),
+        "RELEASE_COMPRESSION_LEVEL": int(get_setting(cfg, "RELEASE_COMPRESSION_LEVEL", "9")),
+        "RELEASE_JOBS": resolve_jobs(get_setting(cfg, "RELEASE_JOBS", "0")),  # 0 = one per CPU
+    }
+
+# Deflate has to save at least this much, otherwise the file is stored (.png and .ogg are compressed already)
+MIN_DEFLATE_SAVING = 0.02
+# ----------------------------------------------------------------
+
+# Any %ModDir%/... path inside an XML file: textures, sounds, included XML files
+MOD_DIR_REFERENCE = re.compile(r'%ModDir(?::[^%]*)?%[/\\]?[^"\'<>|\r\n]*', re.IGNORECASE)
+# Game-side substitutions such as Human_[GENDER].png; every matching file is shipped
+PATH_TOKEN = re.compile(r'\[[^\]/]+\]')
+# Character files name the folders their ragdoll and animation XML files are loaded from;
+# "default" is the Ragdolls/Animations folder next to the character file
+FOLDER_REFERENCE = re.compile(r'<(ragdolls|animations)\b[^>]*?\bfolder\s*=\s*(["\'])(.*?)\2', re.IGNORECASE)
+
+STORED, DEFLATED = 0, 8
+# Fixed entry metadata, so the archive only depends on the file contents
+ZIP_DOS_TIME, ZIP_DOS_DATE = 0, (0 << 9) | (1 << 5) | 1  # 1980-01-01 00:00
+ZIP_VERSION = 20
+ZIP_FLAGS = 0x0800  # names are UTF-8
+ZIP_FILE_ATTRS = 0o100644 << 16
+
+def resolve_reference(src_dir: str, rel_path: str) -> list[str]:
+    """Files under src_dir a reference resolves to (case-insensitively); [TOKEN] parts match anything"""
+    if not PATH_TOKEN.search(rel_path):
+        file_path = resolve_case_insensitive(src_dir, rel_path)
+        return [file_path] if file_path else []
+    folder, name = os.path.split(rel_path)
+    folder_path = os.path.join(src_dir, folder)
+    if not os.path.isdir(folder_path):
+        return []
+    pattern = PATH_TOKEN.sub("*", name).lower()
+    return [os.path.join(folder_path, entry) for entry in sorted(os.listdir(folder_path))
+            if fnmatch.fnmatchcase(entry.lower(), pattern) and os.path.isfile(os.path.join(folder_path, entry))]
+
+def folder_files(src_dir: str, rel_folder: str) -> list[str]:
+    """Files directly inside a folder under src_dir (case-insensitively), or None without the folder"""
+    folder_path = resolve_case_insensitive(src_dir, rel_folder.rstrip("/"), folder=True)
+    if folder_path is None:
+        return None
+    return [os.path.join(folder_path, entry) for entry in sorted(os.listdir(folder_path))
+            if os.path.isfile(os.path.join(folder_path, entry))]
+
+def collect_release_files(src_dir: str, include: list[str] = None, exclude: list[str] = None):
+    """
+    Relative paths of everything the game loads from this package: filelist.xml,
+    the files it declares and, following every XML file, the assets and XML files
+    they reference with %ModDir%, every file of the ragdoll and animation folders
+    of character files, plus the include globs.
+    A %ModDir% reference to any other folder cannot be shipped file by file, so
+    it is reported and the build stops rather than leaving those files out.
+    Returns (sorted /-separated paths, references to files that do not exist).
+    """
+    attrs, _ = read_filelist(os.path.join(src_dir, FILELIST_NAME))
+    own_names = own_package_names(attrs)
+    found = {}
+    missing = set()
+    folder_references = []
+    queue = []
+
+    def add(file_path):
+        rel_path = os.path.relpath(file_path, src_dir).replace(os.sep, "/")
+        if rel_path not in found:
+            found[rel_path] = file_path
+            queue.append(file_path)
+
+    add(os.path.join(src_dir, FILELIST_NAME))
+    for file_path, _ in declared_files(src_dir):
+        add(file_path)
+    while queue:
+        file_path = queue.pop()
+        if not file_path.lower().endswith(".xml"):
+            continue
+        with open(file_path, "r", encoding="utf-8-sig", errors="replace") as f:
+            text = f.read()
+        file_dir = os.path.dirname(os.path.relpath(file_path, src_dir)).replace(os.sep, "/")
+
+        folders = set()
+        for tag, _, value in FOLDER_REFERENCE.findall(text):
+            value = value.strip()
+            folders.add(value)
+            if value.lower() in ("", "default"):
+                rel_folder = f"{file_dir}/{tag.capitalize()}" if file_dir else tag.capitalize()
+            else:
+                rel_folder = package_path(value, own_names)
+                if not rel_folder:
+                    continue
+            files = folder_files(src_dir, rel_folder)
+            if files is None:
+                missing.add(rel_folder.rstrip("/") + "/")
+            for match in files or ():
+                add(match)
+
+        for reference in set(MOD_DIR_REFERENCE.findall(text)):
+            if reference.strip() in folders:
+                continue
+            rel_path = package_path(reference.strip(), own_names)
+            if not rel_path:
+                continue
+            matches = resolve_reference(src_dir, rel_path)
+            if not matches:
+                if resolve_case_insensitive(src_dir, rel_path.rstrip("/"), folder=True):
+                    folder_references.append((os.path.relpath(file_path, src_dir), reference.strip()))
+                else:
+                    missing.add(rel_path)
+            for match in matches:
+                add(match)
+
+    if folder_references:
+        for file, reference in sorted(folder_references):
+            print(f"Error: {file} references the folder {reference}; "
+                  "only ragdoll and animation folders are shipped whole", file=sys.stderr)
+        sys.exit(1)
+
+    for root_dir, dirs, files in os.walk(src_dir):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for file in files:
+            file_path = os.path.join(root_dir, file)
+            rel_path = os.path.relpath(file_path, src_dir).replace(os.sep, "/")
+            if include and rel_path not in found and filter_paths([(file_path, rel_path)], include):
+                found[rel_path] = file_path
+
+    paths = [rel for _, rel in filter_paths([(None, rel) for rel in sorted(found)], None, exclude)]
+    return paths, sorted(missing)
+
+# ---------------------- content-addressed blobs ----------------------
+
+def hash_file(file_path: str) -> tuple[str, int, int]:
+    """(blake2b hex digest, crc32, size) of a file"""
+    with open(file_path, "rb") as f:
+        data = f.read()
+    return hashlib.blake2b(data, digest_size=16).hexdigest(), zlib.crc32(data), len(data)
+
+def blob_path(blob_dir: str, digest: str, level: int) -> str:
+    return os.path.join(blob_dir, digest[:2], f"{digest}.{level}")
+
+def compress_blob(file_path: str, target: str, level: int):
+    """
+    Raw-deflate a file into the blob store: one method byte, then the entry data.
+    zlib releases the GIL, so blobs compress in parallel on threads.
+    """
+    with open(file_path, "rb") as f:
+        data = f.read()
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    deflated = compressor.compress(data) + compressor.flush()
+    method, payload = (DEFLATED, deflated) if len(deflated) < len(data) * (1 - MIN_DEFLATE_SAVING) else (STORED, data)
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp_file = f"{target}.{os.getpid()}.tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(bytes([method]))
+        f.write(payload)
+    os.replace(tmp_file, target)
+
+# ---------------------- archive ----------------------
+
+def write_zip(archive_file: str, entries: list[tuple[str, str, int, int]]) -> str:
+    """
+    Write (name, blob file, crc32, size) entries, in the order given, as a zip
+    whose bytes depend on nothing but the entries: fixed timestamps and
+    attributes, no extra fields. The compressed data is copied from the blobs,
+    so nothing is compressed here. Returns the archive's SHA-256.
+    """
+    if len(entries) > 0xFFFF:
+        raise ValueError("more than 65535 files need zip64, which is not supported")
+    tmp_file = archive_file + ".tmp"
+    central = []
+    digest = hashlib.sha256()
+    offset = 0
+    with open(tmp_file, "wb") as f:
+        def emit(data: bytes):
+            nonlocal offset
+            f.write(data)
+            digest.update(data)
+            offset += len(data)
+
+        for name, blob_file, crc, size in entries:
+            with open(blob_file, "rb") as blob:
+                method = blob.read(1)[0]
+                payload = blob.read()
+            encoded = name.encode("utf-8")
+            header_offset = offset
+            emit(struct.pack("<IHHHHHIIIHH", 0x04034B50, ZIP_VERSION, ZIP_FLAGS, method, ZIP_DOS_TIME,
+                             ZIP_DOS_DATE, crc, len(payload), size, len(encoded), 0) + encoded)
+            emit(payload)
+            central.append(struct.pack("<IHHHHHHIIIHHHHHII", 0x02014B50, (3 << 8) | ZIP_VERSION, ZIP_VERSION,
+                                       ZIP_FLAGS, method, ZIP_DOS_TIME, ZIP_DOS_DATE, crc, len(payload), size,
+                                       len(encoded), 0, 0, 0, 0, ZIP_FILE_ATTRS, header_offset) + encoded)
+            if offset > 0xFFFFFFFF:
+                raise ValueError("archive larger than 4 GiB needs zip64, which is not supported")
+
+        central_offset = offset
+        for record in central:
+            emit(record)
+        emit(struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, len(entries), len(entries),
+                         offset - central_offset, central_offset, 0))
+    os.replace(tmp_file, archive_file)
+    return digest.hexdigest()
+
+# ---------------------- build ----------------------
+
+def run(settings: dict, prune: bool = False) -> dict:
+    """
+    Build <name>-<modversion>.zip and its manifest in RELEASE_DIR from SRCDIR.
+    Every file is hashed; each distinct content is compressed once, in parallel,
+    into RELEASE_BLOB_DIR and reused by later builds, so a rebuild after a text
+    change only compresses the changed files. prune deletes the blobs this
+    build did not use.
+    """
+    start = time.perf_counter()
+    src_dir = settings["SRCDIR"]
+    try:
+        attrs, _ = read_filelist(os.path.join(src_dir, FILELIST_NAME))
+    except (OSError, ET.ParseError) as e:
+        print(f"Error reading {FILELIST_NAME}: {e}", file=sys.stderr)
+        sys.exit(1)
+    name = attrs.get("name", "mod")
+    version = attrs.get("modversion", "0")
+
+    paths, missing = collect_release_files(src_dir, settings["RELEASE_INCLUDE_GLOBS"], settings["RELEASE_EXCLUDE_GLOBS"])
+    for rel_path in missing:
+        print(f"Warning: referenced file not found: {rel_path}", file=sys.stderr)
+
+    jobs = settings["RELEASE_JOBS"]
+    level = settings["RELEASE_COMPRESSION_LEVEL"]
+    blob_dir = settings["RELEASE_BLOB_DIR"]
+    file_paths = [os.path.join(src_dir, rel_path) for rel_path in paths]
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        hashes = list(executor.map(hash_file, file_paths))
+
+        # One blob per distinct content, compressed only if no earlier build made it
+        first_path = {}
+        for file_path, (digest, _, _) in zip(file_paths, hashes):
+            first_path.setdefault(digest, file_path)
+        to_compress = [(file_path, blob_path(blob_dir, digest, level)) for digest, file_path in first_path.items()
+                       if not os.path.exists(blob_path(blob_dir, digest, level))]
+        list(executor.map(lambda task: compress_blob(*task, level), to_compress))
+
+    os.makedirs(settings["RELEASE_DIR"], exist_ok=True)
+    base_name = f"{name}-{version}"
+    archive_file = os.path.join(settings["RELEASE_DIR"], base_name + ".zip")
+    # Entries live under the package folder, as the game expects in LocalMods
+    entries = [(f"{name}/{rel_path}", blob_path(blob_dir, digest, level), crc, size)
+               for rel_path, (digest, crc, size) in zip(paths, hashes)]
+    archive_sha256 = write_zip(archive_file, entries)
+
+    manifest = {
+        "name": name,
+        "modversion": version,
+        "gameversion": attrs.get("gameversion", ""),
+        "archive": os.path.basename(archive_file),
+        "archive_sha256": archive_sha256,
+        "files": {rel_path: {"blake2b": digest, "size": size} for rel_path, (digest, _, size) in zip(paths, hashes)},
+    }
+    manifest_file = os.path.join(settings["RELEASE_DIR"], base_name + ".manifest.json")
+    with open(manifest_file, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+        f.write("\n")
+
+    pruned = 0
+    if prune and os.path.isdir(blob_dir):
+        used = {os.path.normcase(os.path.abspath(blob)) for _, blob, _, _ in entries}
+        for root_dir, _, files in os.walk(blob_dir):
+            for file in files:
+                blob = os.path.join(root_dir, file)
+                if os.path.normcase(os.path.abspath(blob)) not in used:
+                    os.remove(blob)
+                    pruned += 1
+
+    total_size = sum(size for _, _, size in hashes)
+    print("\n" + "="*60)
+    print(f"Files in release:        {len(paths)} ({total_size / 1e6:.1f} MB)")
+    print(f"→ Distinct contents:     {len(first_path)} ({len(paths) - len(first_path)} duplicates)")
+    print(f"→ Blobs compressed:      {len(to_compress)} (reused {len(first_path) - len(to_compress)})")
+    if prune:
+        print(f"→ Unused blobs removed:  {pruned}")
+    print(f"Archive: {os.path.getsize(archive_file) / 1e6:.1f} MB, sha256 {archive_sha256}")
+    print(f"Built in {time.perf_counter() - start:.2f}s with {jobs} threads")
+    print("="*60)
+    print(f"\nRelease archive saved to: {archive_file}")
+    print(f"Manifest saved to: {manifest_file}")
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a reproducible release archive of the mod.")
+    parser.add_argument("--jobs", type=int, help="compression threads (default RELEASE_JOBS, 0 = one per CPU)")
+    parser.add_argument("--prune", action="store_true", help="delete cached blobs this build did not use")
+    args = parser.parse_args()
+
+    settings = load_settings()
+    if args.jobs is not None:
+        settings["RELEASE_JOBS"] = resolve_jobs(args.jobs)
+    run(settings, prune=args.prune)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# File: PythonUtils/parse_cache.py
+
+import hashlib
+import io
+import os
+import pickle
+import sys
+
+import instrumentation
+
+# Bump when the cache file layout changes so old caches are discarded;
+# callers pass their own version for the shape of their cached results
+CACHE_VERSION = 1
+
+def file_digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+class ParseCache:
+    """
+    On-disk cache of per-file parse results, keyed by a path relative to root_dir.
+    A file is reused when its size and mtime are unchanged, or when they changed
+    but the content hash did not (e.g. a fresh copy from the workshop folder).
+    Files not seen during a run are evicted on save().
+    """
+
+    def __init__(self, cache_file: str, root_dir: str, version=1, label: str = "Parse cache"):
+        self.cache_file = cache_file
+        self.root_dir = os.path.abspath(root_dir)
+        self.version = (CACHE_VERSION, version)
+        self.label = label
+        self.entries = {}       # key -> (size, mtime_ns, digest, result)
+        self.seen = {}          # entries touched this run; becomes the saved cache
+        self._pending = {}      # key -> (size, mtime_ns, digest) awaiting store()
+        self.reused = 0
+        self.parsed = 0
+        self.dirty = False
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with instrumentation.timed("cache_load"), open(self.cache_file, "rb") as f:
+                data = pickle.load(f)
+            instrumentation.record_read(self.cache_file, os.path.getsize(self.cache_file))
+        except Exception as e:
+            print(f"Warning: ignoring unreadable parse cache {self.cache_file}: {e}", file=sys.stderr)
+            return
+        if data.get("version") == self.version and data.get("root_dir") == self.root_dir:
+            self.entries = data["entries"]
+
+    def lookup(self, file_path: str, key: str):
+        """
+        Return (True, result) while the cached result for file_path is still valid.
+        Otherwise return (False, data) with the file's bytes; the caller parses it
+        and hands the result to store(key, result).
+        """
+        st = os.stat(file_path)
+        entry = self.entries.get(key)
+        if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            self.seen[key] = entry
+            self.reused += 1
+            return True, entry[3]
+
+        with open(file_path, "rb") as f:
+            data = f.read()
+        instrumentation.record_read(file_path, len(data))
+        digest = file_digest(data)
+        self.dirty = True
+
+        if entry and entry[2] == digest:
+            # Touched but identical content: refresh the stats only
+            self.seen[key] = (st.st_size, st.st_mtime_ns, digest, entry[3])
+            self.reused += 1
+            return True, entry[3]
+
+        self._pending[key] = (st.st_size, st.st_mtime_ns, digest)
+        return False, data
+
+    def store(self, key: str, result):
+        """Cache the parse result for a key that lookup() reported as a miss"""
+        size, mtime_ns, digest = self._pending.pop(key)
+        self.seen[key] = (size, mtime_ns, digest, result)
+        self.parsed += 1
+
+    def get_or_parse(self, file_path: str, key: str, parse):
+        """
+        Return the cached result for file_path, or call parse(binary_file) and cache it.
+        Exceptions from parse propagate and leave the file uncached, so errors are
+        reported again on the next run.
+        """
+        hit, value = self.lookup(file_path, key)
+        if hit:
+            return value
+        result = parse(io.BytesIO(value))
+        self.store(key, result)
+        return result
+
+    def save(self):
+        """Write the cache back, dropping entries for files that no longer exist"""
+        evicted = len(self.entries.keys() - self.seen.keys())
+        print(f"{self.label}: {self.reused} reused, {self.parsed} parsed, {evicted} evicted.", file=sys.stderr)
+        if not self.dirty and not evicted:
+            return
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_file)), exist_ok=True)
+        tmp_file = self.cache_file + ".tmp"
+        with instrumentation.timed("cache_save"), open(tmp_file, "wb") as f:
+            pickle.dump({
+                "version": self.version,
+                "root_dir": self.root_dir,
+                "entries": self.seen,
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, self.cache_file)
+        self.entries = dict(self.seen)
+        self.dirty = False
@@ -0,0 +1,116 @@
+# File: PythonUtils/pipeline.py
+
+import sys
+
+import extract_identifiers
+import check_localization_coverage
+import check_trcn_translations_coverage
+import find_missing_details
+import generate_localization_xml
+import check_stale_translations
+import validate_translations
+import machine_translate
+from languages import language_config, load_languages, missing_language_inputs
+
+# Stage modules in pipeline order; main.py's SCRIPTS lists the same files
+STAGES = [
+    extract_identifiers,
+    check_localization_coverage,
+    check_trcn_translations_coverage,
+    find_missing_details,
+    generate_localization_xml,
+    check_stale_translations,
+    validate_translations,
+    machine_translate,
+]
+
+def stage_script(module) -> str:
+    return f"{module.__name__}.py"
+
+def output_path(cfg) -> str:
+    """Where MissingTranslations.xml goes; other reports are written next to it"""
+    return generate_localization_xml.load_settings(cfg)["SINGLE_XML_OUTPUT"]
+
+def call_stage(script_name: str, stage_func, *args, **kwargs):
+    """Default stage runner: just call the stage"""
+    return stage_func(*args, **kwargs)
+
+def run_pipeline(cfg, dump: bool = False, use_cache: bool = True, jobs: int = None,
+                 run_stage=call_stage) -> dict:
+    """
+    Run every stage in this interpreter, handing sets and rows from one stage
+    to the next instead of re-reading them from the intermediate files.
+    Relative paths in cfg are resolved against the current directory.
+
+    The intermediate .txt files are only written when dump is True.
+    use_cache=False ignores PARSE_CACHE_FILE/TRANSLATIONS_CACHE_FILE and reads every XML file.
+    jobs overrides the JOBS worker count from config.ini.
+    run_stage(script_name, stage_func, *args, **kwargs) wraps each stage call,
+    so callers can add headers, error handling or measurements.
+    Stages 2-5 run again for every language listed in LANGUAGES (see languages.py),
+    from the same identifier index; a language whose localization file or game
+    texts are missing is skipped with a warning.
+    Returns the result of every stage keyed by name; "languages" holds stages 2-5
+    and the placeholder check of each extra language.
+    """
+    extract_settings = extract_identifiers.load_settings(cfg)
+    if not use_cache:
+        extract_settings["PARSE_CACHE_FILE"] = ""
+    if jobs is not None:
+        extract_settings["JOBS"] = extract_identifiers.resolve_jobs(jobs)
+
+    # Stage 1 parses SRCDIR once; stage 4 answers its detail lookup from the same index
+    index = run_stage(stage_script(extract_identifiers), extract_identifiers.run,
+                      extract_settings, dump=dump)
+    visible = index.visible_identifiers()
+    results = run_language_stages(cfg, index, visible, dump, use_cache, run_stage)
+    stale = run_stage(stage_script(check_stale_translations), check_stale_translations.run,
+                      check_stale_translations.load_settings(cfg), index=index)
+    issues = run_stage(stage_script(validate_translations), validate_translations.run,
+                       validate_translations.load_settings(cfg))
+    translated = run_stage(stage_script(machine_translate), machine_translate.run,
+                           machine_translate.load_settings(cfg))
+
+    # Every extra language costs one localization file read and a set difference
+    languages = {}
+    for language in load_languages(cfg):
+        print(f"\n### Language: {language}")
+        language_cfg = language_config(cfg, language)
+        missing_inputs = missing_language_inputs(language_cfg)
+        if missing_inputs:
+            print(f"Warning: skipping {language}, not found: {', '.join(missing_inputs)}", file=sys.stderr)
+            continue
+        languages[language] = run_language_stages(language_cfg, index, visible, dump, use_cache, run_stage)
+        languages[language]["issues"] = run_stage(stage_script(validate_translations), validate_translations.run,
+                                                  validate_translations.load_settings(language_cfg))
+
+    return {
+        "index": index,
+        **results,
+        "stale": stale,
+        "issues": issues,
+        "machine_translation": translated,
+        "languages": languages,
+    }
+
+def run_language_stages(cfg, index, visible: set[str], dump: bool = False, use_cache: bool = True,
+                        run_stage=call_stage) -> dict:
+    """Stages 2-5 for the language of cfg's LOCALIZATION_FILE and TRANSLATIONS_DIR"""
+    trcn_settings = check_trcn_translations_coverage.load_settings(cfg)
+    if not use_cache:
+        trcn_settings["TRANSLATIONS_CACHE_FILE"] = ""
+
+    missing = run_stage(stage_script(check_localization_coverage), check_localization_coverage.run,
+                        check_localization_coverage.load_settings(cfg), visible, dump=dump)
+    truly_missing = run_stage(stage_script(check_trcn_translations_coverage), check_trcn_translations_coverage.run,
+                              trcn_settings, missing, dump=dump)
+    rows = run_stage(stage_script(find_missing_details), find_missing_details.run,
+                     find_missing_details.load_settings(cfg), truly_missing, dump=dump, index=index)
+    run_stage(stage_script(generate_localization_xml), generate_localization_xml.run,
+              generate_localization_xml.load_settings(cfg), rows)
+
+    return {
+        "missing": missing,
+        "truly_missing": truly_missing,
+        "rows": rows,
+    }
@@ -0,0 +1,177 @@
+# File: PythonUtils/reference_graph.py
+
+import os
+import csv
+import sys
+import argparse
+from collections import defaultdict
+
+import instrumentation
+from config_utils import load_config, get_setting
+from check_trcn_translations_coverage import load_translated_identifiers
+from identifier_index import IdentifierIndex, Reference, build_identifier_index, load_discovery_settings, resolve_jobs
+
+# ----------------------------- CONFIG -----------------------------
+def load_settings(cfg=None) -> dict:
+    """Read the settings used by the cross-reference report from config.ini"""
+    cfg = cfg if cfg is not None else load_config()
+    details_csv = get_setting(cfg, "MISSING_DETAILS_CSV")
+    translations_dir = get_setting(cfg, "TRANSLATIONS_DIR", "")
+    parse_cache = get_setting(cfg, "PARSE_CACHE_FILE", "")
+    return {
+        "SRCDIR": get_setting(cfg, "SRCDIR"),
+        # Identifiers the vanilla content defines count as defined (items, afflictions, ...);
+        # Content/ is two levels above TRANSLATIONS_DIR (Content/Texts/<Language>)
+        "GAME_CONTENT_DIR": get_setting(cfg, "GAME_CONTENT_DIR", os.path.dirname(os.path.dirname(
+            os.path.normpath(translations_dir))) if translations_dir else ""),
+        "GAME_CONTENT_CACHE_FILE": get_setting(cfg, "GAME_CONTENT_CACHE_FILE", os.path.join(
+            os.path.dirname(parse_cache), "game_content_cache.pickle") if parse_cache else ""),
+        # Without the content, the identifiers the base game's texts know are the fallback
+        "TRANSLATIONS_DIR": translations_dir,
+        "TRANSLATIONS_CACHE_FILE": get_setting(cfg, "TRANSLATIONS_CACHE_FILE", ""),
+        "TRANSLATIONS_SNAPSHOT_FILE": get_setting(cfg, "TRANSLATIONS_SNAPSHOT_FILE", ""),
+        "REFERENCE_REPORT_CSV": get_setting(cfg, "REFERENCE_REPORT_CSV",
+                                            os.path.join(os.path.dirname(details_csv), "reference_report.csv")),
+        "PARSE_CACHE_FILE": parse_cache,
+        "JOBS": resolve_jobs(get_setting(cfg, "JOBS", "1")),
+        **load_discovery_settings(cfg),
+    }
+# ----------------------------------------------------------------
+
+FIELDNAMES = ['problem', 'identifier', 'attribute', 'element_tag', 'file']
+# Problem of a dangling reference when only the base game's texts could be checked
+UNKNOWN_PROBLEM = "unknown (not in mod or base texts)"
+# The game's texts define nothing and are by far its largest XML files
+GAME_CONTENT_EXCLUDE_GLOBS = ["Texts/*"]
+
+class ReferenceGraph:
+    """
+    Definitions and uses of every identifier, split once from the index's
+    inverted reference index, so each lookup is a single dict access.
+    Identifiers are matched case-insensitively, as the game does.
+    """
+
+    def __init__(self, index: IdentifierIndex):
+        self.definitions = defaultdict(list)   # lowercase identifier -> defining Reference records
+        self.uses = defaultdict(list)          # lowercase identifier -> Reference records pointing at it
+        for target, records in index.references.items():
+            for record in records:
+                (self.definitions if record.defines else self.uses)[target].append(record)
+
+    def used_by(self, identifier: str) -> list[Reference]:
+        return self.uses.get(identifier.strip().lower(), [])
+
+    def defined_in(self, identifier: str) -> list[Reference]:
+        return self.definitions.get(identifier.strip().lower(), [])
+
+    def dangling(self, known: set[str] = frozenset()) -> dict[str, list[Reference]]:
+        """Used identifiers defined neither in the mod nor in known (lowercase)"""
+        return {target: uses for target, uses in self.uses.items()
+                if target not in self.definitions and target not in known}
+
+    def unreferenced(self) -> dict[str, list[Reference]]:
+        """Defined identifiers nothing points at, other than elements of their own file"""
+        unused = {}
+        for target, definitions in self.definitions.items():
+            files = {record.file for record in definitions}
+            if not any(use.file not in files for use in self.uses.get(target, ())):
+                unused[target] = definitions
+        return unused
+
+def game_content_identifiers(content_dir: str, cache_file: str = "", jobs: int = 1) -> set[str]:
+    """
+    Lowercase identifiers the vanilla content XMLs under content_dir define.
+    The scan goes through its own parse cache, so only the first run after a
+    game update parses the whole game.
+    """
+    index = build_identifier_index(content_dir, cache_file, jobs, "walk", None, GAME_CONTENT_EXCLUDE_GLOBS)
+    return {target for target, records in index.references.items() if any(record.defines for record in records)}
+
+def known_game_identifiers(settings: dict) -> tuple[set[str], bool]:
+    """
+    Lowercase identifiers of the base game and whether they are complete: the
+    definitions of GAME_CONTENT_DIR when it exists, otherwise only what the
+    base game's texts mention (translation snapshot or TRANSLATIONS_DIR), which
+    misses every prefab without a text of its own; empty when neither is there.
+    """
+    content_dir = settings["GAME_CONTENT_DIR"]
+    if content_dir and os.path.isdir(content_dir):
+        known = game_content_identifiers(content_dir, settings["GAME_CONTENT_CACHE_FILE"], settings["JOBS"])
+        print(f"Loaded {len(known)} identifiers defined by the base game from {content_dir}")
+        return known, True
+
+    print(f"Warning: base game content not found ({content_dir or 'GAME_CONTENT_DIR not set'}); "
+          f"references missing from the mod are reported as '{UNKNOWN_PROBLEM}'", file=sys.stderr)
+    translations_dir = settings["TRANSLATIONS_DIR"]
+    snapshot_file = settings["TRANSLATIONS_SNAPSHOT_FILE"]
+    if not (snapshot_file and os.path.isfile(snapshot_file)) and not os.path.isdir(translations_dir):
+        return set(), False
+    return {identifier.lower() for identifier in load_translated_identifiers(settings)}, False
+
+def report_rows(problem: str, records: dict[str, list[Reference]]) -> list[dict]:
+    return [{'problem': problem, 'identifier': target, 'attribute': record.attribute,
+             'element_tag': record.element_tag, 'file': record.file}
+            for target in sorted(records) for record in records[target]]
+
+def run(settings: dict, index: IdentifierIndex = None) -> ReferenceGraph:
+    """
+    List references to identifiers that are defined nowhere (dangling) and
+    definitions nothing else refers to (unreferenced) in REFERENCE_REPORT_CSV.
+    Without the base game's content, dangling references are only checked
+    against its texts and reported as UNKNOWN_PROBLEM instead.
+    index skips the scan when the caller already holds one.
+    """
+    if index is None:
+        index = build_identifier_index(settings["SRCDIR"], settings["PARSE_CACHE_FILE"], settings["JOBS"],
+                                       settings["FILE_DISCOVERY"], settings["INCLUDE_GLOBS"], settings["EXCLUDE_GLOBS"])
+    graph = ReferenceGraph(index)
+    known, complete = known_game_identifiers(settings)
+    dangling = graph.dangling(known)
+    problem = "dangling" if complete else UNKNOWN_PROBLEM
+    unreferenced = graph.unreferenced()
+
+    print("\n" + "="*60)
+    print(f"Identifiers defined:       {len(graph.definitions)}")
+    print(f"Identifiers referenced:    {len(graph.uses)} ({sum(map(len, graph.uses.values()))} references)")
+    print(f"→ Dangling references:     {len(dangling)} identifiers" + ("" if complete else " (checked against texts only)"))
+    print(f"→ Unreferenced:            {len(unreferenced)} identifiers")
+    print("="*60)
+
+    with instrumentation.timed("write"), open(settings["REFERENCE_REPORT_CSV"], "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(report_rows(problem, dangling))
+        writer.writerows(report_rows("unreferenced", unreferenced))
+    print(f"\nReference report saved to: {settings['REFERENCE_REPORT_CSV']}")
+    return graph
+
+def print_uses(graph: ReferenceGraph, identifier: str):
+    definitions = graph.defined_in(identifier)
+    uses = graph.used_by(identifier)
+    for record in definitions:
+        print(f"defined by <{record.element_tag} {record.attribute}> in {record.file}")
+    if not definitions:
+        print(f"'{identifier}' is not defined in SRCDIR.")
+    for record in uses:
+        print(f"used by <{record.element_tag} {record.attribute}> in {record.file}")
+    print(f"\n{len(uses)} references in {len({record.file for record in uses})} files")
+
+def main():
+    parser = argparse.ArgumentParser(description="Report dangling and unreferenced identifiers across the mod's XML.")
+    parser.add_argument("--uses", metavar="IDENTIFIER", nargs="+", help="only list what defines and uses these identifiers")
+    args = parser.parse_args()
+
+    settings = load_settings()
+    if args.uses:
+        index = build_identifier_index(settings["SRCDIR"], settings["PARSE_CACHE_FILE"], settings["JOBS"],
+                                       settings["FILE_DISCOVERY"], settings["INCLUDE_GLOBS"], settings["EXCLUDE_GLOBS"])
+        graph = ReferenceGraph(index)
+        for i, identifier in enumerate(args.uses):
+            if i:
+                print()
+            print_uses(graph, identifier)
+        return
+    run(settings)
+
+if __name__ == "__main__":
+    main()
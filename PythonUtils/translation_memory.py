@@ -0,0 +1,235 @@
+# File: PythonUtils/translation_memory.py
+
+import re
+import sys
+import math
+import argparse
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+
+from config_utils import load_config, get_setting
+
+# ----------------------------- CONFIG -----------------------------
+GRAM_SIZE = 3
+DEFAULT_MIN_SCORE = 0.75       # lowest score reported as a suggestion
+DEFAULT_PREFILL_SCORE = 0.9    # lowest score whose translation replaces the English text
+
+# Glossary lines look like "English： 中文", "English: 中文" or "A = B -> 中文"
+GLOSSARY_SEPARATORS = ("->", "：", ":")
+# ----------------------------------------------------------------
+
+WHITESPACE = re.compile(r'\s+')
+# Aliases written next to a term: "Glupo (Blubbering Toad)", "Blubbering Toad「Glupo」"
+ALIAS = re.compile(r'\(([^)]*)\)|「([^」]*)」')
+TRAILING_NOTE = re.compile(r'\s*[(（][^)）]*[)）]\s*$')
+
+def normalize(text: str) -> str:
+    """Case- and whitespace-insensitive form used for matching"""
+    return WHITESPACE.sub(" ", text).strip().lower()
+
+def grams(text: str) -> frozenset:
+    """Character n-grams of normalized text, padded so short strings still have some"""
+    padded = f" {text} "
+    if len(padded) <= GRAM_SIZE:
+        return frozenset([padded])
+    return frozenset(padded[i:i + GRAM_SIZE] for i in range(len(padded) - GRAM_SIZE + 1))
+
+def read_localization_texts(file_path: str) -> list[tuple[str, str]]:
+    """(lowercase key, text) of every entry of a localization XML, in document order"""
+    root = ET.parse(file_path).getroot()
+    return [(child.tag.lower(), (child.text or "").strip())
+            for child in root if isinstance(child.tag, str)]
+
+def pair_corpus(english_file: str, translated_file: str) -> list[tuple[str, str, str]]:
+    """
+    (key, English, translation) for every key present in both files.
+    Repeated keys (e.g. loadingscreentip) are paired by occurrence order.
+    Untranslated entries (same text on both sides) are left out.
+    """
+    translated = defaultdict(list)
+    for key, text in read_localization_texts(translated_file):
+        translated[key].append(text)
+
+    pairs = []
+    seen = defaultdict(int)
+    for key, english in read_localization_texts(english_file):
+        n = seen[key]
+        seen[key] += 1
+        if n >= len(translated.get(key, ())):
+            continue
+        target = translated[key][n]
+        if english and target and target != english:
+            pairs.append((key, english, target))
+    return pairs
+
+def parse_glossary_line(line: str) -> list[tuple[str, str]]:
+    """(English term, translation) pairs of one glossary line; [] for headings and notes"""
+    for separator in GLOSSARY_SEPARATORS:
+        if separator in line:
+            source, target = line.split(separator, 1)
+            break
+    else:
+        return []
+
+    target = TRAILING_NOTE.sub("", target).strip()
+    if not target:
+        return []
+
+    # "A / B： 甲 / 乙" pairs up term by term
+    sources = [s.strip() for s in source.split(" / ")]
+    targets = [t.strip() for t in target.split(" / ")]
+    if len(sources) != len(targets):
+        sources, targets = [source.strip()], [target]
+
+    pairs = []
+    for source, target in zip(sources, targets):
+        terms = []
+        for variant in source.split(" = "):
+            for match in ALIAS.finditer(variant):
+                terms.append(match.group(1) or match.group(2))
+            terms.append(ALIAS.sub("", variant))
+        pairs += [(term.strip(), target) for term in terms if term.strip() and re.search(r'[A-Za-z]', term)]
+    return pairs
+
+def load_glossary(glossary_files: list[str]) -> dict[str, tuple[str, str]]:
+    """{normalized term: (term, translation)} from every glossary file; earlier files win"""
+    glossary = {}
+    for file_path in glossary_files:
+        try:
+            with open(file_path, "r", encoding="utf-8-sig") as f:
+                for line in f:
+                    for term, target in parse_glossary_line(line.strip()):
+                        glossary.setdefault(normalize(term), (term, target))
+        except OSError as e:
+            print(f"Warning: glossary not read: {e}", file=sys.stderr)
+    return glossary
+
+class TranslationMemory:
+    """
+    Translated strings indexed by their English side.
+    Exact matches are a dict lookup; fuzzy matches use a character n-gram inverted
+    index scored with the Dice coefficient of the two n-gram sets. Only postings of
+    the rarest query n-grams are scanned (prefix filtering), which is enough to
+    find every entry that can still reach min_score, so a lookup touches a few
+    short lists instead of the whole corpus.
+    """
+
+    def __init__(self, pairs: list[tuple[str, str, str]] = (), glossary: dict = None):
+        self.sources = []          # English text per entry
+        self.targets = []          # translation per entry
+        self.entry_grams = []      # n-gram set per entry
+        self.exact = {}            # normalized English -> entry
+        self.postings = defaultdict(list)
+        self.glossary = glossary or {}
+        self.glossary_pattern = None
+        for _, english, target in pairs:
+            self.add(english, target)
+        if self.glossary:
+            terms = sorted(self.glossary, key=len, reverse=True)
+            self.glossary_pattern = re.compile(r'(?<!\w)(?:' + "|".join(map(re.escape, terms)) + r')(?!\w)')
+
+    def add(self, english: str, target: str):
+        key = normalize(english)
+        if key in self.exact:
+            return  # First translation of a string wins
+        entry = len(self.sources)
+        self.sources.append(english)
+        self.targets.append(target)
+        self.exact[key] = entry
+        entry_grams = grams(key)
+        self.entry_grams.append(entry_grams)
+        for gram in entry_grams:
+            self.postings[gram].append(entry)
+
+    def __len__(self):
+        return len(self.sources)
+
+    def lookup(self, english: str, min_score: float = DEFAULT_MIN_SCORE):
+        """
+        Best (score, English source, translation) for english with score >= min_score,
+        or None. Exact matches (ignoring case and spacing) score 1.0; whole-string
+        glossary terms count as exact too.
+        """
+        key = normalize(english)
+        entry = self.exact.get(key)
+        if entry is not None:
+            return 1.0, self.sources[entry], self.targets[entry]
+        if key in self.glossary:
+            term, target = self.glossary[key]
+            return 1.0, term, target
+
+        query = grams(key)
+        size = len(query)
+        # Dice >= t needs an overlap of at least t*|Q|/(2-t) n-grams ...
+        min_overlap = max(1, math.ceil(min_score * size / (2 - min_score)))
+        # ... so a match must share one of the |Q|-min_overlap+1 rarest ones
+        rarest = sorted(query, key=lambda gram: len(self.postings.get(gram, ())))
+        candidates = set()
+        for gram in rarest[:size - min_overlap + 1]:
+            candidates.update(self.postings.get(gram, ()))
+
+        best = None
+        for entry in candidates:
+            other = self.entry_grams[entry]
+            if not (min_overlap <= len(other) <= size * (2 - min_score) / min_score):
+                continue
+            score = 2 * len(query & other) / (size + len(other))
+            # Ties go to the entry that came first in the corpus
+            if score >= min_score and (best is None or (score, -entry) > (best[0], -best[1])):
+                best = (score, entry)
+        if best is None:
+            return None
+        return best[0], self.sources[best[1]], self.targets[best[1]]
+
+    def glossary_terms(self, english: str) -> list[tuple[str, str]]:
+        """Glossary (term, translation) pairs that occur as whole words in english"""
+        if not self.glossary_pattern:
+            return []
+        found = {}
+        for match in self.glossary_pattern.finditer(normalize(english)):
+            found.setdefault(match.group(0), self.glossary[match.group(0)])
+        return list(found.values())
+
+def build_memory(english_file: str, translated_file: str, glossary_files: list[str] = ()) -> TranslationMemory:
+    try:
+        pairs = pair_corpus(english_file, translated_file)
+    except (OSError, ET.ParseError) as e:
+        print(f"Warning: translation memory disabled, cannot read corpus: {e}", file=sys.stderr)
+        pairs = []
+    return TranslationMemory(pairs, load_glossary(glossary_files))
+
+def load_tm_settings(cfg) -> dict:
+    """Translation-memory settings from config.ini; TM_ENGLISH_FILE empty = no prefill"""
+    return {
+        "TM_ENGLISH_FILE": get_setting(cfg, "TM_ENGLISH_FILE", ""),
+        "LOCALIZATION_FILE": get_setting(cfg, "LOCALIZATION_FILE"),
+        "TM_GLOSSARY_FILES": [p.strip() for p in get_setting(cfg, "TM_GLOSSARY_FILES", "").split(",") if p.strip()],
+        "TM_MIN_SCORE": float(get_setting(cfg, "TM_MIN_SCORE", str(DEFAULT_MIN_SCORE))),
+        "TM_PREFILL_SCORE": float(get_setting(cfg, "TM_PREFILL_SCORE", str(DEFAULT_PREFILL_SCORE))),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Look up English strings in the translation memory.")
+    parser.add_argument("text", nargs="+", help="English text to look up")
+    parser.add_argument("--min-score", type=float, help="lowest similarity to report (default TM_MIN_SCORE)")
+    args = parser.parse_args()
+
+    settings = load_tm_settings(load_config())
+    if not settings["TM_ENGLISH_FILE"]:
+        print("Error: TM_ENGLISH_FILE is not set in config.ini", file=sys.stderr)
+        sys.exit(1)
+    memory = build_memory(settings["TM_ENGLISH_FILE"], settings["LOCALIZATION_FILE"], settings["TM_GLOSSARY_FILES"])
+    min_score = args.min_score if args.min_score is not None else settings["TM_MIN_SCORE"]
+
+    text = " ".join(args.text)
+    match = memory.lookup(text, min_score)
+    if match:
+        score, source, target = match
+        print(f"{score:.0%}  {source}\n      → {target}")
+    else:
+        print(f"No match at or above {min_score:.0%}.")
+    for term, target in memory.glossary_terms(text):
+        print(f"Glossary: {term} → {target}")
+
+if __name__ == "__main__":
+    main()
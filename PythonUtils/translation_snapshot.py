@@ -0,0 +1,145 @@
+# File: PythonUtils/translation_snapshot.py
+
+import os
+import mmap
+import struct
+from bisect import bisect_right
+
+# Layout (little-endian):
+#   header       magic, format version, restart interval, key count, block count
+#   gameversion  u16 length + UTF-8
+#   restarts     u32 offset of every block's first key, relative to the key data
+#   keys         sorted, front-coded: varint shared prefix length, varint suffix length, suffix bytes;
+#                the first key of each block is stored whole, so any block decodes on its own
+MAGIC = b"BTKEYS\0\0"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sHHII")
+RESTART_INTERVAL = 32
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+def _read_varint(buffer, pos: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = buffer[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+def _decode(buffer, pos: int, count: int) -> list[bytes]:
+    """count front-coded keys starting at pos"""
+    keys = []
+    previous = b""
+    for _ in range(count):
+        shared, pos = _read_varint(buffer, pos)
+        length, pos = _read_varint(buffer, pos)
+        previous = previous[:shared] + buffer[pos:pos + length]
+        pos += length
+        keys.append(previous)
+    return keys
+
+def write_snapshot(path: str, identifiers, gameversion: str = "") -> int:
+    """
+    Write identifiers, sorted and front-coded, with gameversion in the header.
+    The output depends only on its input. It is written to a temporary file
+    and then moved into place. Returns the file size.
+    """
+    keys = sorted({identifier.encode("utf-8") for identifier in identifiers})
+    data = bytearray()
+    restarts = []
+    previous = b""
+    for i, key in enumerate(keys):
+        if i % RESTART_INTERVAL == 0:
+            restarts.append(len(data))
+            shared = 0
+        else:
+            shared = len(os.path.commonprefix((previous, key)))
+        data += _varint(shared) + _varint(len(key) - shared) + key[shared:]
+        previous = key
+
+    version = gameversion.encode("utf-8")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, RESTART_INTERVAL, len(keys), len(restarts)))
+        f.write(struct.pack("<H", len(version)) + version)
+        f.write(struct.pack(f"<{len(restarts)}I", *restarts))
+        f.write(data)
+    os.replace(tmp_file, path)
+    return os.path.getsize(path)
+
+def read_gameversion(path: str) -> str:
+    """The gameversion in a snapshot's header, without mapping its keys; raises ValueError if it is not a snapshot"""
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size + 2)
+        try:
+            magic, version, *_ = HEADER.unpack_from(header, 0)
+            (length,) = struct.unpack_from("<H", header, HEADER.size)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"{path} is not a version {FORMAT_VERSION} translation snapshot")
+            return f.read(length).decode("utf-8")
+        except (struct.error, UnicodeDecodeError) as e:
+            raise ValueError(f"{path} is not a valid translation snapshot: {e}") from e
+
+class TranslationSnapshot:
+    """
+    Read-only view of a snapshot file through mmap. Membership tests binary-search
+    the first keys of the blocks and decode a single block, so a few lookups
+    decode almost nothing; identifiers() decodes everything for set arithmetic.
+    Raises ValueError for a file that is not a snapshot of this format.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, self.restart_interval, self.count, blocks = HEADER.unpack_from(self._buffer, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"{path} is not a version {FORMAT_VERSION} translation snapshot")
+            pos = HEADER.size
+            (length,) = struct.unpack_from("<H", self._buffer, pos)
+            self.gameversion = self._buffer[pos + 2:pos + 2 + length].decode("utf-8")
+            pos += 2 + length
+            self._restarts = struct.unpack_from(f"<{blocks}I", self._buffer, pos)
+            self._data = pos + 4 * blocks
+        except (struct.error, UnicodeDecodeError) as e:
+            self._buffer.close()
+            raise ValueError(f"{path} is not a valid translation snapshot: {e}") from e
+        except ValueError:
+            self._buffer.close()
+            raise
+        self._first_keys = [self._block(i, first_only=True)[0] for i in range(blocks)]
+
+    def _block(self, index: int, first_only: bool = False) -> list[bytes]:
+        """The keys of one block, in order"""
+        remaining = min(self.restart_interval, self.count - index * self.restart_interval)
+        return _decode(self._buffer, self._data + self._restarts[index], 1 if first_only else remaining)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, identifier: str) -> bool:
+        key = identifier.encode("utf-8")
+        index = bisect_right(self._first_keys, key) - 1
+        return index >= 0 and key in self._block(index)
+
+    def identifiers(self) -> set[str]:
+        # One copy of the key data decodes much faster than indexing the map byte by byte
+        return {key.decode("utf-8") for key in _decode(self._buffer[self._data:], 0, self.count)}
+
+    def close(self):
+        self._buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
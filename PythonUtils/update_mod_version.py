@@ -1,55 +1,149 @@
-import sys
 import os
+import json
+import time
 import shutil
-import configparser
-from pathlib import Path
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from config_utils import load_config, get_setting
 
 # ----------------------------- CONFIG -----------------------------
-CONFIG_FILE = "config.ini"
-
-config = configparser.ConfigParser()
-if not Path(CONFIG_FILE).exists():
-    print(f"Error: {CONFIG_FILE} not found!", file=sys.stderr)
-    sys.exit(1)
-
-config.read(CONFIG_FILE, encoding="utf-8")
-try:
-    mod_name = config["CONFIG"]["MOD_NAME"].strip('"\' ')
-    src_dir = config["CONFIG"]["AUTO_UPDATE_SRC_DIR"].strip('"\' ')
-    dest_dir = config["CONFIG"]["AUTO_UPDATE_DES_DIR"].strip('"\' ')
-    
-    SRC_DIRECTORY = os.path.join(src_dir, mod_name)
-    DEST_DIRECTORY = os.path.join(dest_dir, mod_name)
-except KeyError as e:
-    print(f"Error: Missing required key in config.ini: {e}", file=sys.stderr)
-    sys.exit(1)
+def load_settings(cfg=None) -> dict:
+    """Read the workshop and LocalMods folders from config.ini"""
+    cfg = cfg if cfg is not None else load_config()
+    mod_name = get_setting(cfg, "MOD_NAME")
+    src_dir = get_setting(cfg, "AUTO_UPDATE_SRC_DIR")
+    dest_dir = get_setting(cfg, "AUTO_UPDATE_DES_DIR")
+    return {
+        "SRC_DIRECTORY": os.path.join(src_dir, mod_name),
+        "DEST_DIRECTORY": os.path.join(dest_dir, mod_name),
+        "DEPLOY_MANIFEST_FILE": get_setting(cfg, "DEPLOY_MANIFEST_FILE", "deploy_manifest.json"),
+    }
 # ----------------------------------------------------------------
 
-def recursive_copy_and_replace(source_dir, dest_dir):
+def hash_file(file_path, chunk_size=1 << 20):
+    h = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def manifest_roots(source_dir, dest_dir):
+    return {"source": os.path.abspath(source_dir), "destination": os.path.abspath(dest_dir)}
+
+def load_manifest(manifest_file, source_dir, dest_dir):
+    """
+    上次部署時記錄的檔案清單：相對路徑 -> {size, mtime_ns, hash}。
+    清單記錄的來源或目標目錄與本次不同時（例如 MOD_NAME 或 AUTO_UPDATE_DES_DIR 已變更），
+    清單不適用於本次目標，視為首次部署，以免刪除不屬於它的檔案。
+    """
+    if not os.path.exists(manifest_file):
+        return {}
+    try:
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"警告：無法讀取部署清單 '{manifest_file}'，將視為首次部署。({e})")
+        return {}
+    roots = manifest_roots(source_dir, dest_dir)
+    if not isinstance(data, dict) or any(data.get(key) != value for key, value in roots.items()):
+        print(f"注意：部署清單 '{manifest_file}' 屬於其他來源或目標目錄，將視為首次部署。")
+        return {}
+    return data.get("files", {})
+
+def save_manifest(manifest_file, source_dir, dest_dir, files):
+    os.makedirs(os.path.dirname(os.path.abspath(manifest_file)), exist_ok=True)
+    with open(manifest_file, "w", encoding="utf-8") as f:
+        json.dump({**manifest_roots(source_dir, dest_dir), "files": files},
+                  f, ensure_ascii=False, indent=0, sort_keys=True)
+
+def sync_mod(source_dir, dest_dir, manifest_file, use_hash=False, jobs=8, full=False):
+    """
+    增量同步：只複製與上次部署相比有變動的檔案，並刪除上游已移除的檔案。
+    檔案大小與修改時間與清單相同、且目標檔案仍存在時即視為未變動；
+    use_hash 時，大小或時間改變但內容雜湊相同的檔案也不會重新複製。
+    full 時複製所有檔案（舊版行為），但仍會更新清單並刪除已移除的檔案。
+    """
     # 檢查來源目錄是否存在
     if not os.path.exists(source_dir):
         print(f"錯誤：來源目錄 '{source_dir}' 不存在。")
         return
 
-    # 使用 os.walk 遍歷所有層級的子目錄與檔案
-    for root, dirs, files in os.walk(source_dir):
-        # 計算相對路徑，以便在目標位置建立對應結構
-        rel_path = os.path.relpath(root, source_dir)
-        dest_path = os.path.join(dest_dir, rel_path)
-
-        # 如果目標子目錄不存在，則建立它
-        if not os.path.exists(dest_path):
-            os.makedirs(dest_path)
+    start = time.perf_counter()
+    old_manifest = load_manifest(manifest_file, source_dir, dest_dir)
+    new_manifest = {}
+    to_copy = []
+    unchanged = 0
 
-        # 複製該目錄下的所有檔案
+    for root, dirs, files in os.walk(source_dir):
         for file in files:
             s_file = os.path.join(root, file)
-            d_file = os.path.join(dest_path, file)
-            
-            # 複製並取代
-            shutil.copy2(s_file, d_file)
-            print(f"已複製: {os.path.join(rel_path, file)}")
+            rel_file = os.path.relpath(s_file, source_dir).replace(os.sep, "/")
+            d_file = os.path.join(dest_dir, rel_file)
+            st = os.stat(s_file)
+            entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            old = old_manifest.get(rel_file)
+            dest_ok = os.path.exists(d_file) and os.path.getsize(d_file) == st.st_size
+
+            if use_hash:
+                entry["hash"] = hash_file(s_file)
+                same = old is not None and old.get("hash") == entry["hash"]
+            else:
+                same = old is not None and old.get("size") == entry["size"] and old.get("mtime_ns") == entry["mtime_ns"]
+                if same and "hash" in old:
+                    entry["hash"] = old["hash"]
+
+            new_manifest[rel_file] = entry
+            if same and dest_ok and not full:
+                unchanged += 1
+            else:
+                to_copy.append((s_file, d_file))
+
+    # 平行複製有變動的檔案
+    def copy_one(pair):
+        s_file, d_file = pair
+        os.makedirs(os.path.dirname(d_file), exist_ok=True)
+        shutil.copy2(s_file, d_file)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        list(executor.map(copy_one, to_copy))
+
+    # 刪除上游已移除的檔案（僅限上次部署過的檔案）
+    removed = 0
+    for rel_file in sorted(old_manifest.keys() - new_manifest.keys()):
+        d_file = os.path.join(dest_dir, rel_file)
+        if os.path.isfile(d_file):
+            os.remove(d_file)
+            removed += 1
+            print(f"已刪除: {rel_file}")
+            # 順便移除因此變空的子目錄
+            parent = os.path.dirname(d_file)
+            while os.path.abspath(parent) != os.path.abspath(dest_dir) and not os.listdir(parent):
+                os.rmdir(parent)
+                parent = os.path.dirname(parent)
+
+    save_manifest(manifest_file, source_dir, dest_dir, new_manifest)
+
+    elapsed = time.perf_counter() - start
+    print(f"已複製 {len(to_copy)} 個檔案，{unchanged} 個未變動，已刪除 {removed} 個檔案（耗時 {elapsed:.2f} 秒）。")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="將工作坊的模組更新部署到 LocalMods。")
+    parser.add_argument("--full", action="store_true",
+                        help="複製所有檔案（舊版行為），並更新部署清單")
+    parser.add_argument("--hash", action="store_true",
+                        help="以內容雜湊比對檔案，而非僅比對大小與修改時間")
+    parser.add_argument("--jobs", type=int, default=8,
+                        help="平行複製的執行緒數量（預設 8）")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    settings = load_settings()
+    sync_mod(settings["SRC_DIRECTORY"], settings["DEST_DIRECTORY"], settings["DEPLOY_MANIFEST_FILE"],
+             use_hash=args.hash, jobs=args.jobs, full=args.full)
+    print("任務完成！")
 
 if __name__ == "__main__":
-    recursive_copy_and_replace(SRC_DIRECTORY, DEST_DIRECTORY)
-    print("任務完成！")
\ No newline at end of file
+    main()
@@ -0,0 +1,133 @@
+# File: PythonUtils/validate_translations.py
+
+import os
+import re
+import csv
+import sys
+import argparse
+import xml.etree.ElementTree as ET
+from collections import Counter, defaultdict
+
+import instrumentation
+from config_utils import load_config, get_setting
+from translation_memory import read_localization_texts
+
+# ----------------------------- CONFIG -----------------------------
+def load_settings(cfg=None) -> dict:
+    """Read the settings used by this stage from config.ini"""
+    cfg = cfg if cfg is not None else load_config()
+    localization_file = get_setting(cfg, "LOCALIZATION_FILE")
+    details_csv = get_setting(cfg, "MISSING_DETAILS_CSV")
+    return {
+        "LOCALIZATION_FILE": localization_file,
+        "ENGLISH_LOCALIZATION_FILE": get_setting(cfg, "ENGLISH_LOCALIZATION_FILE",
+                                                 os.path.join(os.path.dirname(localization_file), "English.xml")),
+        "TRANSLATION_ISSUES_CSV": get_setting(cfg, "TRANSLATION_ISSUES_CSV",
+                                              os.path.join(os.path.dirname(details_csv), "translation_issues.csv")),
+    }
+# ----------------------------------------------------------------
+
+# Game variables filled in at runtime: [amount], [seconds], [location1]
+# (upper-case brackets such as [ALEPH] or [CENSORED] are plain text)
+PLACEHOLDER = re.compile(r'\[[a-z][a-z0-9_]*\]')
+# Rich-text markup: ‖color:gui.blue‖ ... ‖end‖, and escaped line breaks
+MARKUP = re.compile(r'‖[^‖\n]*‖|\\n')
+
+FIELDNAMES = ['key', 'problem', 'detail', 'english', 'translation']
+
+def signature_diff(pattern: re.Pattern, english: str, translation: str) -> str:
+    """What the translation lacks and adds compared with english, or "" when they match"""
+    expected = Counter(pattern.findall(english))
+    found = Counter(pattern.findall(translation))
+    if expected == found:
+        return ""
+    parts = []
+    if expected - found:
+        parts.append("missing " + " ".join(sorted((expected - found).elements())))
+    if found - expected:
+        parts.append("extra " + " ".join(sorted((found - expected).elements())))
+    return "; ".join(parts)
+
+def validate(english: list[tuple[str, str]], translated: list[tuple[str, str]]) -> list[dict]:
+    """
+    Check every translated entry against its English entry, in one pass over each file.
+    Keys repeated on purpose (loadingscreentip) pair up by occurrence order;
+    a key repeated only in the translation is reported as a duplicate.
+    Returns issue rows in translation file order.
+    """
+    english_texts = defaultdict(list)
+    for key, text in english:
+        english_texts[key].append(text)
+
+    issues = []
+    seen = Counter()
+    for key, text in translated:
+        n = seen[key]
+        seen[key] += 1
+        sources = english_texts.get(key)
+        if n and n >= len(sources or ()):
+            issues.append({'key': key, 'problem': 'duplicate key', 'detail': f"occurrence {n + 1}",
+                           'english': "", 'translation': text})
+            continue
+        if not sources:
+            continue  # Not in English.xml: nothing to compare with
+        source = sources[n]
+        if not text:
+            if source:
+                issues.append({'key': key, 'problem': 'empty translation', 'detail': "",
+                               'english': source, 'translation': text})
+            continue
+        for problem, pattern in (('placeholder mismatch', PLACEHOLDER), ('markup mismatch', MARKUP)):
+            detail = signature_diff(pattern, source, text)
+            if detail:
+                issues.append({'key': key, 'problem': problem, 'detail': detail,
+                               'english': source, 'translation': text})
+    return issues
+
+def run(settings: dict) -> list[dict]:
+    """
+    Stage 7: compare the placeholders and markup of every LOCALIZATION_FILE entry
+    with its ENGLISH_LOCALIZATION_FILE entry and list mismatches, duplicate keys
+    and empty translations in TRANSLATION_ISSUES_CSV.
+    """
+    english_file = settings["ENGLISH_LOCALIZATION_FILE"]
+    localization_file = settings["LOCALIZATION_FILE"]
+    if os.path.abspath(english_file) == os.path.abspath(localization_file):
+        print("LOCALIZATION_FILE is the English file; nothing to validate.")
+        return []
+    try:
+        english = read_localization_texts(english_file)
+        translated = read_localization_texts(localization_file)
+    except (OSError, ET.ParseError) as e:
+        print(f"Error reading localization files: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    issues = validate(english, translated)
+    counts = Counter(issue['problem'] for issue in issues)
+
+    print("\n" + "="*60)
+    print(f"Translated entries checked: {len(translated)}")
+    print(f"→ Placeholder mismatches:   {counts['placeholder mismatch']}")
+    print(f"→ Markup mismatches:        {counts['markup mismatch']}")
+    print(f"→ Duplicate keys:           {counts['duplicate key']}")
+    print(f"→ Empty translations:       {counts['empty translation']}")
+    print("="*60)
+
+    with instrumentation.timed("write"), open(settings["TRANSLATION_ISSUES_CSV"], "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(issues)
+    if issues:
+        print(f"\nTranslation issues saved to: {settings['TRANSLATION_ISSUES_CSV']}")
+    return issues
+
+def main():
+    parser = argparse.ArgumentParser(description="Check LOCALIZATION_FILE placeholders and markup against English.")
+    parser.add_argument("--strict", action="store_true", help="exit with status 1 when any issue is found (for CI)")
+    args = parser.parse_args()
+    issues = run(load_settings())
+    if args.strict and issues:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
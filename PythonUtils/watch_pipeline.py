@@ -0,0 +1,281 @@
+# File: PythonUtils/watch_pipeline.py
+
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+import pipeline
+import extract_identifiers
+import check_localization_coverage
+import check_trcn_translations_coverage
+import find_missing_details
+import generate_localization_xml
+import check_stale_translations
+import validate_translations
+from content_package import FILELIST_NAME
+from identifier_index import PARSE_CACHE_VERSION, IdentifierIndex, ParsedFile, collect_xml_files, scan_xml_files
+from parse_cache import ParseCache
+
+# ----------------------------- CONFIG -----------------------------
+DEFAULT_INTERVAL_S = 0.5
+
+# Stage numbers, as in main.py's SCRIPTS
+EXTRACT, COVERAGE, GAME_COVERAGE, DETAILS, GENERATE, STALE, VALIDATE = range(1, 8)
+# ----------------------------------------------------------------
+
+def file_stamp(path: str):
+    """(size, mtime_ns) of a file, or None if it does not exist"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+def dir_stamps(root: str) -> dict[str, tuple]:
+    """file_stamp of every .xml file under root, keyed by path"""
+    stamps = {}
+    for root_dir, _, files in os.walk(root):
+        for file in files:
+            if file.lower().endswith('.xml'):
+                path = os.path.join(root_dir, file)
+                stamps[path] = file_stamp(path)
+    return stamps
+
+class WatchSession:
+    """
+    Pipeline state kept in memory between runs: the occurrences of every SRCDIR
+    file, the identifiers the base game translates and the last stage results.
+    poll() only stats files; it re-parses what changed and re-runs the stages
+    downstream of it, e.g. a TrCn.xml edit re-runs stages 2-5 from memory.
+    """
+
+    def __init__(self, cfg, dump: bool = False, use_cache: bool = True, jobs: int = None,
+                 verbose: bool = False):
+        self.extract_settings = extract_identifiers.load_settings(cfg)
+        self.coverage_settings = check_localization_coverage.load_settings(cfg)
+        self.trcn_settings = check_trcn_translations_coverage.load_settings(cfg)
+        self.details_settings = find_missing_details.load_settings(cfg)
+        self.generate_settings = generate_localization_xml.load_settings(cfg)
+        self.stale_settings = check_stale_translations.load_settings(cfg)
+        self.validate_settings = validate_translations.load_settings(cfg)
+        if not use_cache:
+            self.extract_settings["PARSE_CACHE_FILE"] = ""
+            self.trcn_settings["TRANSLATIONS_CACHE_FILE"] = ""
+        if jobs is not None:
+            self.extract_settings["JOBS"] = extract_identifiers.resolve_jobs(jobs)
+        self.dump = dump
+        self.verbose = verbose
+
+        # Our own outputs may live under SRCDIR; writing them must not look like an edit.
+        # LOCALIZATION_FILE has no identifier attributes and is watched on its own,
+        # so saving it does not re-parse it as content either.
+        skipped = [
+            self.extract_settings["OUTPUT_FILE"], self.coverage_settings["MATCHES_OUTPUT"],
+            self.coverage_settings["MISSING_OUTPUT"], self.details_settings["MISSING_DETAILS_CSV"],
+            self.details_settings["REJECTION_LOG"], self.generate_settings["SINGLE_XML_OUTPUT"],
+            self.stale_settings["STALE_TRANSLATIONS_CSV"], self.validate_settings["TRANSLATION_ISSUES_CSV"],
+            self.coverage_settings["LOCALIZATION_FILE"], self.validate_settings["ENGLISH_LOCALIZATION_FILE"],
+        ]
+        src_dir = os.path.abspath(self.extract_settings["SRCDIR"])
+        self.ignored = {os.path.relpath(os.path.abspath(path), src_dir) for path in skipped}
+
+        self.content = {}               # rel_path -> (stamp, occurrences), in discovery order
+        self.xml_files = None           # last discovery result
+        self.filelist_stamp = None
+        self.localization_stamp = None
+        self.game_stamps = None          # None until the first read, even of a missing TRANSLATIONS_DIR
+        self.translated = set()
+        self.pending = None             # first stage still to re-run after a failure
+
+        self.index = None
+        self.visible = set()
+        self.missing = set()
+        self.truly_missing = set()
+        self.rows = []
+        self.stale = []
+        self.issues = []
+
+    # ---------------------- change detection ----------------------
+
+    def discover(self) -> list[tuple[str, str]]:
+        """SRCDIR files to watch; in filelist mode only re-read when filelist.xml changes"""
+        s = self.extract_settings
+        if s["FILE_DISCOVERY"] == "filelist":
+            stamp = file_stamp(os.path.join(s["SRCDIR"], FILELIST_NAME))
+            if self.xml_files is not None and stamp == self.filelist_stamp:
+                return self.xml_files
+            self.filelist_stamp = stamp
+        xml_files = collect_xml_files(s["SRCDIR"], s["FILE_DISCOVERY"], s["INCLUDE_GLOBS"], s["EXCLUDE_GLOBS"])
+        self.xml_files = [(path, rel) for path, rel in xml_files if rel not in self.ignored]
+        return self.xml_files
+
+    def update_content(self, cache: ParseCache = None) -> list[str]:
+        """
+        Re-parse new and modified SRCDIR files and drop deleted ones.
+        Returns the relative paths whose occurrences (or position) changed.
+        """
+        xml_files = self.discover()
+        stamps = [file_stamp(path) for path, _ in xml_files]
+        stale = [i for i, (_, rel) in enumerate(xml_files)
+                 if rel not in self.content or self.content[rel][0] != stamps[i]]
+        if not stale and list(self.content) == [rel for _, rel in xml_files]:
+            return []
+
+        parsed = dict(zip(stale, scan_xml_files([xml_files[i] for i in stale], cache,
+                                                self.extract_settings["JOBS"])))
+        content = {}
+        for i, (_, rel) in enumerate(xml_files):
+            content[rel] = (stamps[i], parsed[i]) if i in parsed else self.content[rel]
+
+        # Files without identifiers (texts, animations, ...) never affect the index
+        changed = [rel for rel, (_, found) in self.content.items() if rel not in content and found]
+        for i in stale:
+            rel = xml_files[i][1]
+            if self.content.get(rel, (None, ParsedFile([], [])))[1] != content[rel][1]:
+                changed.append(rel)
+        if not changed and self.indexed_order(self.content) != self.indexed_order(content):
+            changed.append(FILELIST_NAME)   # Same files, new order: first occurrences may differ
+        self.content = content
+        return changed
+
+    @staticmethod
+    def indexed_order(content: dict) -> list[str]:
+        return [rel for rel, (_, found) in content.items() if found]
+
+    def update_translated(self) -> bool:
+        """Re-read the base game's texts when TRANSLATIONS_DIR (or the snapshot used instead) changed"""
+        snapshot_file = self.trcn_settings["TRANSLATIONS_SNAPSHOT_FILE"]
+        if check_trcn_translations_coverage.snapshot_usable(self.trcn_settings):
+            # A game update changes Vanilla.xml, after which the snapshot no longer applies
+            vanilla_file = check_trcn_translations_coverage.vanilla_package_file(self.trcn_settings["TRANSLATIONS_DIR"])
+            stamps = {snapshot_file: file_stamp(snapshot_file), vanilla_file: file_stamp(vanilla_file)}
+        else:
+            stamps = dir_stamps(self.trcn_settings["TRANSLATIONS_DIR"])
+        if stamps == self.game_stamps:
+            return False
+        self.game_stamps = stamps
+        self.translated = check_trcn_translations_coverage.load_translated_identifiers(self.trcn_settings)
+        return True
+
+    def update_localization(self) -> bool:
+        """LOCALIZATION_FILE or the English file it is validated against changed"""
+        stamp = (file_stamp(self.coverage_settings["LOCALIZATION_FILE"]),
+                 file_stamp(self.validate_settings["ENGLISH_LOCALIZATION_FILE"]))
+        if stamp == self.localization_stamp:
+            return False
+        self.localization_stamp = stamp
+        return True
+
+    # ---------------------- stages ----------------------
+
+    def call(self, stage_func, *args, **kwargs):
+        """Run one stage, hiding its report unless verbose"""
+        if self.verbose:
+            return stage_func(*args, **kwargs)
+        with redirect_stdout(io.StringIO()):
+            return stage_func(*args, **kwargs)
+
+    def run_from(self, first: int) -> list[int]:
+        """Re-run stage first and everything after it that sees a different input"""
+        ran = []
+        if first <= EXTRACT:
+            self.index = IdentifierIndex()
+            for _, found in self.content.values():
+                self.index.add_file(found)
+            self.call(extract_identifiers.run, self.extract_settings, dump=self.dump, index=self.index)
+            self.visible = self.index.visible_identifiers()
+            ran.append(EXTRACT)
+        if first <= COVERAGE:
+            self.missing = self.call(check_localization_coverage.run, self.coverage_settings,
+                                     self.visible, dump=self.dump)
+            ran.append(COVERAGE)
+            # The index, LOCALIZATION_FILE and the English file feed the stale check
+            self.stale = self.call(check_stale_translations.run, self.stale_settings, index=self.index)
+            self.issues = self.call(validate_translations.run, self.validate_settings)
+            ran += [STALE, VALIDATE]
+
+        truly_missing = self.call(check_trcn_translations_coverage.run, self.trcn_settings, self.missing,
+                                  dump=self.dump, translated_identifiers=self.translated)
+        ran.append(GAME_COVERAGE)
+        if first > EXTRACT and truly_missing == self.truly_missing and not self.dump:
+            return sorted(ran)  # Same identifiers to translate: stages 4-5 would write the same files
+
+        self.rows = self.call(find_missing_details.run, self.details_settings, truly_missing,
+                              dump=self.dump, index=self.index)
+        self.call(generate_localization_xml.run, self.generate_settings, self.rows)
+        self.truly_missing = truly_missing
+        ran += [DETAILS, GENERATE]
+        return sorted(ran)
+
+    # ---------------------- watching ----------------------
+
+    def start(self):
+        """Full first run; the parse cache only speeds up this initial scan"""
+        s = self.extract_settings
+        cache = ParseCache(s["PARSE_CACHE_FILE"], s["SRCDIR"], PARSE_CACHE_VERSION) if s["PARSE_CACHE_FILE"] else None
+        start = time.perf_counter()
+        self.update_content(cache)
+        if cache:
+            cache.save()
+        self.update_translated()
+        self.update_localization()
+        self.run_from(EXTRACT)
+        self.report("initial run", time.perf_counter() - start, list(range(EXTRACT, VALIDATE + 1)))
+
+    def poll(self):
+        """Check every watched file once and re-run what their changes affect"""
+        start = time.perf_counter()
+        reasons = []
+        first = self.pending or VALIDATE + 1
+
+        changed = self.update_content()
+        if changed:
+            reasons.append(changed[0] if len(changed) == 1 else f"{len(changed)} content files")
+            first = EXTRACT
+        if self.update_localization():
+            reasons.append(os.path.basename(self.coverage_settings["LOCALIZATION_FILE"]))
+            first = min(first, COVERAGE)
+        if self.update_translated():
+            reasons.append("TRANSLATIONS_DIR")
+            first = min(first, GAME_COVERAGE)
+        if not reasons:
+            return
+
+        try:
+            ran = self.run_from(first)
+        except (Exception, SystemExit) as e:
+            # Editors often replace files in two steps; retry on the next change
+            self.pending = first
+            print(f"[{time.strftime('%H:%M:%S')}] {', '.join(reasons)} changed → "
+                  f"stage {first} failed: {e!r}", file=sys.stderr)
+            return
+        self.pending = None
+        self.report(", ".join(reasons) + " changed", time.perf_counter() - start, ran)
+
+    def report(self, reason: str, seconds: float, ran: list[int]):
+        stages = ", ".join(pipeline.stage_script(pipeline.STAGES[n - 1]).removesuffix(".py") for n in ran)
+        print(f"[{time.strftime('%H:%M:%S')}] {reason} → {stages} in {seconds * 1000:.0f} ms: "
+              f"{len(self.missing)} missing from {os.path.basename(self.coverage_settings['LOCALIZATION_FILE'])}, "
+              f"{len(self.truly_missing)} untranslated, {len(self.rows)} entries to translate, "
+              f"{len(self.stale)} stale, {len(self.issues)} placeholder/markup issues")
+
+def watch(cfg, dump: bool = False, use_cache: bool = True, jobs: int = None,
+          interval: float = DEFAULT_INTERVAL_S, verbose: bool = False):
+    """
+    Run the pipeline once, then poll SRCDIR, LOCALIZATION_FILE and TRANSLATIONS_DIR
+    every interval seconds and re-run only the affected stages until Ctrl+C.
+    Relative paths in cfg are resolved against the current directory.
+    dump, use_cache and jobs work as in pipeline.run_pipeline.
+    """
+    session = WatchSession(cfg, dump, use_cache, jobs, verbose)
+    session.start()
+    print(f"Watching for changes every {interval:g}s (Ctrl+C to stop) ...")
+    try:
+        while True:
+            time.sleep(interval)
+            session.poll()
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+    return session
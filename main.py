@@ -2,6 +2,7 @@
 
 import os
 import sys
+import argparse
 import subprocess
 from pathlib import Path
 import configparser
@@ -19,9 +20,20 @@ SCRIPTS = [
     "check_localization_coverage.py",           # 2. Compare with main localization → find missing
     "check_trcn_translations_coverage.py",      # 3. Remove any already translated in TraditionalChinese
     "find_missing_details.py",                  # 4. Generate detailed CSV with tag, name, desc, file (filtered)
-    "generate_localization_xml.py"              # 5. NEW: Create single MissingTranslations.xml with English text
+    "generate_localization_xml.py",             # 5. NEW: Create single MissingTranslations.xml with English text
+    "check_stale_translations.py",              # 6. List translations whose English changed since they were made
+    "validate_translations.py",                 # 7. Check placeholders/markup of TrCn.xml against English.xml
+    "machine_translate.py"                      # 8. Machine-translate MissingTranslations.xml (only with MT_BACKEND)
 ]
 
+# The same stages are importable for the in-process pipeline (default mode)
+sys.path.insert(0, str(UTILS_DIR))
+import pipeline
+import instrumentation
+import watch_pipeline
+from config_utils import get_setting
+from languages import load_languages
+
 # ----------------------------------------------------------------
 
 def load_config():
@@ -69,7 +81,80 @@ def run_script(script_name: str):
         print(f"✗ Error running {script_name}: {e}", file=sys.stderr)
         sys.exit(1)
 
+def run_stage(script_name: str, stage_func, *args, **kwargs):
+    """Run a single pipeline stage inside this interpreter and return its result"""
+    print(f"\n{'='*70}")
+    print(f"Running [{SCRIPTS.index(script_name)+1}/{len(SCRIPTS)}]: {script_name} (in-process)")
+    print(f"{'='*70}")
+    
+    try:
+        result = stage_func(*args, **kwargs)
+    except SystemExit as e:
+        if e.code:
+            print(f"✗ {script_name} failed with return code {e.code}", file=sys.stderr)
+            print("Aborting pipeline.", file=sys.stderr)
+            sys.exit(1)
+        result = None
+    except Exception as e:
+        print(f"✗ Error running {script_name}: {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    print(f"✓ {script_name} completed successfully.\n")
+    return result
+
+def run_in_process(config: configparser.ConfigParser, dump: bool, use_cache: bool = True, jobs: int = None,
+                   profile: bool = False, watch: bool = False, interval: float = watch_pipeline.DEFAULT_INTERVAL_S):
+    """
+    Run every stage in this interpreter, handing sets and rows from one stage
+    to the next instead of re-reading them from PythonUtils/Output.
+    See pipeline.run_pipeline for the options.
+    With profile=True, per-stage timings, memory and file reads are written to
+    PROFILE_REPORT_FILE and summarised at the end.
+    With watch=True the pipeline keeps running and re-runs only the stages
+    affected by each change (see watch_pipeline).
+    """
+    # Relative paths in config.ini are resolved against the project, as in subprocess mode
+    os.chdir(PROJECTPATH)
+    cfg = config["CONFIG"]
+    
+    if watch:
+        watch_pipeline.watch(cfg, dump=dump, use_cache=use_cache, jobs=jobs, interval=interval)
+        return
+    
+    if not profile:
+        pipeline.run_pipeline(cfg, dump=dump, use_cache=use_cache, jobs=jobs, run_stage=run_stage)
+        return
+    
+    profiled_stage, recorder = instrumentation.profiled(run_stage)
+    pipeline.run_pipeline(cfg, dump=dump, use_cache=use_cache, jobs=jobs, run_stage=profiled_stage)
+    
+    default_report = os.path.join(os.path.dirname(pipeline.output_path(cfg)), "pipeline_profile.json")
+    report_file = get_setting(cfg, "PROFILE_REPORT_FILE", default_report)
+    report = instrumentation.write_report(recorder, report_file)
+    instrumentation.print_report(report)
+    print(f"Profile report saved to: {report_file}\n")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the full mod localization pipeline.")
+    parser.add_argument("--subprocess", action="store_true",
+                        help="run each stage as a separate Python script (legacy mode)")
+    parser.add_argument("--dump-intermediate", action="store_true",
+                        help="in-process mode: also write extracted/matched/missing identifier lists")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="in-process mode: ignore the parse/translations caches and re-read every XML file")
+    parser.add_argument("--jobs", type=int, metavar="N",
+                        help="in-process mode: parse XML files with N worker processes (0 = one per CPU)")
+    parser.add_argument("--profile", action="store_true",
+                        help="in-process mode: write a per-stage timing/memory/file-read report")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and re-run only the stages affected by each file change")
+    parser.add_argument("--interval", type=float, default=watch_pipeline.DEFAULT_INTERVAL_S, metavar="SECONDS",
+                        help=f"--watch: seconds between change checks (default {watch_pipeline.DEFAULT_INTERVAL_S:g})")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    
     print("Starting FULL MOD LOCALIZATION PIPELINE")
     print(f"Project path: {PROJECTPATH}")
     print(f"Utils directory: {UTILS_DIR}")
@@ -80,25 +165,48 @@ def main():
         print(f"Error: PythonUtils directory not found at {UTILS_DIR}", file=sys.stderr)
         sys.exit(1)
     
-    load_config()  # Validate config early
+    config = load_config()  # Validate config early
+    
+    if args.watch and (args.subprocess or args.profile):
+        print("Error: --watch cannot be combined with --subprocess or --profile", file=sys.stderr)
+        sys.exit(1)
+    
+    languages = load_languages(config["CONFIG"])
+    if languages and (args.subprocess or args.watch):
+        print(f"Note: LANGUAGES ({', '.join(languages)}) are only covered by a normal in-process run.\n")
     
     # Run the entire pipeline
-    for script in SCRIPTS:
-        run_script(script)
+    if args.subprocess:
+        for script in SCRIPTS:
+            run_script(script)
+    else:
+        run_in_process(config, dump=args.dump_intermediate, use_cache=not args.no_cache, jobs=args.jobs,
+                       profile=args.profile, watch=args.watch, interval=args.interval)
+    
+    if args.watch:
+        return
+    
+    dumped = args.subprocess or args.dump_intermediate
     
     print("="*70)
     print("FULL PIPELINE COMPLETED SUCCESSFULLY!")
     print("="*70)
     print("\nFinal outputs generated:")
-    print("  • extracted_identifiers.txt           - All visible identifiers")
-    print("  • missing_identifiers.txt             - Only truly missing & translatable ones")
+    if dumped:
+        print("  • extracted_identifiers.txt           - All visible identifiers")
+        print("  • missing_identifiers.txt             - Only truly missing & translatable ones")
     print("  • missing_identifiers_details.csv     - Detailed list (sorted by file)")
     print("  • MissingTranslations.xml             - Ready-to-translate XML with original English text")
+    print("  • stale_translations.csv              - Translations whose English source changed since")
+    print("  • translation_issues.csv              - Broken placeholders/markup, duplicate keys, empty texts")
+    print("  • MachineTranslations.xml             - Machine translations to review (only with MT_BACKEND)")
+    if languages and not args.subprocess:
+        print(f"  • *.<Language>.csv / *.<Language>.xml - The same reports for {', '.join(languages)}")
     print("\nYou can now:")
     print("   1. Send MissingTranslations.xml to your translator")
     print("   2. Have them replace the English text inside the tags with Traditional Chinese")
-    print("   3. Place the finished file in your mod's localization overrides folder")
+    print("   3. Merge the finished file into TrCn.xml with PythonUtils/merge_translations.py")
     print("\nHappy translating!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()